@@ -1,5 +1,6 @@
 from pyGandalf.scene.scene_manager import SceneManager
 from pyGandalf.scene.editor_manager import EditorManager
+from pyGandalf.scene.render_context import RenderContext
 from pyGandalf.renderer.base_renderer import BaseRenderer
 from pyGandalf.renderer.opengl_renderer import OpenGLRenderer
 from pyGandalf.renderer.webgpu_renderer import WebGPURenderer
@@ -23,6 +24,10 @@ class Application(object):
             cls.instance.frames = 0.0
             cls.instance.is_imgui_attached = False
             cls.instance.is_editor_attached = False
+            cls.instance.fixed_timestep = None
+            cls.instance.max_fixed_steps = 5
+            cls.instance.accumulator = 0.0
+            cls.instance.interpolation_alpha = 1.0
         return cls.instance
     
     def get_window(cls) -> BaseWindow:
@@ -37,6 +42,21 @@ class Application(object):
     def set_is_running(cls, is_running):
         cls.instance.is_application_running = is_running
 
+    def set_fixed_timestep(cls, rate: float = 60.0, max_steps: int = 5):
+        """Enables the fixed timestep mode, where the simulation systems are updated at a fixed rate and the systems that are updated per frame once per rendered frame.
+
+        Args:
+            rate (float, optional): The rate of the simulation in steps per second, or None to disable the fixed timestep mode. Defaults to 60.0.
+            max_steps (int, optional): The maximum number of simulation steps per frame, the rest are dropped so that a slow frame does not cause even slower frames. Defaults to 5.
+        """
+        cls.instance.fixed_timestep = None if rate is None else 1.0 / rate
+        cls.instance.max_fixed_steps = max_steps
+        cls.instance.accumulator = 0.0
+        cls.instance.interpolation_alpha = 1.0
+
+    def get_interpolation_alpha(cls) -> float:
+        return cls.instance.interpolation_alpha
+
     def create(cls, window : BaseWindow, renderer : BaseRenderer, attach_imgui = False, attach_editor = False):
         cls.instance.window = window
         cls.instance.renderer = renderer
@@ -63,7 +83,10 @@ class Application(object):
         def main_loop():
             cls.instance.begin_frame()
             cls.instance.renderer().begin_frame()
-            SceneManager().on_update(cls.instance.delta_time)
+            if cls.instance.fixed_timestep is None:
+                SceneManager().on_update(cls.instance.delta_time)
+            else:
+                cls.instance.fixed_update(cls.instance.delta_time)
             cls.instance.renderer().end_frame()
             if cls.instance.is_imgui_attached:
                 ImGuiRenderer().begin_frame()
@@ -78,10 +101,28 @@ class Application(object):
 
         cls.instance.clean()
 
+    def fixed_update(cls, delta_time: float):
+        # Run as many simulation steps as the elapsed time allows, up to the maximum steps per frame.
+        cls.instance.accumulator += delta_time
+
+        steps = 0
+        while cls.instance.accumulator >= cls.instance.fixed_timestep and steps < cls.instance.max_fixed_steps:
+            SceneManager().on_fixed_update(cls.instance.fixed_timestep)
+            cls.instance.accumulator -= cls.instance.fixed_timestep
+            steps += 1
+
+        # Drop the steps that could not be caught up.
+        if cls.instance.accumulator >= cls.instance.fixed_timestep:
+            cls.instance.accumulator %= cls.instance.fixed_timestep
+
+        cls.instance.interpolation_alpha = cls.instance.accumulator / cls.instance.fixed_timestep
+        SceneManager().on_frame_update(delta_time, cls.instance.interpolation_alpha)
+
     def begin_frame(cls):
         time = glfw.get_time()
         cls.instance.delta_time = time - cls.instance.last_time
         cls.instance.last_time = time
+        RenderContext().invalidate()
 
     def end_frame(cls):
         cls.instance.frames += 1
@@ -25,11 +25,20 @@ from pyGandalf.utilities.mesh_lib import MeshLib
 from pyGandalf.utilities.definitions import SHADERS_PATH, TEXTURES_PATH, MODELS_PATH
 from pyGandalf.utilities.logger import logger
 
+import numpy as np
+
 """
 Showcase of user defined system and component.
 """
 
 class RotateAroundComponent(Component):
+    # NOTE: Declaring the numeric fields of the component lets batched systems read them as NumPy arrays.
+    schema = {
+        'axis': (np.float32, (3,)),
+        'speed': (np.float32, ()),
+        'enabled': (np.bool_, ()),
+    }
+
     def __init__(self, axis: list, speed: float) -> None:
         self.axis = axis
         self.speed = speed
@@ -43,20 +52,23 @@ class RotateAroundSystem(System):
     def on_create_entity(self, entity: Entity, components: Component | tuple[Component]):
         pass
 
-    def on_update_entity(self, ts, entity: Entity, components: Component | tuple[Component]):
+    def on_update_batch(self, ts, entities: list[Entity], columns: tuple):
         # NOTE: These should match the components that the system operates on, which are defined in the system instantiation.
-        #       See line 145: 'scene.register_system(RotateAroundSystem([RotateAroundComponent, TransformComponent]))'
-        rotate_around, transform = components
+        #       See: 'scene.register_system(RotateAroundSystem([RotateAroundComponent, TransformComponent]))'
+        #       Since the system implements 'on_update_batch', all the entities that are stored together are updated in a single call.
+        rotate_around, transform = columns
 
-        if rotate_around.enabled:
-            if rotate_around.axis[0] == 1:
-                transform.rotation.x += rotate_around.speed * ts
+        # Rotate around each axis that is set to 1, only for the enabled components.
+        step = (rotate_around['axis'] == 1) * (rotate_around['speed'] * ts)[:, np.newaxis]
+        step[~rotate_around['enabled']] = 0.0
 
-            if rotate_around.axis[1] == 1:
-                transform.rotation.y += rotate_around.speed * ts
+        # Write back and mark as changed only the rotations that changed.
+        rows = np.flatnonzero(np.any(step != 0.0, axis=1))
+        if len(rows) == 0:
+            return
 
-            if rotate_around.axis[2] == 1:
-                transform.rotation.z += rotate_around.speed * ts
+        transform.write('rotation', transform['rotation'] + step, rows)
+        transform.mark_changed(rows)
 
 def main():
     # Set the logger DEBUG to report all the logs
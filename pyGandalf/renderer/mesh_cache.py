@@ -0,0 +1,117 @@
+from pyGandalf.renderer.vertex_layout import VertexLayout, build_vertex_buffer, build_index_buffer
+from pyGandalf.utilities.mesh_registry import MeshRegistry
+
+import numpy as np
+
+class GPUMesh:
+    """The GPU buffers of a unique mesh, shared by all the meshes with the same geometry, along with the layout of its interleaved vertex buffer and the type of its indices.
+    """
+    __slots__ = ('key', 'render_pipeline', 'buffers', 'index_buffer', 'vertex_layout', 'index_dtype', 'ref_count')
+
+    def __init__(self, key, render_pipeline = None, buffers: list = None, index_buffer = None):
+        self.key = key
+        self.render_pipeline = render_pipeline
+        self.buffers = buffers if buffers is not None else []
+        self.index_buffer = index_buffer
+        self.vertex_layout: VertexLayout = None
+        self.index_dtype: np.dtype = None
+        self.ref_count = 0
+
+class MeshCache:
+    """Keeps one set of GPU buffers per unique mesh, reference counted by the meshes that use them. The buffers are uploaded when the first mesh acquires them
+    and released when the last mesh releases them. The geometry is interleaved into one vertex buffer with the layout that the mesh asks for and its indices are 16-bit when possible.
+    The backend creates and releases the buffers with the given callbacks, so the same cache serves every renderer.
+    """
+    def __init__(self, create_mesh, release_mesh):
+        """
+        Args:
+            create_mesh (Callable[[GPUMesh, np.ndarray, np.ndarray], None]): Uploads the given interleaved vertex data and indices, or None, to the buffers of the given gpu mesh.
+            release_mesh (Callable[[GPUMesh], None]): Releases the buffers of the given gpu mesh.
+        """
+        self.create_mesh = create_mesh
+        self.release_mesh = release_mesh
+        self.meshes: dict[object, GPUMesh] = {}
+
+    def __len__(self) -> int:
+        return len(self.meshes)
+
+    def __contains__(self, key) -> bool:
+        return key in self.meshes
+
+    def get_key(self, render_data):
+        """Returns the identity of the geometry of the given mesh. Meshes loaded from a file are identified by the file, other meshes by the contents of their arrays,
+        along with the vertex layout that they are stored with.
+
+        Args:
+            render_data (StaticMeshComponent): The mesh.
+
+        Returns:
+            Any: The identity of the geometry of the mesh.
+        """
+        return (MeshRegistry().get_mesh_id(render_data), getattr(render_data, 'layout_descriptor', None))
+
+    def get(self, key) -> GPUMesh | None:
+        """Returns the gpu mesh with the given key, or None if it is not resident.
+
+        Args:
+            key (Any): The identity of the geometry.
+
+        Returns:
+            GPUMesh | None: The gpu mesh with the given key.
+        """
+        return self.meshes.get(key)
+
+    def acquire(self, render_data) -> GPUMesh:
+        """Adds a reference to the gpu mesh of the given mesh, uploading its geometry first if no other mesh uses it.
+
+        Args:
+            render_data (StaticMeshComponent): The mesh.
+
+        Returns:
+            GPUMesh: The gpu mesh that holds the geometry of the mesh.
+        """
+        key = self.get_key(render_data)
+
+        gpu_mesh = self.meshes.get(key)
+        if gpu_mesh is None:
+            gpu_mesh = GPUMesh(key)
+
+            vertex_data, gpu_mesh.vertex_layout = build_vertex_buffer(render_data.attributes, getattr(render_data, 'layout_descriptor', None))
+
+            index_data = None
+            if render_data.indices is not None:
+                index_data = build_index_buffer(render_data.indices, len(vertex_data))
+                gpu_mesh.index_dtype = index_data.dtype
+
+            self.create_mesh(gpu_mesh, vertex_data, index_data)
+            self.meshes[key] = gpu_mesh
+
+        gpu_mesh.ref_count += 1
+        return gpu_mesh
+
+    def release(self, gpu_mesh: GPUMesh) -> bool:
+        """Removes a reference from the given gpu mesh, releasing its buffers if no other mesh uses it.
+
+        Args:
+            gpu_mesh (GPUMesh): The gpu mesh.
+
+        Returns:
+            bool: ```True``` if the buffers of the gpu mesh were released, ```False``` otherwise.
+        """
+        if self.meshes.get(gpu_mesh.key) is not gpu_mesh:
+            return False
+
+        gpu_mesh.ref_count -= 1
+        if gpu_mesh.ref_count > 0:
+            return False
+
+        del self.meshes[gpu_mesh.key]
+        self.release_mesh(gpu_mesh)
+        return True
+
+    def clear(self):
+        """Releases the buffers of all the gpu meshes.
+        """
+        for gpu_mesh in self.meshes.values():
+            self.release_mesh(gpu_mesh)
+        self.meshes.clear()
@@ -1,6 +1,9 @@
 from pyGandalf.renderer.base_renderer import BaseRenderer
-from pyGandalf.utilities.opengl_texture_lib import OpenGLTextureLib
-from pyGandalf.utilities.opengl_material_lib import OpenGLMaterialLib
+from pyGandalf.renderer.mesh_cache import MeshCache, GPUMesh
+from pyGandalf.renderer.vertex_layout import VertexFormat
+from pyGandalf.utilities.opengl_texture_lib import OpenGLTextureLib, TextureDimension
+from pyGandalf.utilities.opengl_material_lib import OpenGLMaterialLib, INSTANCE_ATTRIBUTES
+from pyGandalf.utilities.opengl_shader_lib import UniformBuffer
 
 from pyGandalf.utilities.logger import logger
 
@@ -10,6 +13,17 @@ import glm
 
 import ctypes
 
+# The size in bytes of the per-instance data, a model and a normal matrix.
+INSTANCE_STRIDE = 2 * 64
+
+# The GL type of the components of each stored vertex format.
+VERTEX_FORMAT_TYPES = {
+    VertexFormat.FLOAT32: gl.GL_FLOAT,
+    VertexFormat.FLOAT16: gl.GL_HALF_FLOAT,
+    VertexFormat.SNORM16: gl.GL_SHORT,
+    VertexFormat.UNORM16: gl.GL_UNSIGNED_SHORT,
+}
+
 class OpenGLRenderer(BaseRenderer):    
     def initialize(cls, *kargs):
         # Initialize OpenGL
@@ -24,6 +38,19 @@ class OpenGLRenderer(BaseRenderer):
 
         cls.instance.clear_color = glm.vec4(0.25, 0.25, 0.25, 1.0)
 
+        # The number of GL state calls issued and skipped as redundant, by GL function name.
+        cls.instance.call_counts: dict[str, int] = {}
+        cls.instance.skipped_counts: dict[str, int] = {}
+        cls.instance.invalidate_state()
+
+        # The per-instance model and normal matrices of the instanced draws, grown as needed.
+        cls.instance.instance_buffer = None
+        cls.instance.instance_buffer_capacity = 0
+        cls.instance.instanced_vertex_arrays: set[tuple[int, int]] = set()
+
+        # The vao, vbo(s) and ebo of every unique mesh, shared by the meshes with the same geometry.
+        cls.instance.mesh_cache = MeshCache(cls.instance.create_mesh, cls.instance.release_mesh)
+
         if cls.instance.use_framebuffer:
             cls.instance.invalidate_framebuffer(1280, 720)
 
@@ -35,59 +62,87 @@ class OpenGLRenderer(BaseRenderer):
             logger.error('Material instance is None')
             return -1
 
-        if material.instance.descriptor.blend_enabled:
-            gl.glEnable(gl.GL_BLEND)
-            gl.glBlendFunc(gl.GL_SRC_ALPHA, gl.GL_ONE_MINUS_SRC_ALPHA)
-            gl.glBlendEquation(gl.GL_FUNC_ADD)
-
         if material.instance.descriptor.cull_enabled:
-            gl.glEnable(gl.GL_CULL_FACE)
             gl.glFrontFace(gl.GL_CCW)
 
-        if material.instance.descriptor.depth_enabled:
-            gl.glEnable(gl.GL_DEPTH_TEST)
-
         if material.instance.descriptor.primitive == gl.GL_PATCHES:
             gl.glPatchParameteri(gl.GL_PATCH_VERTICES, material.instance.descriptor.vertices_per_patch)
 
-        # Vertex Array Object (VAO)
-        render_data.render_pipeline = gl.glGenVertexArrays(1)
-        gl.glBindVertexArray(render_data.render_pipeline)
-
         # Filter out None from attributes
         render_data.attributes = list(filter(lambda x: x is not None, render_data.attributes))
 
-        for index, attribute in enumerate(render_data.attributes):
-            # Get a pointer to the NumPy array data
-            attribute_pointer = attribute.ctypes.data_as(ctypes.POINTER(gl.GLfloat))
+        # Meshes with the same geometry share one vao, one interleaved vbo and one ebo.
+        gpu_mesh = cls.instance.mesh_cache.acquire(render_data)
 
-            # Vertex Buffer Object (VBO)
-            render_data.buffers.append(gl.glGenBuffers(1))
-            gl.glBindBuffer(gl.GL_ARRAY_BUFFER, render_data.buffers[-1])
-            gl.glBufferData(gl.GL_ARRAY_BUFFER, len(attribute) * len(attribute[0]) * 4, attribute_pointer, gl.GL_STATIC_DRAW)
+        # Release the buffers of the previous geometry of the mesh, if any.
+        cls.instance.remove_batch(render_data)
 
-            gl.glEnableVertexAttribArray(index)
-            gl.glVertexAttribPointer(index, len(attribute[0]), gl.GL_FLOAT, gl.GL_FALSE, len(attribute[0]) * 4, ctypes.c_void_p(0))
-
-        if render_data.indices is not None:
-            # Get a pointer to the NumPy array data
-            indices_pointer = render_data.indices.ctypes.data_as(ctypes.POINTER(gl.GLuint))
-            
-            # Element Buffer Object (EBO)
-            render_data.index_buffer = gl.glGenBuffers(1)
-            gl.glBindBuffer(gl.GL_ELEMENT_ARRAY_BUFFER, render_data.index_buffer)
-            
-            if material.instance.descriptor.primitive == gl.GL_TRIANGLE_STRIP:
-                gl.glBufferData(gl.GL_ELEMENT_ARRAY_BUFFER, len(render_data.indices) * 4, indices_pointer, gl.GL_STATIC_DRAW)
-            else:
-                gl.glBufferData(gl.GL_ELEMENT_ARRAY_BUFFER, len(render_data.indices) * 3 * 4, indices_pointer, gl.GL_STATIC_DRAW)
+        render_data.gpu_mesh = gpu_mesh
+        render_data.render_pipeline = gpu_mesh.render_pipeline
+        render_data.buffers = list(gpu_mesh.buffers)
+        render_data.index_buffer = gpu_mesh.index_buffer
 
         # Use the shader program
-        gl.glUseProgram(material.instance.shader_program)
+        cls.instance.use_program(material.instance.shader_program)
 
         return 0
 
+    def remove_batch(cls, render_data):
+        """Releases the reference of the given mesh to its shared buffers, the buffers are deleted when no other mesh uses them.
+
+        Args:
+            render_data (StaticMeshComponent): The mesh.
+        """
+        gpu_mesh = getattr(render_data, 'gpu_mesh', None)
+        if gpu_mesh is not None:
+            cls.instance.mesh_cache.release(gpu_mesh)
+
+        render_data.gpu_mesh = None
+        render_data.render_pipeline = None
+        render_data.buffers = []
+        render_data.index_buffer = None
+        render_data.batch = -1
+
+    def create_mesh(cls, gpu_mesh: GPUMesh, vertex_data: np.ndarray, index_data: np.ndarray):
+        # Vertex Array Object (VAO)
+        gpu_mesh.render_pipeline = gl.glGenVertexArrays(1)
+        cls.instance.bind_vertex_array(gpu_mesh.render_pipeline)
+
+        # Vertex Buffer Object (VBO), with the attributes of each vertex interleaved
+        gpu_mesh.buffers.append(gl.glGenBuffers(1))
+        gl.glBindBuffer(gl.GL_ARRAY_BUFFER, gpu_mesh.buffers[-1])
+        gl.glBufferData(gl.GL_ARRAY_BUFFER, vertex_data.nbytes, vertex_data.ctypes.data_as(ctypes.c_void_p), gl.GL_STATIC_DRAW)
+
+        for attribute in gpu_mesh.vertex_layout.attributes:
+            gl.glEnableVertexAttribArray(attribute.location)
+            gl.glVertexAttribPointer(attribute.location, attribute.components, VERTEX_FORMAT_TYPES[attribute.format], gl.GL_TRUE if attribute.normalized else gl.GL_FALSE, gpu_mesh.vertex_layout.stride, ctypes.c_void_p(attribute.offset))
+
+        if index_data is not None:
+            # Element Buffer Object (EBO)
+            gpu_mesh.index_buffer = gl.glGenBuffers(1)
+            gl.glBindBuffer(gl.GL_ELEMENT_ARRAY_BUFFER, gpu_mesh.index_buffer)
+            gl.glBufferData(gl.GL_ELEMENT_ARRAY_BUFFER, index_data.nbytes, index_data.ctypes.data_as(ctypes.c_void_p), gl.GL_STATIC_DRAW)
+
+    def release_mesh(cls, gpu_mesh: GPUMesh):
+        buffers = list(gpu_mesh.buffers)
+        if gpu_mesh.index_buffer is not None:
+            buffers.append(gpu_mesh.index_buffer)
+
+        if len(buffers) != 0:
+            gl.glDeleteBuffers(len(buffers), np.array(buffers, dtype=np.uint32))
+
+        # Deleting the bound vao binds the default one.
+        if cls.instance.bound_vertex_array == gpu_mesh.render_pipeline:
+            cls.instance.bound_vertex_array = 0
+        gl.glDeleteVertexArrays(1, np.array([gpu_mesh.render_pipeline], dtype=np.uint32))
+
+        cls.instance.instanced_vertex_arrays = { (vertex_array, location) for vertex_array, location in cls.instance.instanced_vertex_arrays if vertex_array != gpu_mesh.render_pipeline }
+
     def begin_frame(cls):
+        # Other renderers (e.g. imgui) may have changed the GL state since the last frame.
+        cls.instance.invalidate_state()
+        cls.instance.set_depth_mask(gl.GL_TRUE)
+
         if cls.instance.use_framebuffer:
             gl.glBindFramebuffer(gl.GL_FRAMEBUFFER, cls.instance.framebuffer_id)
             gl.glViewport(0, 0, int(cls.instance.framebuffer_width), int(cls.instance.framebuffer_height))
@@ -96,6 +151,11 @@ class OpenGLRenderer(BaseRenderer):
         gl.glClear(gl.GL_COLOR_BUFFER_BIT | gl.GL_DEPTH_BUFFER_BIT)
 
     def end_frame(cls):
+        # Leave the default state behind for the renderers that follow.
+        cls.instance.bind_vertex_array(0)
+        cls.instance.use_program(0)
+        cls.instance.set_depth_mask(gl.GL_TRUE)
+
         if cls.instance.use_framebuffer:
             gl.glBindFramebuffer(gl.GL_FRAMEBUFFER, 0)
 
@@ -107,46 +167,51 @@ class OpenGLRenderer(BaseRenderer):
 
     def set_pipeline(cls, render_data):
         # Bind vao
-        gl.glBindVertexArray(render_data.render_pipeline)
+        cls.instance.bind_vertex_array(render_data.render_pipeline)
 
     def set_buffers(cls, render_data):
-        # Bind ebo
-        if render_data.indices is not None:
-            gl.glBindBuffer(gl.GL_ELEMENT_ARRAY_BUFFER, render_data.index_buffer)
-
-        # Bind vertex buffer and their layout
-        for index, attribute in enumerate(render_data.attributes):
-            # Vertex Buffer Object (VBO)
-            gl.glBindBuffer(gl.GL_ARRAY_BUFFER, render_data.buffers[index])
-
-            # Set vertex buffer layout
-            gl.glEnableVertexAttribArray(index)
-            gl.glVertexAttribPointer(index, len(attribute[0]), gl.GL_FLOAT, gl.GL_FALSE, len(attribute[0]) * 4, ctypes.c_void_p(0))
+        # The vao already holds the ebo and the layout of the vbo(s), they were recorded when it was created.
+        pass
 
     def set_bind_groups(cls, material):
-        if material.instance.descriptor.depth_mask == gl.GL_FALSE:
-            gl.glDepthMask(gl.GL_FALSE)
+        descriptor = material.instance.descriptor
 
-        if material.instance.descriptor.cull_enabled:
-            gl.glCullFace(material.instance.descriptor.cull_face)
+        cls.instance.set_capability(gl.GL_BLEND, descriptor.blend_enabled)
+        if descriptor.blend_enabled:
+            cls.instance.set_blend_func(descriptor.blend_func_source, descriptor.blend_func_destination)
+            cls.instance.set_blend_equation(descriptor.blend_equation)
 
-        if material.instance.descriptor.depth_enabled:
-            gl.glDepthFunc(material.instance.descriptor.depth_func)
+        cls.instance.set_capability(gl.GL_CULL_FACE, descriptor.cull_enabled)
+        if descriptor.cull_enabled:
+            cls.instance.set_cull_face(descriptor.cull_face)
+
+        cls.instance.set_capability(gl.GL_DEPTH_TEST, descriptor.depth_enabled)
+        if descriptor.depth_enabled:
+            cls.instance.set_depth_func(descriptor.depth_func)
+        cls.instance.set_depth_mask(descriptor.depth_mask)
 
         # Bind shader program
-        gl.glUseProgram(material.instance.shader_program)
+        cls.instance.use_program(material.instance.shader_program)
+
+        # Bind the uniform buffer of the material
+        if material.instance.uniform_buffer is not None:
+            cls.instance.bind_uniform_buffer(material.instance.uniform_buffer)
         
         # Get uniform textures
         textures = OpenGLMaterialLib().get_textures(material.instance.name)
 
         # Bind textures
         for index, texture_name in enumerate(material.instance.data.textures):
-            OpenGLTextureLib().bind(texture_name)
+            texture = OpenGLTextureLib().get_textures().get(texture_name)
+            if texture == None:
+                logger.error(f"No such texture exists: '{texture_name}'")
+                continue
+
+            target = gl.GL_TEXTURE_CUBE_MAP if texture.descriptor.dimention == TextureDimension.CUBE else gl.GL_TEXTURE_2D
+            cls.instance.bind_texture(texture.slot, target, texture.id)
+
             if material.instance.has_uniform(textures[index]):
-                slot = OpenGLTextureLib().get_slot(texture_name)
-                if slot == None:
-                    return
-                material.instance.set_uniform(textures[index], int(slot))
+                material.instance.set_uniform(textures[index], int(texture.slot))
 
     def draw(cls, render_data, material):
         if material.instance.descriptor.primitive == gl.GL_PATCHES:
@@ -154,37 +219,192 @@ class OpenGLRenderer(BaseRenderer):
         else:
             gl.glDrawArrays(material.instance.descriptor.primitive, 0, render_data.attributes[0].size)
 
-        # Unbind vao
-        gl.glBindVertexArray(0)
+    def draw_indexed(cls, render_data, material):
+        gl.glDrawElements(material.instance.descriptor.primitive, render_data.indices.size, cls.instance.get_index_type(render_data), None)
 
-        # Unbind textures
-        for texture_name in material.instance.data.textures:
-            OpenGLTextureLib().unbind(texture_name)
+    def set_instance_data(cls, instance_data: np.ndarray):
+        """Uploads the per-instance data of all the instanced draws of a pass, one row per instance with the model matrix followed by the normal matrix.
 
-        # Unbind shader program
-        gl.glUseProgram(0)
+        Args:
+            instance_data (np.ndarray): The per-instance data, a contiguous float32 array with INSTANCE_STRIDE bytes per row.
+        """
+        if cls.instance.instance_buffer == None:
+            cls.instance.instance_buffer = gl.glGenBuffers(1)
 
-        # Reset depth mask
-        if material.instance.descriptor.depth_mask == gl.GL_FALSE:
-            gl.glDepthMask(gl.GL_TRUE)
+        gl.glBindBuffer(gl.GL_ARRAY_BUFFER, cls.instance.instance_buffer)
 
-    def draw_indexed(cls, render_data, material):
-        gl.glDrawElements(material.instance.descriptor.primitive, render_data.indices.size, gl.GL_UNSIGNED_INT, None)
+        # Orphan the previous storage so that the draws still reading it do not stall the upload.
+        if instance_data.nbytes > cls.instance.instance_buffer_capacity:
+            cls.instance.instance_buffer_capacity = max(instance_data.nbytes, 2 * cls.instance.instance_buffer_capacity)
+        gl.glBufferData(gl.GL_ARRAY_BUFFER, cls.instance.instance_buffer_capacity, None, gl.GL_STREAM_DRAW)
+
+        if instance_data.nbytes != 0:
+            gl.glBufferSubData(gl.GL_ARRAY_BUFFER, 0, instance_data.nbytes, instance_data)
 
-        # Unbind vao
-        gl.glBindVertexArray(0)
-        gl.glBindBuffer(gl.GL_ELEMENT_ARRAY_BUFFER, 0)
+    def set_instance_buffers(cls, render_data, material, first_instance: int):
+        """Points the per-instance attributes of the bound vao to the given instance of the uploaded instance data.
 
-        # Unbind textures
-        for texture_name in material.instance.data.textures:
-            OpenGLTextureLib().unbind(texture_name)
+        Args:
+            render_data (StaticMeshComponent): The mesh whose vao is bound.
+            material (MaterialComponent): The material that the mesh is drawn with.
+            first_instance (int): The row of the first instance of the draw in the instance data.
+        """
+        gl.glBindBuffer(gl.GL_ARRAY_BUFFER, cls.instance.instance_buffer)
 
-        # Unbind shader program
-        gl.glUseProgram(0)
+        for index, attribute_name in enumerate(INSTANCE_ATTRIBUTES):
+            location = material.instance.instance_attributes.get(attribute_name)
+            if location == None:
+                continue
 
-        # Reset depth mask if it was set to false
-        if material.instance.descriptor.depth_mask == gl.GL_FALSE:
-            gl.glDepthMask(gl.GL_TRUE)
+            # A mat4 attribute takes up four consecutive locations, one for each column.
+            for column in range(4):
+                if (render_data.render_pipeline, location + column) not in cls.instance.instanced_vertex_arrays:
+                    gl.glEnableVertexAttribArray(location + column)
+                    gl.glVertexAttribDivisor(location + column, 1)
+                    cls.instance.instanced_vertex_arrays.add((render_data.render_pipeline, location + column))
+
+                offset = first_instance * INSTANCE_STRIDE + index * 64 + column * 16
+                gl.glVertexAttribPointer(location + column, 4, gl.GL_FLOAT, gl.GL_FALSE, INSTANCE_STRIDE, ctypes.c_void_p(offset))
+
+    def draw_instanced(cls, render_data, material, instance_count: int):
+        if material.instance.descriptor.primitive == gl.GL_PATCHES:
+            gl.glDrawArraysInstanced(gl.GL_PATCHES, 0, material.instance.descriptor.vertices_per_patch * material.instance.descriptor.patch_resolution * material.instance.descriptor.patch_resolution, instance_count)
+        else:
+            gl.glDrawArraysInstanced(material.instance.descriptor.primitive, 0, render_data.attributes[0].size, instance_count)
+
+    def draw_indexed_instanced(cls, render_data, material, instance_count: int):
+        gl.glDrawElementsInstanced(material.instance.descriptor.primitive, render_data.indices.size, cls.instance.get_index_type(render_data), None, instance_count)
+
+    def get_index_type(cls, render_data):
+        gpu_mesh = getattr(render_data, 'gpu_mesh', None)
+        if gpu_mesh is not None and gpu_mesh.index_dtype == np.uint16:
+            return gl.GL_UNSIGNED_SHORT
+        return gl.GL_UNSIGNED_INT
+
+    def invalidate_state(cls):
+        """Forgets the tracked GL state, so that the next state calls are issued regardless of their values. Must be called when GL state is changed outside of the renderer.
+        """
+        cls.instance.bound_program = None
+        cls.instance.bound_vertex_array = None
+        cls.instance.active_texture_unit = None
+        cls.instance.bound_textures: dict[int, tuple[int, int]] = {}
+        cls.instance.bound_uniform_buffers: dict[int, int] = {}
+        cls.instance.capabilities: dict[int, bool] = {}
+        cls.instance.depth_mask = None
+        cls.instance.depth_func = None
+        cls.instance.cull_face = None
+        cls.instance.blend_func = None
+        cls.instance.blend_equation = None
+
+    def invalidate_texture_bindings(cls):
+        """Forgets the tracked texture bindings, so that the next texture binds are issued. Must be called after textures are bound outside of the renderer, e.g. to upload their data.
+        """
+        cls.instance.bound_textures = {}
+
+    def count_call(cls, name: str, issued: bool) -> bool:
+        """Counts a state call as issued or skipped.
+
+        Args:
+            name (str): The name of the GL function.
+            issued (bool): Whether the call is issued or skipped as redundant.
+
+        Returns:
+            bool: The provided issued flag.
+        """
+        counts = cls.instance.call_counts if issued else cls.instance.skipped_counts
+        counts[name] = counts.get(name, 0) + 1
+        return issued
+
+    def get_call_counts(cls) -> dict[str, int]:
+        """Returns the number of state calls issued to GL since the counters were last reset, by GL function name.
+
+        Returns:
+            dict[str, int]: The number of issued state calls by GL function name.
+        """
+        return cls.instance.call_counts
+
+    def get_skipped_counts(cls) -> dict[str, int]:
+        """Returns the number of state calls skipped as redundant since the counters were last reset, by GL function name.
+
+        Returns:
+            dict[str, int]: The number of skipped state calls by GL function name.
+        """
+        return cls.instance.skipped_counts
+
+    def reset_counts(cls):
+        """Resets the issued and skipped state call counters.
+        """
+        cls.instance.call_counts.clear()
+        cls.instance.skipped_counts.clear()
+
+    def use_program(cls, program: int):
+        if cls.instance.count_call('glUseProgram', cls.instance.bound_program != program):
+            gl.glUseProgram(program)
+            cls.instance.bound_program = program
+
+    def bind_vertex_array(cls, vertex_array: int):
+        if cls.instance.count_call('glBindVertexArray', cls.instance.bound_vertex_array != vertex_array):
+            gl.glBindVertexArray(vertex_array)
+            cls.instance.bound_vertex_array = vertex_array
+
+    def bind_uniform_buffer(cls, uniform_buffer: UniformBuffer):
+        if uniform_buffer.buffer_id is None:
+            uniform_buffer.create()
+
+        if cls.instance.count_call('glBindBufferBase', cls.instance.bound_uniform_buffers.get(uniform_buffer.binding) != uniform_buffer.buffer_id):
+            gl.glBindBufferBase(gl.GL_UNIFORM_BUFFER, uniform_buffer.binding, uniform_buffer.buffer_id)
+            cls.instance.bound_uniform_buffers[uniform_buffer.binding] = uniform_buffer.buffer_id
+
+    def bind_texture(cls, slot: int, target, texture_id: int):
+        if cls.instance.bound_textures.get(slot) == (target, texture_id):
+            cls.instance.count_call('glBindTexture', False)
+            return
+
+        if cls.instance.count_call('glActiveTexture', cls.instance.active_texture_unit != slot):
+            gl.glActiveTexture(gl.GL_TEXTURE0 + slot)
+            cls.instance.active_texture_unit = slot
+
+        cls.instance.count_call('glBindTexture', True)
+        gl.glBindTexture(target, texture_id)
+        cls.instance.bound_textures[slot] = (target, texture_id)
+
+    def set_capability(cls, capability, enabled: bool):
+        enabled = bool(enabled)
+        if cls.instance.capabilities.get(capability) == enabled:
+            cls.instance.count_call('glEnable' if enabled else 'glDisable', False)
+            return
+
+        cls.instance.count_call('glEnable' if enabled else 'glDisable', True)
+        if enabled:
+            gl.glEnable(capability)
+        else:
+            gl.glDisable(capability)
+        cls.instance.capabilities[capability] = enabled
+
+    def set_depth_mask(cls, depth_mask):
+        if cls.instance.count_call('glDepthMask', cls.instance.depth_mask != depth_mask):
+            gl.glDepthMask(depth_mask)
+            cls.instance.depth_mask = depth_mask
+
+    def set_depth_func(cls, depth_func):
+        if cls.instance.count_call('glDepthFunc', cls.instance.depth_func != depth_func):
+            gl.glDepthFunc(depth_func)
+            cls.instance.depth_func = depth_func
+
+    def set_cull_face(cls, cull_face):
+        if cls.instance.count_call('glCullFace', cls.instance.cull_face != cull_face):
+            gl.glCullFace(cull_face)
+            cls.instance.cull_face = cull_face
+
+    def set_blend_func(cls, source, destination):
+        if cls.instance.count_call('glBlendFunc', cls.instance.blend_func != (source, destination)):
+            gl.glBlendFunc(source, destination)
+            cls.instance.blend_func = (source, destination)
+
+    def set_blend_equation(cls, equation):
+        if cls.instance.count_call('glBlendEquation', cls.instance.blend_equation != equation):
+            gl.glBlendEquation(equation)
+            cls.instance.blend_equation = equation
 
     def clean(cls):
         pass
@@ -220,6 +440,7 @@ class OpenGLRenderer(BaseRenderer):
         gl.glTexImage2D(gl.GL_TEXTURE_2D, 0, gl.GL_DEPTH_COMPONENT24, int(width), int(height), 0, gl.GL_DEPTH_COMPONENT, gl.GL_UNSIGNED_INT, None)
 
         gl.glBindTexture(gl.GL_TEXTURE_2D, 0)
+        cls.instance.invalidate_texture_bindings()
 
         # Build the framebuffer.
         cls.instance.framebuffer_id = gl.glGenFramebuffers(1)
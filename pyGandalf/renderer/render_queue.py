@@ -0,0 +1,242 @@
+from pyGandalf.utilities.logger import logger
+
+from enum import Enum
+import numpy as np
+import heapq
+import glm
+
+class RenderPassType(Enum):
+    SHADOW = 0
+    COLOR = 1
+
+class DrawPacket:
+    """A single draw submitted to the render queue, along with its sort key.
+    """
+    __slots__ = ('key', 'render_pass', 'render_data', 'material', 'transform', 'model', 'transparent')
+
+    def __init__(self, key: int, render_pass: RenderPassType, render_data, material, transform, model, transparent: bool):
+        self.key = key
+        self.render_pass = render_pass
+        self.render_data = render_data
+        self.material = material
+        self.transform = transform
+        self.model = model
+        self.transparent = transparent
+
+class CompactIds:
+    """Assigns dense ids to the shaders, materials or meshes of the render queue. The ids of the keys that were not submitted during the last frame are released and reused,
+    so that the ids stay within the bits of their sort key field. If more keys than the field can hold are submitted in the same frame, the extra keys share the last id.
+    """
+    def __init__(self, name: str, bits: int):
+        self.name = name
+        self.overflow_id = (1 << bits) - 1
+        self.ids: dict = {}
+        self.free_ids: list[int] = []
+        self.used: set = set()
+        self.overflowed = False
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def get(self, key) -> int:
+        """Returns the dense id of the given key, assigning the lowest free one the first time it is seen.
+
+        Args:
+            key (Any): The shader, material or mesh identity.
+
+        Returns:
+            int: The dense id, or the last id of the field if all the others are in use.
+        """
+        compact_id = self.ids.get(key)
+        if compact_id is None:
+            if len(self.free_ids) != 0:
+                compact_id = heapq.heappop(self.free_ids)
+            elif len(self.ids) < self.overflow_id:
+                compact_id = len(self.ids)
+            else:
+                if not self.overflowed:
+                    logger.warning(f'Render queue {self.name} ids exceed the {self.overflow_id} available, the extra {self.name}s are not grouped in the draw order')
+                    self.overflowed = True
+                return self.overflow_id
+            self.ids[key] = compact_id
+
+        self.used.add(key)
+        return compact_id
+
+    def release_unused(self):
+        """Releases the ids of the keys that were not submitted since the last release.
+        """
+        if len(self.used) != len(self.ids):
+            for key in [key for key in self.ids if key not in self.used]:
+                heapq.heappush(self.free_ids, self.ids.pop(key))
+        self.used.clear()
+        self.overflowed = False
+
+class RenderQueue:
+    """Collects the draws of a frame and orders them by a 64-bit sort key, so that the draws that share the same shader, material and mesh are executed back to back.
+    From the most to the least significant bits, the key of an opaque draw holds the pass, the transparency flag, the shader, the material, the mesh and the depth, so that
+    opaque draws are drawn front to back within each state group. Transparent draws hold the inverted depth right after the transparency flag and they are drawn back to front.
+    """
+    PASS_BITS = 2
+    TRANSPARENT_BITS = 1
+    SHADER_BITS = 10
+    MATERIAL_BITS = 13
+    MESH_BITS = 14
+    DEPTH_BITS = 24
+
+    def __init__(self, max_draws: int = None):
+        self.max_draws = max_draws
+        self.packets: list[DrawPacket] = []
+        self.sorted_packets: list[DrawPacket] = None
+        self.draw_counts: dict[RenderPassType, int] = {}
+
+        # Dense ids of the shaders, materials and meshes that are submitted.
+        self.shader_ids = CompactIds('shader', self.SHADER_BITS)
+        self.material_ids = CompactIds('material', self.MATERIAL_BITS)
+        self.mesh_ids = CompactIds('mesh', self.MESH_BITS)
+
+    def __len__(self) -> int:
+        return len(self.packets)
+
+    def __iter__(self):
+        return iter(self.sort())
+
+    def clear(self):
+        """Removes all the submitted draws. The ids of the shaders, materials and meshes that were submitted are kept for the next frame, the rest are released.
+        """
+        self.packets.clear()
+        self.sorted_packets = None
+        self.draw_counts.clear()
+
+        self.shader_ids.release_unused()
+        self.material_ids.release_unused()
+        self.mesh_ids.release_unused()
+
+    def make_key(self, render_pass: RenderPassType, transparent: bool, shader, material, mesh, depth: float) -> int:
+        """Builds the sort key of a draw.
+
+        Args:
+            render_pass (RenderPassType): The pass that the draw belongs to.
+            transparent (bool): Whether the draw is blended with what is already drawn.
+            shader (Any): The shader identity, e.g. the shader program.
+            material (Any): The material identity, e.g. the material name.
+            mesh (Any): The mesh identity, e.g. the vertex array object.
+            depth (float): The normalized distance from the camera, in the [0, 1] range.
+
+        Returns:
+            int: The 64-bit sort key.
+        """
+        shader_id = self.shader_ids.get(shader)
+        material_id = self.material_ids.get(material)
+        mesh_id = self.mesh_ids.get(mesh)
+
+        max_depth = (1 << self.DEPTH_BITS) - 1
+        depth = int(min(max(depth, 0.0), 1.0) * max_depth)
+
+        key = render_pass.value
+        key = (key << self.TRANSPARENT_BITS) | int(transparent)
+
+        if transparent:
+            key = (key << self.DEPTH_BITS) | (max_depth - depth)
+            key = (key << self.SHADER_BITS) | shader_id
+            key = (key << self.MATERIAL_BITS) | material_id
+            key = (key << self.MESH_BITS) | mesh_id
+        else:
+            key = (key << self.SHADER_BITS) | shader_id
+            key = (key << self.MATERIAL_BITS) | material_id
+            key = (key << self.MESH_BITS) | mesh_id
+            key = (key << self.DEPTH_BITS) | depth
+
+        return key
+
+    def submit(self, render_pass: RenderPassType, render_data, material, transform, model, shader, depth: float = 0.0, transparent: bool = False, mesh = None) -> DrawPacket:
+        """Submits a draw to the queue.
+
+        Args:
+            render_pass (RenderPassType): The pass that the draw belongs to.
+            render_data (StaticMeshComponent): The mesh to draw.
+            material (MaterialComponent): The material to draw the mesh with.
+            transform (TransformComponent): The transform of the drawn entity.
+            model (Any): The model matrix of the drawn entity.
+            shader (Any): The shader identity, e.g. the shader program.
+            depth (float, optional): The normalized distance from the camera, in the [0, 1] range.
+            transparent (bool, optional): Whether the draw is blended with what is already drawn.
+            mesh (Any, optional): The mesh identity, by default the render pipeline of the mesh.
+
+        Returns:
+            DrawPacket: The submitted draw packet.
+        """
+        if mesh is None:
+            mesh = render_data.render_pipeline
+
+        key = self.make_key(render_pass, transparent, shader, material.name, mesh, depth)
+        packet = DrawPacket(key, render_pass, render_data, material, transform, model, transparent)
+        self.packets.append(packet)
+        self.sorted_packets = None
+        return packet
+
+    def sort(self) -> list[DrawPacket]:
+        """Returns the submitted draws in sort key order. If the draws of a pass exceed the draw budget of the queue, a warning is logged and the budget grows to fit them.
+
+        Returns:
+            list[DrawPacket]: The submitted draws in sort key order.
+        """
+        if self.sorted_packets is not None:
+            return self.sorted_packets
+
+        keys = np.fromiter((packet.key for packet in self.packets), dtype=np.uint64, count=len(self.packets))
+        order = np.argsort(keys, kind='stable')
+        packets = [self.packets[index] for index in order.tolist()]
+
+        self.draw_counts.clear()
+        for packet in packets:
+            self.draw_counts[packet.render_pass] = self.draw_counts.get(packet.render_pass, 0) + 1
+
+        if self.max_draws is not None and len(self.draw_counts) != 0:
+            draw_count = max(self.draw_counts.values())
+            if draw_count > self.max_draws:
+                logger.warning(f'Render queue draw budget of {self.max_draws} draws per pass exceeded by {draw_count - self.max_draws} draws, the budget grows to {draw_count} draws')
+                self.max_draws = draw_count
+
+        self.sorted_packets = packets
+        return packets
+
+    def get_packets(self, render_pass: RenderPassType) -> list[DrawPacket]:
+        """Returns the submitted draws of the given pass in sort key order.
+
+        Args:
+            render_pass (RenderPassType): The pass to get the draws of.
+
+        Returns:
+            list[DrawPacket]: The submitted draws of the given pass in sort key order.
+        """
+        return [packet for packet in self.sort() if packet.render_pass == render_pass]
+
+    def get_draw_count(self, render_pass: RenderPassType = None) -> int:
+        """Returns the number of draws submitted to the given pass, or to all the passes.
+
+        Args:
+            render_pass (RenderPassType, optional): The pass to count the draws of.
+
+        Returns:
+            int: The number of submitted draws.
+        """
+        self.sort()
+        if render_pass is None:
+            return len(self.packets)
+        return self.draw_counts.get(render_pass, 0)
+
+    def depth_of(self, position, camera_position, far: float) -> float:
+        """Returns the normalized distance of the given position from the camera, used as the depth of the sort key.
+
+        Args:
+            position (glm.vec3): The world position of the drawn entity.
+            camera_position (glm.vec3): The world position of the camera.
+            far (float): The far plane of the camera.
+
+        Returns:
+            float: The distance divided by the far plane.
+        """
+        if camera_position is None or far <= 0.0:
+            return 0.0
+        return glm.distance(position, camera_position) / far
@@ -0,0 +1,154 @@
+from pyGandalf.utilities.logger import logger
+
+from enum import Enum
+from dataclasses import dataclass
+
+import numpy as np
+
+class VertexFormat(Enum):
+    FLOAT32 = 'float32'
+    FLOAT16 = 'float16'
+    SNORM16 = 'snorm16'
+    UNORM16 = 'unorm16'
+
+# The NumPy type of the components of each stored vertex format.
+VERTEX_FORMAT_DTYPES = {
+    VertexFormat.FLOAT32: np.float32,
+    VertexFormat.FLOAT16: np.float16,
+    VertexFormat.SNORM16: np.int16,
+    VertexFormat.UNORM16: np.uint16,
+}
+
+@dataclass(frozen=True)
+class VertexLayoutDescriptor:
+    """The format that each vertex attribute is stored with, by attribute location. The attributes past the listed formats are stored as float32.
+    """
+    formats: tuple[VertexFormat, ...] = ()
+
+    def get_format(self, location: int) -> VertexFormat:
+        return self.formats[location] if location < len(self.formats) else VertexFormat.FLOAT32
+
+# Half-float positions, snorm16 normals and half-float texture coordinates, for the usual [positions, normals, texture coordinates] attributes.
+# The texture coordinates are not stored as unorm16, since that clamps them to [0, 1] and breaks tiling with repeating samplers.
+QUANTIZED_VERTEX_LAYOUT = VertexLayoutDescriptor((VertexFormat.FLOAT16, VertexFormat.SNORM16, VertexFormat.FLOAT16))
+
+@dataclass(frozen=True)
+class VertexAttribute:
+    """An attribute of an interleaved vertex buffer.
+    """
+    location: int
+    format: VertexFormat
+    components: int
+    stored_components: int
+    offset: int
+
+    @property
+    def normalized(self) -> bool:
+        return self.format in (VertexFormat.SNORM16, VertexFormat.UNORM16)
+
+@dataclass(frozen=True)
+class VertexLayout:
+    """The layout of an interleaved vertex buffer, the attributes of a vertex are stored next to each other.
+    Layouts are hashable, so that the render pipelines that read the same layout can be shared.
+    """
+    attributes: tuple[VertexAttribute, ...]
+    stride: int
+
+def quantize(attribute: np.ndarray, vertex_format: VertexFormat) -> np.ndarray:
+    """Converts the given float attribute to the given vertex format. The normalized formats clamp the attribute, to [-1, 1] for snorm16 and to [0, 1] for unorm16.
+
+    Args:
+        attribute (np.ndarray): The attribute, one row per vertex.
+        vertex_format (VertexFormat): The format to store the attribute with.
+
+    Returns:
+        np.ndarray: The converted attribute, one row per vertex.
+    """
+    match vertex_format:
+        case VertexFormat.FLOAT16:
+            return attribute.astype(np.float16)
+        case VertexFormat.SNORM16:
+            if np.any(np.abs(attribute) > 1.0):
+                logger.warning('Vertex attribute values outside of [-1, 1] are clamped when stored as snorm16')
+            return np.round(np.clip(attribute, -1.0, 1.0) * 32767.0).astype(np.int16)
+        case VertexFormat.UNORM16:
+            if np.any((attribute < 0.0) | (attribute > 1.0)):
+                logger.warning('Vertex attribute values outside of [0, 1] are clamped when stored as unorm16, e.g. tiling texture coordinates')
+            return np.round(np.clip(attribute, 0.0, 1.0) * 65535.0).astype(np.uint16)
+    return attribute.astype(np.float32)
+
+def build_vertex_buffer(attributes: list[np.ndarray], descriptor: VertexLayoutDescriptor = None) -> tuple[np.ndarray, VertexLayout]:
+    """Interleaves the given attributes into a single vertex buffer, converting each one to the format that the descriptor asks for.
+    The 16-bit formats are padded to an even number of components, so that every attribute and vertex stays 4-byte aligned, the padded fourth component is 1.
+
+    Args:
+        attributes (list[np.ndarray]): The attributes, one row per vertex, in attribute location order.
+        descriptor (VertexLayoutDescriptor, optional): The formats of the attributes, all of them are stored as float32 by default.
+
+    Returns:
+        tuple[np.ndarray, VertexLayout]: The interleaved vertex data and its layout.
+    """
+    if descriptor == None:
+        descriptor = VertexLayoutDescriptor()
+
+    layout_attributes: list[VertexAttribute] = []
+    converted: list[np.ndarray] = []
+    offset = 0
+
+    for location, attribute in enumerate(attributes):
+        attribute = np.asarray(attribute, dtype=np.float32)
+        attribute = attribute.reshape(len(attribute), -1)
+
+        vertex_format = descriptor.get_format(location)
+        data = quantize(attribute, vertex_format)
+
+        components = data.shape[1]
+        stored_components = components
+        if vertex_format != VertexFormat.FLOAT32 and components % 2 != 0:
+            stored_components = components + 1
+            padding = np.zeros((len(data), 1), dtype=data.dtype)
+            if stored_components == 4:
+                padding[:] = quantize(np.ones((1, 1), dtype=np.float32), vertex_format)
+            data = np.hstack((data, padding))
+
+        layout_attributes.append(VertexAttribute(location, vertex_format, components, stored_components, offset))
+        converted.append(data)
+        offset += data.dtype.itemsize * stored_components
+
+    stride = offset
+    vertex_count = min((len(data) for data in converted), default=0)
+
+    vertex_type = np.dtype({
+        'names': [f'a_{attribute.location}' for attribute in layout_attributes],
+        'formats': [(VERTEX_FORMAT_DTYPES[attribute.format], (attribute.stored_components,)) for attribute in layout_attributes],
+        'offsets': [attribute.offset for attribute in layout_attributes],
+        'itemsize': stride
+    })
+
+    vertex_data = np.zeros(vertex_count, dtype=vertex_type)
+    for attribute, data in zip(layout_attributes, converted):
+        vertex_data[f'a_{attribute.location}'] = data[:vertex_count]
+
+    return vertex_data, VertexLayout(tuple(layout_attributes), stride)
+
+def build_index_buffer(indices: np.ndarray, vertex_count: int) -> np.ndarray:
+    """Converts the given indices to 16-bit indices if every vertex can be addressed with them, otherwise to 32-bit indices.
+    The 16-bit indices are padded to a multiple of 4 bytes, the padding is never drawn.
+
+    Args:
+        indices (np.ndarray): The indices.
+        vertex_count (int): The number of vertices that the indices address.
+
+    Returns:
+        np.ndarray: The flattened indices as uint16 or uint32.
+    """
+    indices = np.asarray(indices).ravel()
+
+    # 0xFFFF is left out, since it restarts strip primitives.
+    if vertex_count >= 0xFFFF:
+        return indices.astype(np.uint32)
+
+    index_data = indices.astype(np.uint16)
+    if len(index_data) % 2 != 0:
+        index_data = np.append(index_data, np.uint16(0))
+    return index_data
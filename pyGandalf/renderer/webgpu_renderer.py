@@ -1,10 +1,13 @@
 from pyGandalf.renderer.base_renderer import BaseRenderer
+from pyGandalf.renderer.mesh_cache import MeshCache, GPUMesh
+from pyGandalf.renderer.vertex_layout import VertexAttribute
 from pyGandalf.utilities.logger import logger
 
+import numpy as np
 import glm
 import wgpu
 
-from dataclasses import dataclass, field
+from dataclasses import dataclass, field, astuple
 
 @dataclass
 class ColorAttachmentDescription:
@@ -56,6 +59,12 @@ class WebGPURenderer(BaseRenderer):
         cls.instance.clear_color = glm.vec4(0.8, 0.5, 0.3, 1.0)
         cls.instance.shadows_enabled = False
 
+        # The vertex and index buffers of every unique mesh, shared by the meshes with the same geometry.
+        cls.instance.mesh_cache = MeshCache(cls.instance.create_mesh, cls.instance.release_mesh)
+
+        # The render pipelines, shared by the meshes with the same vertex layout that are drawn with the same shader and material descriptor.
+        cls.instance.render_pipelines: dict[tuple, wgpu.GPURenderPipeline] = {}
+
     def begin_frame(cls):
         cls.instance.current_texture = cls.instance.present_context.get_current_texture()
     
@@ -74,48 +83,94 @@ class WebGPURenderer(BaseRenderer):
         # Filter out None from attributes
         render_data.attributes = list(filter(lambda x: x is not None, render_data.attributes))
 
-        for attribute in render_data.attributes:
-            buffer : wgpu.GPUBuffer = cls.instance.device.create_buffer_with_data(
-                data=attribute,
-                usage=wgpu.BufferUsage.VERTEX
-            )
+        # Meshes with the same geometry share one set of vertex buffers and one index buffer.
+        gpu_mesh = cls.instance.mesh_cache.acquire(render_data)
+
+        # Release the buffers of the previous geometry of the mesh, if any.
+        cls.instance.release_buffers(render_data)
+
+        render_data.gpu_mesh = gpu_mesh
+        render_data.buffers = list(gpu_mesh.buffers)
+        render_data.index_buffer = gpu_mesh.index_buffer
+
+    def release_buffers(cls, render_data):
+        """Releases the reference of the given mesh to its shared buffers, the buffers are destroyed when no other mesh uses them.
+
+        Args:
+            render_data (StaticMeshComponent): The mesh.
+        """
+        gpu_mesh = getattr(render_data, 'gpu_mesh', None)
+        if gpu_mesh is not None:
+            cls.instance.mesh_cache.release(gpu_mesh)
 
-            render_data.buffers.append(buffer)
+        render_data.gpu_mesh = None
+        render_data.buffers = []
+        render_data.index_buffer = None
 
-        if render_data.indices is not None:
+    def create_mesh(cls, gpu_mesh: GPUMesh, vertex_data: np.ndarray, index_data: np.ndarray):
+        # One vertex buffer, with the attributes of each vertex interleaved
+        buffer : wgpu.GPUBuffer = cls.instance.device.create_buffer_with_data(
+            data=vertex_data,
+            usage=wgpu.BufferUsage.VERTEX
+        )
+        gpu_mesh.buffers.append(buffer)
+
+        if index_data is not None:
             index_buffer : wgpu.GPUBuffer = cls.instance.device.create_buffer_with_data(
-                data=render_data.indices,
+                data=index_data,
                 usage=wgpu.BufferUsage.INDEX
             )
-            render_data.index_buffer = index_buffer
+            gpu_mesh.index_buffer = index_buffer
+
+    def release_mesh(cls, gpu_mesh: GPUMesh):
+        for buffer in gpu_mesh.buffers:
+            buffer.destroy()
+
+        if gpu_mesh.index_buffer is not None:
+            gpu_mesh.index_buffer.destroy()
+
+    def get_render_pipeline_key(cls, render_pipeline_desc: RenderPipelineDescription) -> tuple:
+        """Returns the identity of the render pipeline that the given description asks for, i.e. the vertex layout of the mesh, the shader and the material descriptor.
+
+        Args:
+            render_pipeline_desc (RenderPipelineDescription): The description of the render pipeline.
+
+        Returns:
+            tuple: The identity of the render pipeline.
+        """
+        material_instance = render_pipeline_desc.material_instance
+        return (
+            render_pipeline_desc.render_data.gpu_mesh.vertex_layout,
+            material_instance.shader_module,
+            material_instance.pipeline_layout,
+            astuple(material_instance.descriptor),
+            cls.instance.render_texture_format
+        )
 
     def create_render_pipeline(cls, render_pipeline_desc: RenderPipelineDescription):
-        buffers = []
-        render_pipeline_desc.render_data.attributes = list(filter(lambda x: x is not None, render_pipeline_desc.render_data.attributes))
-        for index, attribute in enumerate(render_pipeline_desc.render_data.attributes):
-            attribute_format = wgpu.VertexFormat.float32
-            vertex_length = len(attribute[index])
-            match vertex_length:
-                case 1:
-                    attribute_format = wgpu.VertexFormat.float32
-                case 2:
-                    attribute_format = wgpu.VertexFormat.float32x2
-                case 3:
-                    attribute_format = wgpu.VertexFormat.float32x3
-                case 4:
-                    attribute_format = wgpu.VertexFormat.float32x4
-
-            buffers.append({
-                "array_stride": 4 * vertex_length,
+        # Reuse the render pipeline of a mesh with the same vertex layout and material descriptor, if any.
+        key = cls.instance.get_render_pipeline_key(render_pipeline_desc)
+        render_pipeline = cls.instance.render_pipelines.get(key)
+        if render_pipeline is not None:
+            render_pipeline_desc.render_data.render_pipeline = render_pipeline
+            return
+
+        # The layout of the interleaved vertex buffer of the mesh, create_buffers() has to be called first.
+        vertex_layout = render_pipeline_desc.render_data.gpu_mesh.vertex_layout
+        buffers = [
+            {
+                "array_stride": vertex_layout.stride,
                 "step_mode": wgpu.VertexStepMode.vertex,
                 "attributes": [
                     {
-                        "format": attribute_format,
-                        "offset": 0,
-                        "shader_location": index,
+                        "format": cls.instance.get_vertex_format(attribute),
+                        "offset": attribute.offset,
+                        "shader_location": attribute.location,
                     }
+                    for attribute in vertex_layout.attributes
                 ],
-            })
+            }
+        ]
 
         depth_stencil = None
         if render_pipeline_desc.material_instance.descriptor.depth_enabled:
@@ -178,8 +233,14 @@ class WebGPURenderer(BaseRenderer):
                 ],
             },
         )
+        cls.instance.render_pipelines[key] = render_pipeline
         render_pipeline_desc.render_data.render_pipeline = render_pipeline
 
+    def get_vertex_format(cls, attribute: VertexAttribute) -> str:
+        if attribute.stored_components == 1:
+            return attribute.format.value
+        return f'{attribute.format.value}x{attribute.stored_components}'
+
     def begin_render_pass(cls, render_pass_desc: RenderPassDescription):
         assert cls.instance.current_render_pass == None, 'Previous render pass not ended yet, call end_render_pass() first before starting a new one.'
         cls.instance.command_encoder = cls.instance.device.create_command_encoder()
@@ -251,7 +312,11 @@ class WebGPURenderer(BaseRenderer):
     def set_buffers(cls, render_data):
         assert cls.instance.current_render_pass != None, 'Submiting commands to None render pass, call begin_render_pass() first.'
         if render_data.index_buffer != None:
-            cls.instance.current_render_pass.set_index_buffer(render_data.index_buffer, wgpu.IndexFormat.uint32)
+            index_format = wgpu.IndexFormat.uint32
+            gpu_mesh = getattr(render_data, 'gpu_mesh', None)
+            if gpu_mesh is not None and gpu_mesh.index_dtype == np.uint16:
+                index_format = wgpu.IndexFormat.uint16
+            cls.instance.current_render_pass.set_index_buffer(render_data.index_buffer, index_format)
 
         for index, buffer in enumerate(render_data.buffers):
             cls.instance.current_render_pass.set_vertex_buffer(index, buffer)
@@ -261,23 +326,28 @@ class WebGPURenderer(BaseRenderer):
         for index, bind_group in enumerate(material.instance.bind_groups):
             cls.instance.current_render_pass.set_bind_group(index, bind_group, [], 0, 1)
 
-    def write_buffer(cls, buffer, uniform_data, size=0):
-        cls.instance.device.queue.write_buffer(buffer, 0, uniform_data, 0, size)
+    def write_buffer(cls, buffer, uniform_data, size=0, buffer_offset=0):
+        cls.instance.device.queue.write_buffer(buffer, buffer_offset, uniform_data, 0, size)
+
+    def write_texture(cls, uniform_data, image_bytes=None, origin=(0, 0, 0), size=None):
+        if image_bytes is None:
+            image_bytes = uniform_data.data.image_bytes
+        if size == None:
+            size = [uniform_data.data.width, uniform_data.data.height, uniform_data.descriptor.array_layer_count]
 
-    def write_texture(cls, uniform_data):
         cls.instance.device.queue.write_texture(
             {
                 "texture": uniform_data.texture,
                 "mip_level": 0,
-                "origin": (0, 0, 0)
+                "origin": origin
             },
-            uniform_data.data.image_bytes,
+            image_bytes,
             {
                 "offset": 0,
-                "bytes_per_row": uniform_data.data.width * 4,
-                "rows_per_image": uniform_data.data.height
+                "bytes_per_row": size[0] * 4,
+                "rows_per_image": size[1]
             },
-            [uniform_data.data.width, uniform_data.data.height, uniform_data.descriptor.array_layer_count]
+            size
         )
 
     def draw(cls, render_data, instance_count=1, first_instance=0):
@@ -2,24 +2,36 @@
 out vec4 FragColor;
 
 uniform sampler2D u_AlbedoMap;
-uniform vec3 u_Color = vec3(1.0, 1.0, 1.0);
 
 in vec3 v_Position;
 in vec3 v_Normal;
 in vec2 v_TexCoord;
 
-// Light properties
-uniform int u_LightCount = 0;
-uniform vec3 u_LightPositions[16];
-uniform vec3 u_LightColors[16];
-uniform float u_LightIntensities[16];
+// Per-frame camera properties, shared by all the shaders
+layout(std140) uniform Camera
+{
+    mat4 u_View;
+    mat4 u_Projection;
+    mat4 u_LightSpaceMatrix;
+    vec3 u_ViewPosition;
+    float u_Time;
+};
 
-// Material properties
-uniform float u_Glossiness = 5.0f;
-uniform float u_Metalicness = 5.0f;
+// Per-frame light properties, shared by all the shaders
+layout(std140) uniform Lights
+{
+    int u_LightCount;
+    vec3 u_LightPositions[16];
+    vec3 u_LightColors[16];
+    float u_LightIntensities[16];
+};
 
-// Camera properties
-uniform vec3 u_ViewPosition = vec3(0.0, 0.0, 10.0);
+// Material properties
+layout(std140) uniform Material
+{
+    vec3 u_Color;
+    float u_Glossiness;
+};
 
 void main()
 {
@@ -3,8 +3,19 @@ layout(location = 0) in vec3 a_Position;
 layout(location = 1) in vec3 a_Normal;
 layout(location = 2) in vec2 a_TexCoord;
 
-uniform mat4 u_ModelViewProjection;
-uniform mat4 u_Model;
+// Per-instance model and normal matrices
+layout(location = 8) in mat4 a_Model;
+layout(location = 12) in mat4 a_NormalMatrix;
+
+// Per-frame camera properties, shared by all the shaders
+layout(std140) uniform Camera
+{
+    mat4 u_View;
+    mat4 u_Projection;
+    mat4 u_LightSpaceMatrix;
+    vec3 u_ViewPosition;
+    float u_Time;
+};
 
 out vec3 v_Position;
 out vec3 v_Normal;
@@ -12,9 +23,11 @@ out vec2 v_TexCoord;
 
 void main()
 {
-    v_Position = (u_Model * vec4(a_Position, 1.0)).xyz;
-    v_Normal = (transpose(inverse(u_Model)) * vec4(a_Normal, 0.0)).xyz;
+    vec4 position = a_Model * vec4(a_Position, 1.0);
+
+    v_Position = position.xyz;
+    v_Normal = (a_NormalMatrix * vec4(a_Normal, 0.0)).xyz;
     v_TexCoord = a_TexCoord;
 
-    gl_Position = u_ModelViewProjection * vec4(a_Position, 1.0);
+    gl_Position = u_Projection * u_View * position;
 }
\ No newline at end of file
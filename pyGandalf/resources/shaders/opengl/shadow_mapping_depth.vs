@@ -1,10 +1,20 @@
 #version 330 core
 layout (location = 0) in vec3 a_Position;
 
-uniform mat4 u_LightSpaceMatrix;
-uniform mat4 u_Model;
+// Per-instance model matrix
+layout(location = 8) in mat4 a_Model;
+
+// Per-frame camera properties, shared by all the shaders
+layout(std140) uniform Camera
+{
+    mat4 u_View;
+    mat4 u_Projection;
+    mat4 u_LightSpaceMatrix;
+    vec3 u_ViewPosition;
+    float u_Time;
+};
 
 void main()
 {
-    gl_Position = u_LightSpaceMatrix * u_Model * vec4(a_Position, 1.0);
+    gl_Position = u_LightSpaceMatrix * a_Model * vec4(a_Position, 1.0);
 }
\ No newline at end of file
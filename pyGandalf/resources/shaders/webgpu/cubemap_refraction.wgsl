@@ -14,9 +14,13 @@ struct UniformData {
    viewPosition: vec4<f32>,
 };
 
+struct InstanceData {
+    inverseModelMatrix: mat4x4f,
+    modelMatrix: mat4x4f,
+};
+
 struct ModelData {
-    inverseModelMatrix: array<mat4x4f, 512>,
-    modelMatrix: array<mat4x4f, 512>,
+    instances: array<InstanceData>,
 };
 
 @group(0) @binding(0) var<uniform> u_UniformData: UniformData;
@@ -27,8 +31,8 @@ struct ModelData {
 @vertex
 fn vs_main(@builtin(instance_index) ID: u32, in: VertexInput) -> VertexOutput {
     var output : VertexOutput;
-    output.v_Normal = (transpose(u_ModelData.inverseModelMatrix[ID]) * vec4(in.a_Normal, 1.0)).xyz;
-    output.v_Position = u_UniformData.projectionMatrix * u_UniformData.viewMatrix * u_ModelData.modelMatrix[ID] * vec4(in.a_Position, 1.0);
+    output.v_Normal = (transpose(u_ModelData.instances[ID].inverseModelMatrix) * vec4(in.a_Normal, 1.0)).xyz;
+    output.v_Position = u_UniformData.projectionMatrix * u_UniformData.viewMatrix * u_ModelData.instances[ID].modelMatrix * vec4(in.a_Position, 1.0);
     return output;
 }
 
@@ -15,8 +15,12 @@ struct UniformData {
     objectColor: vec4f,
 };
 
+struct InstanceData {
+    modelMatrix: mat4x4f,
+};
+
 struct ModelData {
-    modelMatrix: array<mat4x4f, 512>,
+    instances: array<InstanceData>,
 };
 
 @group(0) @binding(0) var<uniform> u_UniformData: UniformData;
@@ -27,10 +31,10 @@ struct ModelData {
 @vertex
 fn vs_main(@builtin(instance_index) ID: u32, in: VertexInput) -> VertexOutput {
     var out: VertexOutput;
-    var mvp: mat4x4f = u_UniformData.projectionMatrix * u_UniformData.viewMatrix * u_ModelData.modelMatrix[ID];
+    var mvp: mat4x4f = u_UniformData.projectionMatrix * u_UniformData.viewMatrix * u_ModelData.instances[ID].modelMatrix;
     out.v_Position = mvp * vec4<f32>(in.a_Position, 1.0);
     out.v_TexCoord = in.a_TexCoord;
-    out.v_FragPosLightSpace = u_UniformData.lightSpaceMatrix * vec4(u_ModelData.modelMatrix[ID] * vec4f(in.a_Position, 1.0));
+    out.v_FragPosLightSpace = u_UniformData.lightSpaceMatrix * vec4(u_ModelData.instances[ID].modelMatrix * vec4f(in.a_Position, 1.0));
     return out;
 }
 
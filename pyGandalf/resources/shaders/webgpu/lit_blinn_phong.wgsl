@@ -21,8 +21,12 @@ struct UniformData {
     lightCount: f32,
 };
 
-struct ModelData{
-    modelMatrix: array<mat4x4f, 512>,
+struct InstanceData {
+    modelMatrix: mat4x4f,
+};
+
+struct ModelData {
+    instances: array<InstanceData>,
 };
 
 @group(0) @binding(0) var<uniform> u_UniformData: UniformData;
@@ -33,10 +37,10 @@ struct ModelData{
 @vertex
 fn vs_main(@builtin(instance_index) ID: u32, in: VertexInput) -> VertexOutput {
     var out: VertexOutput;
-    var mvp: mat4x4f = u_UniformData.projectionMatrix * u_UniformData.viewMatrix * u_ModelData.modelMatrix[ID];
+    var mvp: mat4x4f = u_UniformData.projectionMatrix * u_UniformData.viewMatrix * u_ModelData.instances[ID].modelMatrix;
     out.v_Position = mvp * vec4<f32>(in.a_Position, 1.0);
-    out.v_CurrentPosition = (u_ModelData.modelMatrix[ID] * vec4f(in.a_Position, 1.0)).xyz;
-    out.v_Normal = (u_ModelData.modelMatrix[ID] * vec4f(in.a_Normal, 0.0)).xyz;
+    out.v_CurrentPosition = (u_ModelData.instances[ID].modelMatrix * vec4f(in.a_Position, 1.0)).xyz;
+    out.v_Normal = (u_ModelData.instances[ID].modelMatrix * vec4f(in.a_Normal, 0.0)).xyz;
     out.v_TexCoord = in.a_TexCoord;
     return out;
 }
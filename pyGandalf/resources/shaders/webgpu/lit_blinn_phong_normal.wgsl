@@ -27,9 +27,13 @@ struct UniformData {
     lightCount: f32,
 };
 
+struct InstanceData {
+    modelMatrix: mat4x4f,
+    inverseModelMatrix: mat4x4f,
+};
+
 struct ModelData {
-    modelMatrix: array<mat4x4f, 512>,
-    inverseModelMatrix: array<mat4x4f, 512>,
+    instances: array<InstanceData>,
 };
 
 @group(0) @binding(0) var<uniform> u_UniformData: UniformData;
@@ -41,7 +45,7 @@ struct ModelData {
 
 @vertex
 fn vs_main(@builtin(instance_index) ID: u32, in: VertexInput) -> VertexOutput {
-    let inverseModelMat3x3 = mat3x3f(u_ModelData.inverseModelMatrix[ID][0].xyz, u_ModelData.inverseModelMatrix[ID][1].xyz, u_ModelData.inverseModelMatrix[ID][2].xyz);
+    let inverseModelMat3x3 = mat3x3f(u_ModelData.instances[ID].inverseModelMatrix[0].xyz, u_ModelData.instances[ID].inverseModelMatrix[1].xyz, u_ModelData.instances[ID].inverseModelMatrix[2].xyz);
     var normalMatrix: mat3x3f = transpose(inverseModelMat3x3);
 
     var T: vec3f = normalize(normalMatrix * in.a_Tangent);
@@ -54,11 +58,11 @@ fn vs_main(@builtin(instance_index) ID: u32, in: VertexInput) -> VertexOutput {
     var TBN: mat3x3f = transpose(mat3x3f(T, B, N));
 
     var out: VertexOutput;
-    var mvp: mat4x4f = u_UniformData.projectionMatrix * u_UniformData.viewMatrix * u_ModelData.modelMatrix[ID];
+    var mvp: mat4x4f = u_UniformData.projectionMatrix * u_UniformData.viewMatrix * u_ModelData.instances[ID].modelMatrix;
     out.v_Position = mvp * vec4<f32>(in.a_Position, 1.0);
     out.v_TexCoord = in.a_TexCoord;
     out.v_TangentViewPos = TBN * u_UniformData.viewPosition.xyz;
-    out.v_TangentFragPos = TBN * (u_ModelData.modelMatrix[ID] * vec4f(in.a_Position, 1.0)).xyz;
+    out.v_TangentFragPos = TBN * (u_ModelData.instances[ID].modelMatrix * vec4f(in.a_Position, 1.0)).xyz;
 
     if (u_UniformData.lightCount == 1) {
         out.v_TangentLightPos0 = TBN * u_UniformData.lightPositions[0].xyz;
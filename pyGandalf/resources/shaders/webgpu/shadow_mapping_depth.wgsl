@@ -9,8 +9,12 @@ struct UniformData {
     lightSpaceMatrix: mat4x4f,
 };
 
+struct InstanceData {
+    modelMatrix: mat4x4f,
+};
+
 struct ModelData {
-    modelMatrix: array<mat4x4f, 512>,
+    instances: array<InstanceData>,
 };
 
 @group(0) @binding(0) var<uniform> u_UniformData: UniformData;
@@ -19,7 +23,7 @@ struct ModelData {
 @vertex
 fn vs_main(@builtin(instance_index) ID: u32, in: VertexInput) -> VertexOutput {
     var out: VertexOutput;
-    out.v_Position = u_UniformData.lightSpaceMatrix * u_ModelData.modelMatrix[ID] * vec4<f32>(in.a_Position, 1.0);
+    out.v_Position = u_UniformData.lightSpaceMatrix * u_ModelData.instances[ID].modelMatrix * vec4<f32>(in.a_Position, 1.0);
     return out;
 }
 
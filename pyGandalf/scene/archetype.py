@@ -0,0 +1,217 @@
+from pyGandalf.scene.entity import Entity
+
+import glm
+import numpy as np
+
+# Fixed size float types of glm that expose their data through the buffer protocol.
+GLM_FLOAT_TYPES = (glm.vec2, glm.vec3, glm.vec4, glm.quat, glm.mat3, glm.mat4)
+
+# The glm types that the rows of float arrays are converted to, by the shape of a row.
+GLM_TYPES_BY_SHAPE = { (2,): glm.vec2, (3,): glm.vec3, (4,): glm.vec4, (3, 3): glm.mat3, (4, 4): glm.mat4 }
+
+def to_field_values(array: np.ndarray) -> list:
+    """Converts the rows of the given array to field values, glm vectors and matrices for float rows of the matching shape and plain python values otherwise.
+
+    Args:
+        array (np.ndarray): The array of shape (N, *field_shape).
+
+    Returns:
+        list: The N field values.
+    """
+    glm_type = GLM_TYPES_BY_SHAPE.get(array.shape[1:])
+    if glm_type is not None and np.issubdtype(array.dtype, np.floating):
+        array = np.ascontiguousarray(array, dtype=np.float32)
+        return [glm_type(row) for row in array]
+    return array.tolist()
+
+class Archetype():
+    """A table that densely stores the components of all the entities that have the exact same set of component types, one column per component type.
+    """
+    def __init__(self, signature: frozenset[type]):
+        self.signature: frozenset[type] = signature
+        self.entities: list[Entity] = []
+        self.columns: dict[type, list] = { component_type: [] for component_type in signature }
+
+        # Incremented on every structural change, i.e. whenever rows are added or moved.
+        self.version = 0
+
+        # The latest change tick of the components of each column, so that columns without changes can be skipped at once.
+        self.changed_ticks: dict[type, int] = { component_type: 0 for component_type in signature }
+
+        # Cached transitions to the archetypes that are reached when adding or removing a component type.
+        self.add_edges: dict[type, Archetype] = {}
+        self.remove_edges: dict[type, Archetype] = {}
+
+    def __len__(self) -> int:
+        return len(self.entities)
+
+    def append(self, entity: Entity, components: dict) -> int:
+        """Appends a new row with the given entity and its components at the end of the table.
+
+        Args:
+            entity (Entity): The entity of the new row.
+            components (dict[type, component]): The components of the entity, one for every component type of the archetype.
+
+        Returns:
+            int: The row of the entity in the table.
+        """
+        self.entities.append(entity)
+        for component_type, column in self.columns.items():
+            component = components[component_type]
+            column.append(component)
+            if component.changed_tick > self.changed_ticks[component_type]:
+                self.changed_ticks[component_type] = component.changed_tick
+        self.version += 1
+        return len(self.entities) - 1
+
+    def extend(self, entities: list[Entity], columns: dict) -> int:
+        """Appends new rows with the given entities and their components at the end of the table.
+
+        Args:
+            entities (list[Entity]): The entities of the new rows.
+            columns (dict[type, list]): The components of the entities, one list per component type of the archetype.
+
+        Returns:
+            int: The row of the first entity in the table.
+        """
+        first_row = len(self.entities)
+        self.entities.extend(entities)
+        for component_type, column in self.columns.items():
+            components = columns[component_type]
+            column.extend(components)
+            for component in components:
+                if component.changed_tick > self.changed_ticks[component_type]:
+                    self.changed_ticks[component_type] = component.changed_tick
+        self.version += 1
+        return first_row
+
+    def swap_remove(self, row: int) -> Entity | None:
+        """Removes the given row by moving the last row of the table into its place, so that the table stays dense.
+
+        Args:
+            row (int): The row to remove.
+
+        Returns:
+            Entity | None: The entity that was moved into the removed row or ```None``` if the removed row was the last one.
+        """
+        last = len(self.entities) - 1
+
+        if row != last:
+            self.entities[row] = self.entities[last]
+            for column in self.columns.values():
+                column[row] = column[last]
+
+        self.entities.pop()
+        for column in self.columns.values():
+            column.pop()
+        self.version += 1
+
+        return self.entities[row] if row != last else None
+
+    def get(self, row: int, component_type: type):
+        """Returns the component of the given type that is stored at the given row.
+
+        Args:
+            row (int): The row of the entity in the table.
+            component_type (type): The type of the component to get.
+
+        Returns:
+            component: The component of the given type that is stored at the given row.
+        """
+        return self.columns[component_type][row]
+
+    def get_row(self, row: int) -> dict:
+        """Returns all the components stored at the given row.
+
+        Args:
+            row (int): The row of the entity in the table.
+
+        Returns:
+            dict[type, component]: A dictionary with keys the component types and values the components of the row.
+        """
+        return { component_type: column[row] for component_type, column in self.columns.items() }
+
+class ComponentColumn():
+    """A view over a column of components of the same type, which gathers the numeric fields of the components, as declared by their schema, into NumPy arrays.
+    """
+    def __init__(self, component_type: type, archetype: Archetype, change_tick: int = 0):
+        self.component_type = component_type
+        self.archetype = archetype
+        self.change_tick = change_tick
+        self.components = archetype.columns[component_type]
+        self.arrays: dict[str, np.ndarray] = {}
+
+    def __len__(self) -> int:
+        return len(self.components)
+
+    def __iter__(self):
+        return iter(self.components)
+
+    def __getitem__(self, key):
+        if isinstance(key, str):
+            return self.array(key)
+        return self.components[key]
+
+    def array(self, field: str) -> np.ndarray:
+        """Returns the values of the given field of all the components as a NumPy array of shape (N, *field_shape). The array is gathered once and cached.
+
+        Args:
+            field (str): The name of the field, as declared in the schema of the component type.
+
+        Returns:
+            np.ndarray: The values of the given field of all the components.
+        """
+        array = self.arrays.get(field)
+        if array is None:
+            dtype, shape = self.component_type.schema[field]
+            values = [getattr(component, field) for component in self.components]
+
+            if len(values) != 0 and isinstance(values[0], GLM_FLOAT_TYPES):
+                array = np.frombuffer(b''.join(map(bytes, values)), dtype=np.float32).astype(dtype)
+            else:
+                array = np.array(values, dtype=dtype)
+
+            array = array.reshape((len(values),) + tuple(shape))
+            self.arrays[field] = array
+        return array
+
+    def write(self, field: str, values: np.ndarray = None, rows = None):
+        """Writes back the given values to the field of the components, keeping the type of the existing field values (e.g. glm.vec3, list or float).
+
+        Args:
+            field (str): The name of the field to write.
+            values (np.ndarray, optional): The new values, one per component. Defaults to the cached array of the field.
+            rows (_type_, optional): The rows to write, if only some of the components changed. Defaults to all the rows.
+        """
+        if values is None:
+            values = self.arrays[field]
+        else:
+            self.arrays[field] = values
+
+        if rows is None:
+            rows = range(len(self.components))
+
+        for row in rows:
+            component = self.components[row]
+            previous = getattr(component, field)
+            value = values[row]
+
+            if isinstance(previous, list):
+                setattr(component, field, value.tolist())
+            elif isinstance(previous, GLM_FLOAT_TYPES):
+                setattr(component, field, type(previous)(value.astype(np.float32)))
+            else:
+                setattr(component, field, value.item())
+
+    def mark_changed(self, rows = None):
+        """Marks the components of the given rows as changed at the change tick of the column.
+
+        Args:
+            rows (_type_, optional): The rows of the components that changed. Defaults to all the rows.
+        """
+        if rows is None:
+            rows = range(len(self.components))
+
+        for row in rows:
+            self.components[row].changed_tick = self.change_tick
+            self.archetype.changed_ticks[self.component_type] = self.change_tick
@@ -0,0 +1,202 @@
+from pyGandalf.scene.entity import Entity
+from pyGandalf.scene.editor_components import EditorVisibleComponent
+
+from enum import Enum
+import threading
+
+class CommandType(Enum):
+    SPAWN = 0
+    DESTROY = 1
+    ADD_COMPONENT = 2
+    REMOVE_COMPONENT = 3
+    SPAWN_BATCH = 4
+
+class CommandBuffer():
+    """Records structural changes (spawning and destroying entities, adding and removing components) so that they can be applied later, all at once, at a sync point of the scene.
+    Recording is safe while systems iterate over their entities, since nothing changes until the buffer is flushed.
+    """
+    def __init__(self, scene):
+        self.scene = scene
+        self.commands: list[tuple[CommandType, Entity, object]] = []
+        self.spawned: dict[Entity, None] = {}
+
+        # Systems of the same stage may record commands concurrently.
+        self.lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.commands)
+
+    def spawn(self, *components) -> Entity:
+        """Records the creation of a new entity with the given components. The entity handle is reserved immediately, so that more commands can be recorded for it.
+
+        Args:
+            *components (component): The components of the new entity.
+
+        Returns:
+            Entity: The handle of the entity that will be created when the buffer is flushed.
+        """
+        with self.lock:
+            entity = self.scene.reserve_entity()
+        self.spawned[entity] = None
+        self.commands.append((CommandType.SPAWN, entity, None))
+
+        if not any(isinstance(component, EditorVisibleComponent) for component in components):
+            self.add_component(entity, EditorVisibleComponent())
+        for component in components:
+            self.add_component(entity, component)
+
+        return entity
+
+    def spawn_batch(self, entities: list[Entity], columns: dict):
+        """Records the creation of a batch of entities, that were already reserved, with the given components. The batch is stored together and the interested systems are notified once for the whole batch when the buffer is flushed.
+
+        Args:
+            entities (list[Entity]): The reserved handles of the entities.
+            columns (dict[type, list]): The components of the entities, one list with one component per entity for each component type.
+        """
+        self.commands.append((CommandType.SPAWN_BATCH, None, (entities, columns)))
+
+    def destroy(self, entity: Entity):
+        """Records the destruction of the given entity and its children.
+
+        Args:
+            entity (Entity): The entity to destroy.
+        """
+        self.commands.append((CommandType.DESTROY, entity, None))
+
+    def add_component(self, entity: Entity, component):
+        """Records the addition of the given component to the given entity.
+
+        Args:
+            entity (Entity): The entity to add the component to.
+            component (type(component)): The component to add.
+        """
+        self.commands.append((CommandType.ADD_COMPONENT, entity, component))
+
+    def remove_component(self, entity: Entity, component_type: type):
+        """Records the removal of the component of the given type from the given entity.
+
+        Args:
+            entity (Entity): The entity to remove the component from.
+            component_type (type): The type of the component to remove.
+        """
+        self.commands.append((CommandType.REMOVE_COMPONENT, entity, component_type))
+
+    def flush(self):
+        """Applies all the recorded commands to the scene. The commands of each entity are collapsed, so that it is moved at most once to its final archetype,
+        the moves are sorted by destination archetype and the systems are notified once per system for all the entities that joined or left them.
+        """
+        if len(self.commands) == 0:
+            return
+
+        from pyGandalf.core.application import Application
+
+        scene = self.scene
+        commands, self.commands = self.commands, []
+        spawned, self.spawned = self.spawned, {}
+
+        batches = [payload for command_type, _, payload in commands if command_type is CommandType.SPAWN_BATCH]
+        batched = { entity: None for entities, _ in batches for entity in entities }
+
+        # Destroy entities first, in index order, children are destroyed along with their parents.
+        destroyed = { entity: None for command_type, entity, _ in commands if command_type is CommandType.DESTROY }
+        for entity in sorted(destroyed, key=lambda entity: entity.index):
+            if entity in spawned or entity in batched:
+                scene.release_entity(entity)
+            elif scene.is_alive(entity):
+                scene.destroy_entity(entity)
+
+        # Store the spawned batches, without the entities that were already destroyed, so that the component changes recorded for them are applied as well.
+        for entities, columns in batches:
+            rows = [row for row, entity in enumerate(entities) if entity not in destroyed]
+            if len(rows) != len(entities):
+                entities = [entities[row] for row in rows]
+                columns = { component_type: [column[row] for row in rows] for component_type, column in columns.items() }
+            if len(entities) != 0:
+                scene.insert_batch(entities, columns)
+
+        # Collapse the component changes of each entity, a component type maps to the new component or to None if it is removed.
+        changes: dict[Entity, dict[type, object]] = {}
+        replaced: dict[Entity, set[type]] = {}
+        for command_type, entity, payload in commands:
+            if command_type is CommandType.SPAWN_BATCH or entity in destroyed:
+                continue
+
+            entity_changes = changes.setdefault(entity, {})
+            if command_type is CommandType.ADD_COMPONENT:
+                component_type = type(payload)
+                if component_type in entity_changes and entity_changes[component_type] is None:
+                    replaced.setdefault(entity, set()).add(component_type)
+                entity_changes[component_type] = payload
+            elif command_type is CommandType.REMOVE_COMPONENT:
+                entity_changes[payload] = None
+
+        archetype_order = { signature: order for order, signature in enumerate(scene.archetypes.keys()) }
+
+        moves = []
+        removals: dict = {}
+        for entity, entity_changes in changes.items():
+            is_spawned = entity in spawned
+            if not is_spawned and not scene.is_alive(entity):
+                continue
+
+            location = None if is_spawned else scene.get_entity_location(entity)
+            if not is_spawned and location is None:
+                continue
+
+            signature = frozenset() if location is None else location[0].signature
+            entity_replaced = replaced.get(entity, ())
+
+            added = { component_type: component for component_type, component in entity_changes.items() if component is not None and (component_type not in signature or component_type in entity_replaced) }
+            removed = [ component_type for component_type, component in entity_changes.items() if component_type in signature and (component is None or component_type in entity_replaced) ]
+
+            if not is_spawned and len(added) == 0 and len(removed) == 0:
+                continue
+
+            for component_type in removed:
+                for system in scene.system_interests.get(component_type, ()):
+                    removals.setdefault(system, []).append((entity, component_type))
+
+            destination = scene.get_archetype(signature.difference(removed).union(added.keys()))
+            if destination.signature not in archetype_order:
+                archetype_order[destination.signature] = len(archetype_order)
+
+            moves.append((entity, destination, added, is_spawned))
+
+        # Systems drop the entities that lost components they operate on, grouped per system.
+        for system, entities in removals.items():
+            for entity, component_type in entities:
+                system.remove_entity_components(entity, component_type)
+
+        # Move every entity once, grouped by destination archetype.
+        moves.sort(key=lambda move: (archetype_order[move[1].signature], move[0].index))
+        for entity, destination, added, is_spawned in moves:
+            for component in added.values():
+                component.changed_tick = scene.change_tick
+
+            if is_spawned:
+                scene.entities[entity] = None
+                scene.entity_locations[entity.index] = (destination, destination.append(entity, added))
+            else:
+                scene.move_entity(entity, destination, new_components=added)
+
+        # Systems gain the entities that now have all the components they operate on, grouped per system.
+        created: dict = {}
+        for entity, destination, added, _ in moves:
+            entity_components = None
+            for component_type in added.keys():
+                for system in scene.system_interests.get(component_type, ()):
+                    if entity_components is None:
+                        entity_components = destination.get_row(scene.entity_locations[entity.index][1])
+
+                    components = system.filter_entity_components(entity, entity_components)
+                    if components is not None:
+                        created.setdefault(system, []).append((entity, components))
+
+        if Application().is_running():
+            for system in scene.systems:
+                for entity, components in created.get(system, ()):
+                    if len(components) == 1:
+                        system.on_create_entity(entity, components[0])
+                    else:
+                        system.on_create_entity(entity, components)
@@ -2,12 +2,17 @@ from pyGandalf.scene.entity import Entity
 
 import glm
 import wgpu
+import numpy as np
 
 import uuid
 from enum import Enum
 
 class Component(object):
-    pass
+    # Maps the numeric fields of the component to their NumPy dtype and shape, so that batched systems can receive them as arrays.
+    schema: dict[str, tuple] = None
+
+    # The change tick of the scene when the component was last added or marked as changed.
+    changed_tick: int = 0
 
 class InfoComponent(Component):
     def __init__(self, tag = 'UnnamedEntity'):
@@ -15,6 +20,13 @@ class InfoComponent(Component):
         self.enabled = True
 
 class TransformComponent(Component):
+    schema = {
+        'translation': (np.float32, (3,)),
+        'rotation': (np.float32, (3,)),
+        'scale': (np.float32, (3,)),
+        'static': (np.bool_, ()),
+    }
+
     def __init__(self, translation: glm.vec3, rotation: glm.vec3, scale: glm.vec3):
         self.translation = translation
         self.rotation = rotation
@@ -26,15 +38,22 @@ class TransformComponent(Component):
 
         self.dirty = True
         self.static = False
+
+        self.previous_world_matrix = None
     
     def get_world_position(self) -> glm.vec3:
         return (self.world_matrix * glm.vec4(self.translation, 1.0)).xyz
 
+    def get_interpolated_world_matrix(self, alpha: float) -> glm.mat4:
+        previous = getattr(self, 'previous_world_matrix', None)
+        if alpha >= 1.0 or previous is None or previous is self.world_matrix:
+            return self.world_matrix
+        return previous * (1.0 - alpha) + self.world_matrix * alpha
+
 class LinkComponent(Component):
     def __init__(self, parent: Entity):
+        # The persistent id of the parent is only resolved when the scene gets serialized.
         self.parent_id = 0
-        if parent != None:
-            self.parent_id = parent.id
         self.parent: Entity = parent
         self.prev_parent: Entity = parent
         self.children: list[Entity] = []
@@ -76,14 +95,18 @@ class CameraControllerComponent(Component):
         self.prev_mouse_y = 0.0
 
 class StaticMeshComponent(Component):
-    def __init__(self, name, attributes = None, indices = None):
+    def __init__(self, name, attributes = None, indices = None, layout_descriptor = None):
         self.name = name
         self.attributes = attributes
         self.indices = indices
 
+        # The formats that the attributes are stored with on the GPU (VertexLayoutDescriptor), float32 if None.
+        self.layout_descriptor = layout_descriptor
+
         self.render_pipeline = None
         self.buffers = []
         self.index_buffer = None
+        self.gpu_mesh = None
 
         self.batch = -1
         self.load_from_file = True if attributes == None else False
@@ -96,6 +119,11 @@ class MaterialComponent(Component):
         self.instance = None
 
 class LightComponent(Component):
+    schema = {
+        'color': (np.float32, (3,)),
+        'intensity': (np.float32, ()),
+    }
+
     def __init__(self, color, intensity):
         self.color = color
         self.intensity = intensity
@@ -1,6 +1,53 @@
 import uuid
 
 class Entity:
-    def __init__(self):
-        self.id = uuid.uuid4()
-        self.enabled = True
\ No newline at end of file
+    """A lightweight handle to an entity of a scene. The index addresses the scene storage and the generation detects handles to entities that were destroyed.
+    """
+    # Class level defaults, so that handles restored from older serialized scenes are still valid objects.
+    index = -1
+    generation = 0
+    persistent_id = None
+    id_index = None
+
+    def __init__(self, index: int = -1, generation: int = 0, id_index: dict = None):
+        self.index = index
+        self.generation = generation
+        self.enabled = True
+        self.persistent_id = None
+
+        # The id index of the scene that the entity belongs to, its persistent id is indexed there as soon as it is assigned or generated.
+        self.id_index = id_index
+
+    @property
+    def id(self) -> uuid.UUID:
+        """The persistent id of the entity, which is only generated the first time it is requested (e.g. when the scene gets serialized).
+
+        Returns:
+            uuid.UUID: The persistent id of the entity.
+        """
+        if self.persistent_id is None:
+            self.id = uuid.uuid4()
+        return self.persistent_id
+
+    @id.setter
+    def id(self, value: uuid.UUID):
+        if self.id_index is not None:
+            if self.persistent_id is not None and self.id_index.get(self.persistent_id) == self:
+                del self.id_index[self.persistent_id]
+            self.id_index[value] = self
+        self.persistent_id = value
+
+    def __getstate__(self):
+        # The id index of the scene is not serialized along with the handle.
+        state = self.__dict__.copy()
+        state.pop('id_index', None)
+        return state
+
+    def __eq__(self, other):
+        return isinstance(other, Entity) and self.index == other.index and self.generation == other.generation
+
+    def __hash__(self):
+        return hash((self.index, self.generation))
+
+    def __repr__(self):
+        return f'Entity({self.index}, {self.generation})'
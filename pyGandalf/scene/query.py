@@ -0,0 +1,79 @@
+from pyGandalf.scene.entity import Entity
+from pyGandalf.scene.archetype import Archetype
+
+class Query():
+    """A cached view over all the entities that have all the included component types and none of the excluded ones.
+    The result is gathered from the matching archetypes and it is only gathered again when one of them changes structurally.
+    """
+    def __init__(self, with_types: tuple[type], without: tuple[type] = ()):
+        self.with_types: tuple[type] = tuple(with_types)
+        self.without: frozenset[type] = frozenset(without)
+        self.archetypes: list[Archetype] = []
+        self.versions: list[int] = []
+        self.entities: list[Entity] = []
+        self.components: list = []
+
+    def __iter__(self):
+        self.refresh()
+        return zip(self.entities, self.components)
+
+    def __len__(self) -> int:
+        self.refresh()
+        return len(self.entities)
+
+    def matches(self, archetype: Archetype) -> bool:
+        """Checks if the entities of the given archetype belong to the query result.
+
+        Args:
+            archetype (Archetype): The archetype to check.
+
+        Returns:
+            bool: ```True``` if the archetype has all the included component types and none of the excluded ones, ```False``` otherwise.
+        """
+        return all(component_type in archetype.signature for component_type in self.with_types) and self.without.isdisjoint(archetype.signature)
+
+    def add_archetype(self, archetype: Archetype):
+        """Adds the given archetype to the archetypes of the query, if it matches.
+
+        Args:
+            archetype (Archetype): The newly created archetype.
+        """
+        if self.matches(archetype):
+            self.archetypes.append(archetype)
+
+    def refresh(self):
+        """Gathers the result again, only if a structural change happened to any of the matching archetypes since it was last gathered.
+        """
+        versions = [archetype.version for archetype in self.archetypes]
+        if versions == self.versions:
+            return
+
+        self.versions = versions
+        self.entities = []
+        self.components = []
+
+        for archetype in self.archetypes:
+            self.entities.extend(archetype.entities)
+            if len(self.with_types) == 1:
+                self.components.extend(archetype.columns[self.with_types[0]])
+            else:
+                self.components.extend(zip(*[archetype.columns[component_type] for component_type in self.with_types]))
+
+    def get_entities(self) -> list[Entity]:
+        """Returns a list containing the entities of the query result.
+
+        Returns:
+            list[Entity]: A list containing the entities of the query result.
+        """
+        self.refresh()
+        return self.entities
+
+    def get_components(self) -> list:
+        """Returns a list containing the components of the query result, in the order of the included component types.
+        If only one component type is included, the list contains the components themselves instead of tuples.
+
+        Returns:
+            list: A list containing the components of the query result.
+        """
+        self.refresh()
+        return self.components
@@ -0,0 +1,132 @@
+from pyGandalf.scene.components import TransformComponent
+from pyGandalf.systems.system import SystemState
+from pyGandalf.systems.light_system import LightSystem
+
+import glm
+import glfw
+import numpy as np
+
+class RenderContext(object):
+    """The data that all the rendering systems share during a frame, i.e. the matrices of the main camera, the packed light arrays and the light space matrix.
+    It is built once per frame, the first time it is requested after the frame began, instead of once per rendered entity or material.
+    """
+    def __new__(cls):
+        if not hasattr(cls, 'instance'):
+            cls.instance = super(RenderContext, cls).__new__(cls)
+            cls.instance.is_valid = False
+            cls.instance.clear()
+        return cls.instance
+
+    def clear(cls):
+        cls.instance.time = 0.0
+        cls.instance.camera = None
+        cls.instance.camera_transform = None
+        cls.instance.camera_position = None
+        cls.instance.view = glm.mat4(1.0)
+        cls.instance.projection = glm.mat4(1.0)
+        cls.instance.view_projection = glm.mat4(1.0)
+        cls.instance.skybox_view_projection = glm.mat4(1.0)
+
+        # The left handed projection and the transposed matrices of the WebGPU backend.
+        cls.instance.projection_lh = np.identity(4, dtype=np.float32)
+        cls.instance.view_t = np.identity(4, dtype=np.float32)
+        cls.instance.skybox_view_projection_lh = np.identity(4, dtype=np.float32)
+
+        cls.instance.has_light_system = False
+        cls.instance.light_count = 0
+        cls.instance.light_positions: list[glm.vec3] = []
+        cls.instance.light_colors: list[glm.vec3] = []
+        cls.instance.light_intensities = np.zeros(0, dtype=np.float32)
+
+        # The lights packed as glm arrays for the OpenGL backend and as vec4 rows for the WebGPU backend.
+        cls.instance.light_positions_array = None
+        cls.instance.light_colors_array = None
+        cls.instance.light_positions_vec4 = np.zeros((0, 4), dtype=np.float32)
+        cls.instance.light_colors_vec4 = np.zeros((0, 4), dtype=np.float32)
+        cls.instance.light_intensities_vec4 = np.zeros((0, 4), dtype=np.float32)
+
+        # The light space matrix of the first light, for the shadow pass of each backend, or None if there is no light or camera.
+        cls.instance.light_space_matrix = None
+        cls.instance.light_space_matrix_lh = None
+
+    def invalidate(cls):
+        """Marks the context as stale, so that it is built again the next time it is requested. Gets called at the beginning of every frame.
+        """
+        cls.instance.is_valid = False
+
+    def get(cls):
+        """Returns the render context of the current frame, building it first if it is stale.
+
+        Returns:
+            RenderContext: The render context of the current frame.
+        """
+        if not cls.instance.is_valid:
+            cls.instance.build()
+        return cls.instance
+
+    def build(cls):
+        """Builds the render context from the main camera and the lights of the active scene.
+        """
+        from pyGandalf.scene.scene_manager import SceneManager
+
+        cls.instance.clear()
+        cls.instance.is_valid = True
+        cls.instance.time = float(glfw.get_time())
+
+        scene = SceneManager().get_active_scene()
+        if scene is None:
+            return
+
+        camera = SceneManager().get_main_camera()
+        if camera is not None:
+            cls.instance.camera = camera
+            cls.instance.view = camera.view
+            cls.instance.projection = camera.projection
+            cls.instance.view_projection = camera.projection * camera.view
+            cls.instance.skybox_view_projection = camera.projection * glm.mat4(glm.mat3(camera.view))
+
+            projection_lh = glm.perspectiveLH(glm.radians(camera.fov), camera.aspect_ratio, camera.near, camera.far)
+            cls.instance.projection_lh = np.asarray(glm.transpose(projection_lh))
+            cls.instance.view_t = np.asarray(glm.transpose(camera.view))
+            cls.instance.skybox_view_projection_lh = np.asarray(glm.transpose(projection_lh * glm.mat4(glm.mat3(camera.view))))
+
+            camera_entity = SceneManager().get_main_camera_entity()
+            if camera_entity is not None:
+                camera_transform = scene.get_component(camera_entity, TransformComponent)
+                if camera_transform is not None:
+                    cls.instance.camera_transform = camera_transform
+                    cls.instance.camera_position = camera_transform.get_world_position()
+
+        light_system: LightSystem = scene.get_system(LightSystem)
+        cls.instance.has_light_system = light_system is not None
+        if light_system is None or light_system.get_state() == SystemState.PAUSE:
+            return
+
+        for light, transform in light_system.get_filtered_components():
+            cls.instance.light_positions.append(transform.get_world_position())
+            cls.instance.light_colors.append(light.color)
+
+        cls.instance.light_count = len(cls.instance.light_positions)
+        if cls.instance.light_count == 0:
+            return
+
+        intensities = [light.intensity for light, _ in light_system.get_filtered_components()]
+        cls.instance.light_intensities = np.asarray(intensities, dtype=np.float32)
+
+        cls.instance.light_positions_array = glm.array(cls.instance.light_positions)
+        cls.instance.light_colors_array = glm.array([glm.vec3(color) for color in cls.instance.light_colors])
+
+        ones = np.ones((cls.instance.light_count, 1), dtype=np.float32)
+        cls.instance.light_positions_vec4 = np.hstack((np.asarray([tuple(position) for position in cls.instance.light_positions], dtype=np.float32), ones))
+        cls.instance.light_colors_vec4 = np.hstack((np.asarray([tuple(color) for color in cls.instance.light_colors], dtype=np.float32), ones))
+        cls.instance.light_intensities_vec4 = np.hstack((cls.instance.light_intensities[:, np.newaxis], np.ones((cls.instance.light_count, 3), dtype=np.float32)))
+
+        if camera is not None:
+            light_position = cls.instance.light_positions[0]
+
+            light_view = glm.lookAt(light_position, glm.vec3(0.0), glm.vec3(0.0, 1.0, 0.0))
+            cls.instance.light_space_matrix = camera.projection * light_view
+
+            light_projection_lh = glm.transpose(glm.perspectiveLH(glm.radians(camera.fov), camera.aspect_ratio, camera.near, camera.far))
+            light_view_lh = glm.transpose(glm.lookAtLH(light_position, glm.vec3(0.0), glm.vec3(0.0, 1.0, 0.0)))
+            cls.instance.light_space_matrix_lh = np.asarray(light_projection_lh * light_view_lh)
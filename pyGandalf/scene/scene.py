@@ -1,17 +1,36 @@
 from pyGandalf.scene.entity import Entity
+from pyGandalf.scene.archetype import Archetype, to_field_values
+from pyGandalf.scene.query import Query
+from pyGandalf.scene.command_buffer import CommandBuffer
+from pyGandalf.scene.scheduler import SystemScheduler
 from pyGandalf.systems.system import System
 from pyGandalf.utilities.logger import logger
-from pyGandalf.scene.components import LinkComponent
+from pyGandalf.scene.components import LinkComponent, TransformComponent
 from pyGandalf.scene.editor_components import EditorVisibleComponent
 
+import numpy as np
+import inspect
+
 class Scene():
     """A class that represents a scene which contains all the entities, their components and the registered systems.
     """
     def __init__(self, name = 'UnnamedScene'):
-        self.entity_components = {}
-        self.component_arrays = {}
-        self.entities = []
         self.systems = []
+        self.system_interests: dict[type, list[System]] = {}
+        self.archetypes: dict[frozenset[type], Archetype] = {}
+        self.entity_generations: list[int] = []
+        self.entity_locations: list[tuple[Archetype, int] | None] = []
+        self.free_entity_indices: list[int] = []
+        self.queries: dict[tuple, Query] = {}
+        self.change_tick = 1
+        self.commands = CommandBuffer(self)
+        self.is_updating = False
+        self.scheduler = SystemScheduler()
+        self.interpolation_alpha = 1.0
+        self.empty_archetype = self.get_archetype(frozenset())
+        self.entities: dict[Entity, None] = {}
+        self.entity_ids: dict = {}
+        self.entity_children: dict[Entity, dict[Entity, None]] = {}
         self.name = name
     
     def enroll_entity(self) -> Entity:
@@ -20,8 +39,8 @@ class Scene():
         Returns:
             Entity: The newly created entity.
         """
-        entity = Entity()
-        self.entities.append(entity)
+        entity = self.allocate_entity()
+        self.entities[entity] = None
         self.add_component(entity, EditorVisibleComponent())
         return entity
     
@@ -34,11 +53,269 @@ class Scene():
         Returns:
             Entity: The newly created entity.
         """
-        entity = Entity()
+        entity = self.allocate_entity()
         entity.id = uuid
-        self.entities.append(entity)
+        self.entities[entity] = None
         self.add_component(entity, EditorVisibleComponent())
         return entity
+
+    def spawn_batch(self, count: int, components: dict) -> list[Entity]:
+        """Creates and enrolls the given number of entities at once, which are stored together, and notifies each interested system once for the whole batch.
+        The components of each type are given by one of the following:
+            - A list with one component per entity.
+            - A factory, that is called with the index of each entity in the batch and returns its component.
+            - A dictionary that maps the fields of the component to arrays of shape (count, *field_shape), from which the components are constructed.
+              Single values are broadcast to all the entities (to the shape of the field, if the component declares a schema) and fields that are not arguments of the constructor are set after construction.
+
+        Args:
+            count (int): The number of entities to create.
+            components (dict[type, list | callable | dict[str, np.ndarray]]): The component types of the entities and their data.
+
+        Returns:
+            list[Entity]: The newly created entities. While the systems are updated, the entities are only stored at the sync point of the update.
+        """
+        columns = {}
+        for component_type, data in components.items():
+            column = self.build_column(component_type, data, count)
+            if column is None:
+                return []
+            columns[component_type] = column
+
+        if EditorVisibleComponent not in columns:
+            columns[EditorVisibleComponent] = [EditorVisibleComponent() for _ in range(count)]
+
+        for column in columns.values():
+            for component in column:
+                component.changed_tick = self.change_tick
+
+        # Systems may be iterating over their entities, so the batch is stored at the sync point of the update.
+        if self.is_updating:
+            with self.commands.lock:
+                entities = self.reserve_entities(count)
+            self.commands.spawn_batch(entities, columns)
+            return entities
+
+        entities = self.reserve_entities(count)
+        self.insert_batch(entities, columns)
+        return entities
+
+    def insert_batch(self, entities: list[Entity], columns: dict):
+        """Stores the given reserved entities and their components together and notifies each interested system once for the whole batch.
+
+        Args:
+            entities (list[Entity]): The reserved handles of the entities.
+            columns (dict[type, list]): The components of the entities, one list with one component per entity for each component type.
+        """
+        from pyGandalf.core.application import Application
+
+        archetype = self.get_archetype(frozenset(columns.keys()))
+        first_row = archetype.extend(entities, columns)
+        for row, entity in enumerate(entities, first_row):
+            self.entity_locations[entity.index] = (archetype, row)
+        self.entities.update(dict.fromkeys(entities))
+
+        # Notify each interested system once with the whole batch
+        interested_systems = { system: None for component_type in columns.keys() for system in self.system_interests.get(component_type, ()) }
+        for system in interested_systems:
+            system_components = system.filter_entities_batch(entities, columns)
+            if len(system_components) != 0 and Application().is_running():
+                system.on_create_batch(entities, system_components)
+
+    def build_column(self, component_type: type, data, count: int) -> list | None:
+        """Builds the components of the given type for a batch of entities from the given data, see `spawn_batch`.
+
+        Args:
+            component_type (type): The type of the components.
+            data (list | callable | dict[str, np.ndarray]): The components, a factory or the field arrays of the components.
+            count (int): The number of entities of the batch.
+
+        Returns:
+            list | None: The components or ```None``` if the data do not match the number of entities.
+        """
+        if isinstance(data, dict):
+            schema = component_type.schema if getattr(component_type, 'schema', None) is not None else {}
+
+            fields = {}
+            for field, values in data.items():
+                if field in schema:
+                    dtype, shape = schema[field]
+                    values = np.broadcast_to(np.asarray(values, dtype=dtype), (count,) + tuple(shape))
+                else:
+                    values = np.asarray(values)
+                    if values.ndim == 0 or values.shape[0] != count:
+                        values = np.broadcast_to(values, (count,) + values.shape)
+                fields[field] = to_field_values(values)
+
+            parameters = inspect.signature(component_type.__init__).parameters
+            arguments = [field for field in fields.keys() if field in parameters]
+            attributes = [field for field in fields.keys() if field not in parameters]
+
+            column = []
+            for index in range(count):
+                component = component_type(**{ field: fields[field][index] for field in arguments })
+                for field in attributes:
+                    setattr(component, field, fields[field][index])
+                column.append(component)
+            return column
+
+        if callable(data):
+            return [data(index) for index in range(count)]
+
+        column = list(data)
+        if len(column) != count:
+            logger.error(f'Expected {count} components of type: {component_type}, but {len(column)} were given.')
+            return None
+        return column
+
+    def find_entity(self, id) -> Entity | None:
+        """Returns the entity with the given persistent id.
+
+        Args:
+            id (uuid.UUID): The persistent id of the entity.
+
+        Returns:
+            Entity | None: The entity with the given id or ```None``` if there is no such entity in the scene.
+        """
+        return self.entity_ids.get(id)
+
+    def add_child(self, parent: Entity, child: Entity) -> bool:
+        """Registers the child entity as a child of the parent entity and appends it to the children of the parent's link component.
+
+        Args:
+            parent (Entity): The parent entity.
+            child (Entity): The child entity.
+
+        Returns:
+            bool: ```True``` if the child was registered or ```False``` if it was already a child of the parent.
+        """
+        children = self.entity_children.setdefault(parent, {})
+        if child in children:
+            return False
+
+        children[child] = None
+
+        parent_link = self.get_component(parent, LinkComponent)
+        if parent_link is not None:
+            parent_link.children.append(child)
+
+        return True
+
+    def remove_child(self, parent: Entity, child: Entity) -> bool:
+        """Unregisters the child entity from the children of the parent entity and removes it from the children of the parent's link component.
+
+        Args:
+            parent (Entity): The parent entity.
+            child (Entity): The child entity.
+
+        Returns:
+            bool: ```True``` if the child was unregistered or ```False``` if it was not a child of the parent.
+        """
+        children = self.entity_children.get(parent)
+        if children is None or child not in children:
+            return False
+
+        del children[child]
+
+        parent_link = self.get_component(parent, LinkComponent)
+        if parent_link is not None and child in parent_link.children:
+            parent_link.children.remove(child)
+
+        return True
+
+    def get_children(self, parent: Entity) -> list[Entity]:
+        """Returns a list containing the registered children of the given entity.
+
+        Args:
+            parent (Entity): The parent entity.
+
+        Returns:
+            list[Entity]: A list containing the registered children of the given entity.
+        """
+        return list(self.entity_children.get(parent, {}))
+
+    def reserve_entity(self) -> Entity:
+        """Reserves a new entity handle, reusing the index of a destroyed entity if there is one, without storing it in any archetype yet.
+
+        Returns:
+            Entity: The newly reserved entity handle.
+        """
+        if self.free_entity_indices:
+            index = self.free_entity_indices.pop()
+        else:
+            index = len(self.entity_generations)
+            self.entity_generations.append(0)
+            self.entity_locations.append(None)
+
+        return Entity(index, self.entity_generations[index], self.entity_ids)
+
+    def reserve_entities(self, count: int) -> list[Entity]:
+        """Reserves the given number of new entity handles at once, reusing the indices of destroyed entities first.
+
+        Args:
+            count (int): The number of entity handles to reserve.
+
+        Returns:
+            list[Entity]: The newly reserved entity handles.
+        """
+        reused = min(count, len(self.free_entity_indices))
+        indices = [self.free_entity_indices.pop() for _ in range(reused)]
+
+        first = len(self.entity_generations)
+        indices.extend(range(first, first + count - reused))
+        self.entity_generations.extend([0] * (count - reused))
+        self.entity_locations.extend([None] * (count - reused))
+
+        generations = self.entity_generations
+        entity_ids = self.entity_ids
+        return [Entity(index, generations[index], entity_ids) for index in indices]
+
+    def release_entity(self, entity: Entity):
+        """Releases a reserved entity handle that was never stored in an archetype, invalidating all the handles to it.
+
+        Args:
+            entity (Entity): The reserved entity handle.
+        """
+        if self.is_alive(entity) and self.entity_locations[entity.index] is None:
+            self.entity_generations[entity.index] += 1
+            self.free_entity_indices.append(entity.index)
+
+            if entity.persistent_id is not None and self.entity_ids.get(entity.persistent_id) == entity:
+                del self.entity_ids[entity.persistent_id]
+
+    def allocate_entity(self) -> Entity:
+        """Allocates a new entity handle, reusing the index of a destroyed entity if there is one, and stores it in the empty archetype.
+
+        Returns:
+            Entity: The newly allocated entity handle.
+        """
+        entity = self.reserve_entity()
+        self.entity_locations[entity.index] = (self.empty_archetype, self.empty_archetype.append(entity, {}))
+        return entity
+
+    def is_alive(self, entity: Entity) -> bool:
+        """Returns whether or not the given entity handle refers to an entity that is still enrolled to the scene.
+
+        Args:
+            entity (Entity): The entity handle to check.
+
+        Returns:
+            bool: ```True``` if the entity is enrolled to the scene or ```False``` if it was destroyed or never enrolled.
+        """
+        return 0 <= entity.index < len(self.entity_generations) and self.entity_generations[entity.index] == entity.generation
+
+    def get_entity_location(self, entity: Entity) -> tuple[Archetype, int] | None:
+        """Returns the archetype and the row that store the components of the given entity.
+
+        Args:
+            entity (Entity): The entity to get the location for.
+
+        Returns:
+            tuple[Archetype, int] | None: The archetype and the row of the entity or ```None``` if the entity handle is stale.
+        """
+        index = entity.index
+        if 0 <= index < len(self.entity_generations) and self.entity_generations[index] == entity.generation:
+            return self.entity_locations[index]
+        return None
     
     def destroy_entity(self, entity: Entity):
         """Destroy the given entity from the scene. If the entity has children, recursively destroys them all.
@@ -46,33 +323,51 @@ class Scene():
         Args:
             entity (Entity): The entity to destroy.
         """
-        entity_component_references = self.get_entity_component_references(entity)
-
-        component_types = []
-        for type in entity_component_references.keys():
-            component_types.append(type)
+        # Systems may be iterating over their entities, so the destruction is deferred to the sync point of the update.
+        if self.is_updating:
+            self.commands.destroy(entity)
+            return
 
-        # Recursively destroy all children of entity.
+        # Recursively destroy all children of entity and unregister it from its parent.
         link = self.get_component(entity, LinkComponent)
         if link != None:
-            for child in link.children:
+            for child in list(link.children):
                 self.destroy_entity(child)
 
-        # Remove all components from entity.
-        for component_type in component_types:
-            self.remove_component(entity, component_type)
+            if link.parent is not None:
+                self.remove_child(link.parent, entity)
+
+        self.entity_children.pop(entity, None)
+
+        # Remove entity from the systems that operate on it, once per system, and then from its archetype, and invalidate all the handles to it.
+        location = self.get_entity_location(entity)
+        if location is not None:
+            archetype, row = location
+
+            interested_systems = { system: None for component_type in archetype.signature for system in self.system_interests.get(component_type, ()) }
+            for system in interested_systems:
+                system.remove_entity_components(entity, system.filters[0])
+
+            moved_entity = archetype.swap_remove(row)
+            if moved_entity is not None:
+                self.entity_locations[moved_entity.index] = (archetype, row)
+
+            self.entity_locations[entity.index] = None
+            self.entity_generations[entity.index] += 1
+            self.free_entity_indices.append(entity.index)
 
-        # Remove entity from list.
-        if entity in self.entities:
-            self.entities.remove(entity) 
+        # Remove entity from the enrolled entities and the id index.
+        self.entities.pop(entity, None)
+        if entity.persistent_id is not None and self.entity_ids.get(entity.persistent_id) == entity:
+            del self.entity_ids[entity.persistent_id]
 
     def get_entities(self) -> list[Entity]:
-        """Returns a list containing all the enrolled entities of the scene.
+        """Returns a list containing all the enrolled entities of the scene, in the order they were enrolled.
 
         Returns:
             list[Entity]: A list containing all the enrolled entities of the scene.
         """
-        return self.entities
+        return list(self.entities)
     
     def add_component(self, entity: Entity, component):
         """Adds to the specified entity the given component, if the entity does not already have a component of that type. Also adds the component and entity to the systems that operate on the compoent type.
@@ -82,40 +377,49 @@ class Scene():
             component (type(component)): The component to add to the given entity.
 
         Returns:
-            type(component): The component that was added or the already existing one if the entity already has a component of that type.
+            type(component): The component that was added or the already existing one if the entity already has a component of that type. While the systems are updated, the given component is returned.
         """
-        # Create new component reference array for entity if it does not exist
-        if entity.id not in self.entity_components:
-            self.entity_components[entity.id] = {}
-
         # Retrieve type from component
         component_type = type(component)
 
+        # Systems may be iterating over their entities, so the addition is deferred to the sync point of the update, where it is resolved against the other pending changes of the entity.
+        if self.is_updating:
+            self.commands.add_component(entity, component)
+            return component
+
         # Check if already has component
         if self.has_component(entity, component_type) is True:
             logger.info(f'Entity with id: {entity} already has component of type: {component_type}, returning that.')
             return self.get_component(entity, component_type)
 
-        # Create new component array if it does not exist yet
-        if component_type not in self.component_arrays:
-            self.component_arrays[component_type] = []
-
-        # Find the entities component reference
-        component_array = self.component_arrays[component_type]
-        component_index = len(component_array)
+        location = self.get_entity_location(entity)
+        if location is None:
+            logger.error(f'Entity: {entity} is not enrolled to the scene, cannot add component of type: {component_type}.')
+            return None
 
-        # Update entity's component reference  
-        self.entity_components[entity.id][component_type] = component_index
+        # Move the entity and its components to the archetype that also has the new component type
+        archetype = location[0]
+        destination = archetype.add_edges.get(component_type)
+        if destination is None:
+            destination = self.get_archetype(archetype.signature | { component_type })
+            archetype.add_edges[component_type] = destination
+            destination.remove_edges[component_type] = archetype
 
-        # Add the new component to the appropriate component array
-        component_array.append(component)
+        # A newly added component counts as changed
+        component.changed_tick = self.change_tick
+        self.move_entity(entity, destination, component)
 
         # Update existing systems that operate on this component. (Usefull in runtime addition of components)
-        for system in self.systems:
-            entity_components = self.get_entity_component_references(entity)
-            components = system.filter_entity_components(entity, entity_components, self.component_arrays)
+        interested_systems = self.system_interests.get(component_type)
+        if not interested_systems:
+            return component
+
+        from pyGandalf.core.application import Application
+
+        entity_components = self.get_entity_component_references(entity)
+        for system in interested_systems:
+            components = system.filter_entity_components(entity, entity_components)
 
-            from pyGandalf.core.application import Application
             if (Application().is_running()):
                 if components != None:
                     if (len(components) == 1):
@@ -132,16 +436,99 @@ class Scene():
             entity (Entity): The entity to remove the component from.
             component_type (type): The type of the component to remove from the entity.
         """
+        # Systems may be iterating over their entities, so the removal is deferred to the sync point of the update, where it is resolved against the other pending changes of the entity.
+        if self.is_updating:
+            self.commands.remove_component(entity, component_type)
+            return
+
         if self.has_component(entity, component_type) is False:
             return
 
         # Update existing systems that operate on this component. (Usefull in runtime deletion of components)
-        for system in self.systems:
+        for system in self.system_interests.get(component_type, ()):
             system.remove_entity_components(entity, component_type)
 
-        # Update component arrays and entity components references
-        self.component_arrays[component_type][self.entity_components[entity.id][component_type]] = None
-        self.entity_components[entity.id][component_type] = None
+        # Move the entity and its remaining components to the archetype without the component type
+        archetype = self.entity_locations[entity.index][0]
+        destination = archetype.remove_edges.get(component_type)
+        if destination is None:
+            destination = self.get_archetype(archetype.signature - { component_type })
+            archetype.remove_edges[component_type] = destination
+            destination.add_edges[component_type] = archetype
+
+        self.move_entity(entity, destination)
+
+    def move_entity(self, entity: Entity, destination: Archetype, component = None, new_components: dict = None):
+        """Moves the given entity and the components it keeps from its current archetype to the destination archetype.
+
+        Args:
+            entity (Entity): The entity to move.
+            destination (Archetype): The archetype to move the entity to.
+            component (type(component), optional): A new component to store along with the existing ones. Defaults to None.
+            new_components (dict[type, component], optional): New components to store along with the existing ones, replacing those of the same type. Defaults to None.
+        """
+        archetype, row = self.entity_locations[entity.index]
+
+        components = { component_type: archetype.columns[component_type][row] for component_type in destination.signature if component_type in archetype.columns }
+        if component is not None:
+            components[type(component)] = component
+        if new_components is not None:
+            components.update(new_components)
+
+        moved_entity = archetype.swap_remove(row)
+        if moved_entity is not None:
+            self.entity_locations[moved_entity.index] = (archetype, row)
+
+        self.entity_locations[entity.index] = (destination, destination.append(entity, components))
+
+    def get_archetype(self, signature: frozenset[type]) -> Archetype:
+        """Returns the archetype that stores the entities with exactly the given component types, creating it if it does not exist yet.
+
+        Args:
+            signature (frozenset[type]): The component types of the archetype.
+
+        Returns:
+            Archetype: The archetype that stores the entities with exactly the given component types.
+        """
+        archetype = self.archetypes.get(signature)
+        if archetype is None:
+            archetype = Archetype(signature)
+            self.archetypes[signature] = archetype
+
+            for system in self.systems:
+                system.filter_archetype(archetype)
+
+            for query in self.queries.values():
+                query.add_archetype(archetype)
+        return archetype
+
+    def query(self, *with_types: type, without: tuple[type] = ()) -> Query:
+        """Returns a cached query over all the entities that have all the given component types and none of the excluded ones.
+        The same query object is returned for the same component types and its result is only gathered again after a structural change to the matching entities.
+
+        Args:
+            *with_types (type): The component types that the entities must have.
+            without (tuple[type], optional): The component types that the entities must not have. Defaults to ().
+
+        Returns:
+            Query: An iterable query that yields the entity and its components, in the order of the given component types.
+        """
+        key = (with_types, frozenset(without))
+        query = self.queries.get(key)
+        if query is None:
+            query = Query(with_types, without)
+            for archetype in self.archetypes.values():
+                query.add_archetype(archetype)
+            self.queries[key] = query
+        return query
+
+    def get_archetypes(self) -> list[Archetype]:
+        """Returns a list containing all the archetypes of the scene.
+
+        Returns:
+            list[Archetype]: A list containing all the archetypes of the scene.
+        """
+        return list(self.archetypes.values())
 
     def has_component(self, entity: Entity, component_type: type) -> bool:
         """Returns whether or not the specified entity has a compoent of the given type.
@@ -153,10 +540,8 @@ class Scene():
         Returns:
             bool: ```True``` if the entity has the component or ```False``` otherwise.
         """
-        return (entity.id in self.entity_components and
-                component_type in self.entity_components.get(entity.id) and
-                self.entity_components[entity.id][component_type] != None and
-                self.component_arrays[component_type][self.entity_components[entity.id][component_type]] != None)
+        location = self.get_entity_location(entity)
+        return location is not None and component_type in location[0].columns
     
     def get_component(self, entity: Entity, component_type: type):
         """Returns a component of the specified type from the given entity or ```None``` if the entity does not have a component of the specified type.
@@ -168,30 +553,59 @@ class Scene():
         Returns:
             component: The component of the specified type from the given entity or ```None``` if the entity does not have a component of the specified type.
         """
-        if self.has_component(entity, component_type) == False:
+        location = self.get_entity_location(entity)
+        if location is None:
             return None
-        
-        component_index = self.entity_components[entity.id][component_type]
-        return self.component_arrays[component_type][component_index]
+
+        archetype, row = location
+        column = archetype.columns.get(component_type)
+        if column is None:
+            return None
+
+        return column[row]
     
+    def mark_changed(self, entity: Entity, component_type: type):
+        """Marks the component of the given type of the entity as changed, so that the systems that operate on it will process the entity in their next update.
+
+        Args:
+            entity (Entity): The entity whose component changed.
+            component_type (type): The type of the component that changed.
+        """
+        location = self.get_entity_location(entity)
+        if location is None or component_type not in location[0].columns:
+            return
+
+        archetype, row = location
+        archetype.columns[component_type][row].changed_tick = self.change_tick
+        archetype.changed_ticks[component_type] = self.change_tick
+
     def get_entity_component_references(self, entity: Entity):
-        """Returns a dictionary with keys the component type and values the indices to the component arrays for the specified entity.
+        """Returns a dictionary with keys the component type and values the components of the specified entity.
 
         Args:
             entity (Entity): The entity to get the component references for.
 
         Returns:
-            dict[type, list[int]]: A dictionary with keys the component type and values the indices to the component arrays for the specified entity.
+            dict[type, component]: A dictionary with keys the component type and values the components of the specified entity.
         """
-        return self.entity_components.get(entity.id, {})
+        location = self.get_entity_location(entity)
+        if location is None:
+            return {}
+
+        archetype, row = location
+        return archetype.get_row(row)
     
     def get_components_array(self):
-        """Returns a dictionary with keys the compoennt type and values the component arrays.
+        """Returns a dictionary with keys the component type and values dense arrays with all the components of that type, gathered from all the archetypes.
 
         Returns:
             dict[type, list[component]]: A dictionary with keys the component type and values the component arrays.
         """
-        return self.component_arrays
+        components_array = {}
+        for archetype in self.archetypes.values():
+            for component_type, column in archetype.columns.items():
+                components_array.setdefault(component_type, []).extend(column)
+        return components_array
     
     def register_system(self, system: System):
         """Registers a system to the scene. If called at runtime it will also start the system.
@@ -201,6 +615,12 @@ class Scene():
         """
         self.systems.append(system)
 
+        # Index the system by the component types it operates on, so that structural changes only notify the interested systems.
+        for component_type in system.filters:
+            interested_systems = self.system_interests.setdefault(component_type, [])
+            if system not in interested_systems:
+                interested_systems.append(system)
+
         system.filter(self)
 
         from pyGandalf.core.application import Application
@@ -208,6 +628,14 @@ class Scene():
         if (Application().is_running()):
             system.on_create_base()
 
+    def get_stages(self) -> list[list[System]]:
+        """Returns the stages that the registered systems are grouped into by the scheduler, the systems of each stage are updated concurrently.
+
+        Returns:
+            list[list[System]]: The stages of the registered systems, in update order.
+        """
+        return self.scheduler.get_stages(self.systems)
+
     def get_systems(self) -> list[System]:
         """Return a list containing all the systems of the scene.
 
@@ -237,8 +665,14 @@ class Scene():
 
         Application().set_is_running(True)
         
-        for system in self.systems:
-            system.on_create_base()
+        self.is_updating = True
+        try:
+            for system in self.systems:
+                system.on_create_base()
+        finally:
+            self.is_updating = False
+
+        self.commands.flush()
 
     def on_update(self, ts: float):
         """Called every frame and calls all the on_update_base method from all the registered systems of the scene.
@@ -246,8 +680,52 @@ class Scene():
         Args:
             ts (float): The application timestep.
         """
-        for system in self.systems:
-            system.on_update_base(ts)
+        self.update_systems(self.systems, ts)
+
+    def on_fixed_update(self, ts: float):
+        """Called at the fixed rate of the simulation, in fixed timestep mode, and calls the on_update_base method of the registered systems that are not updated per frame.
+        The world matrices of the transforms are kept before the update, so that rendering can interpolate between the last two simulation steps.
+
+        Args:
+            ts (float): The fixed timestep.
+        """
+        for transform in self.query(TransformComponent).get_components():
+            transform.previous_world_matrix = transform.world_matrix
+
+        self.update_systems([system for system in self.systems if not system.update_per_frame], ts)
+
+    def on_frame_update(self, ts: float, alpha: float):
+        """Called every frame, in fixed timestep mode, and calls the on_update_base method of the registered systems that are updated per frame.
+
+        Args:
+            ts (float): The application timestep.
+            alpha (float): How far the rendered frame is between the last two simulation steps, in [0, 1].
+        """
+        self.interpolation_alpha = alpha
+        self.update_systems([system for system in self.systems if system.update_per_frame], ts)
+
+    def update_systems(self, systems: list[System], ts: float):
+        """Updates the given systems, in the stages computed by the scheduler, and then applies the recorded structural changes.
+
+        Args:
+            systems (list[System]): The systems to update, in registration order.
+            ts (float): The timestep.
+        """
+        # Every stage runs at its own change tick, so that its systems see all the changes that happened since their previous update.
+        # Systems of the same stage do not access component types that the others write, so they can be updated concurrently.
+        # While the systems are updated, the structural changes are recorded instead of applied, since the systems iterate over their entities.
+        self.is_updating = True
+        try:
+            for stage in self.scheduler.get_stages(systems):
+                for system in stage:
+                    system.change_tick = self.change_tick
+                self.scheduler.run_stage(stage, ts)
+                self.change_tick += 1
+        finally:
+            self.is_updating = False
+
+        # The sync point of the update, where the structural changes recorded by the systems are applied.
+        self.commands.flush()
 
     def on_gui_update(self, ts: float):
         """Called every frame and calls all the on_update_gui_base method from all the registered systems of the scene.
@@ -255,5 +733,11 @@ class Scene():
         Args:
             ts (float): The application timestep.
         """
-        for system in self.systems:
-            system.on_gui_update_base(ts)
\ No newline at end of file
+        self.is_updating = True
+        try:
+            for system in self.systems:
+                system.on_gui_update_base(ts)
+        finally:
+            self.is_updating = False
+
+        self.commands.flush()
\ No newline at end of file
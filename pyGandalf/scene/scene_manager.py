@@ -44,6 +44,23 @@ class SceneManager(object):
         if cls.instance.scene_change_requested:
             cls.instance.change_scene_deffered()
 
+    def on_fixed_update(cls, ts):
+        if cls.instance.active_scene is None:
+            logger.critical('There is no active scene currently')
+            return
+        
+        cls.instance.active_scene.on_fixed_update(ts)
+
+    def on_frame_update(cls, ts, alpha):
+        if cls.instance.active_scene is None:
+            logger.critical('There is no active scene currently')
+            return
+        
+        cls.instance.active_scene.on_frame_update(ts, alpha)
+
+        if cls.instance.scene_change_requested:
+            cls.instance.change_scene_deffered()
+
     def on_gui_update(cls, ts):
         if cls.instance.active_scene is None:
             logger.critical('There is no active scene currently')
@@ -72,6 +89,8 @@ class SceneManager(object):
         cls.instance.scene_change_requested = True
 
     def change_scene_deffered(cls):
+        previous_scene = cls.instance.active_scene
+
         if cls.instance.new_scene_to_loaded is None:
             if len(cls.instance.scenes) <= cls.instance.active_scene_index:
                 logger.error(f'Out of bounds scene index: {cls.instance.active_scene_index} for scene change')
@@ -86,6 +105,10 @@ class SceneManager(object):
             logger.critical(f'New scene is none, exiting.')
             exit(-1)
 
+        # Stop the threads of the scene that is left, they are started again if the scene becomes active later.
+        if previous_scene is not None and previous_scene is not cls.instance.active_scene:
+            previous_scene.scheduler.shutdown()
+
         cls.instance.main_camera = None
         cls.instance.main_camera_entity = None
 
@@ -107,6 +130,11 @@ class SceneManager(object):
         cls.instance.main_camera_entity = main_camera_entity
     
     def clean(cls):
+        # Stop the threads of all the scenes, including an external scene that is not added to the manager.
+        for scene in [*cls.instance.scenes, cls.instance.active_scene, cls.instance.new_scene_to_loaded]:
+            if scene is not None:
+                scene.scheduler.shutdown()
+
         cls.instance.scenes.clear()
         cls.instance.active_scene = None
         cls.instance.new_scene_to_loaded = None
@@ -1,7 +1,7 @@
 from pyGandalf.core.application import Application
 from pyGandalf.scene.scene import Scene
 from pyGandalf.systems.system import System
-from pyGandalf.scene.components import Component
+from pyGandalf.scene.components import Component, LinkComponent
 
 from pyGandalf.renderer.opengl_renderer import OpenGLRenderer
 
@@ -44,6 +44,10 @@ class SceneSerializer:
 
                     entity_component_prim = self.stage.DefinePrim("/Hierachy/" + "Entity" + entity.id.hex + "/" + cls.__name__)
 
+                    # Persist the id of the parent, so that the hierachy can be restored on deserialization.
+                    if cls is LinkComponent and component.parent is not None:
+                        component.parent_id = component.parent.id
+
                     if hasattr(component, "custom_serialization"):
                         entity_component_prim = USDSerializer().serialize(entity_component_prim, component)
                     else:
@@ -0,0 +1,123 @@
+from pyGandalf.systems.system import System
+
+from concurrent.futures import ThreadPoolExecutor
+import os
+
+class SystemScheduler():
+    """Groups the systems of a scene into stages, by the component types that they declare to read and write, and runs the systems of each stage concurrently on a thread pool.
+    A system conflicts with an earlier system if one of them writes a component type that the other one reads or writes, and then it is placed in a later stage, so that the registration order is respected.
+    Systems that do not declare their access are exclusive, they run alone in their stage on the main thread.
+    """
+    def __init__(self, max_workers: int = None):
+        self.max_workers = max_workers if max_workers is not None else (os.cpu_count() or 1)
+        self.executor: ThreadPoolExecutor = None
+        self.stages: list[list[System]] = []
+        self.cached_stages: dict[tuple[System], list[list[System]]] = {}
+
+    def conflicts(self, system: System, other: System) -> bool:
+        """Checks if the given systems can not run concurrently.
+
+        Args:
+            system (System): The first system.
+            other (System): The second system.
+
+        Returns:
+            bool: ```True``` if any of the systems is exclusive or one of them writes a component type that the other one accesses, ```False``` otherwise.
+        """
+        if system.is_exclusive() or other.is_exclusive():
+            return True
+
+        system_reads, system_writes = system.get_access()
+        other_reads, other_writes = other.get_access()
+
+        return not system_writes.isdisjoint(other_reads | other_writes) or not other_writes.isdisjoint(system_reads)
+
+    def build(self, systems: list[System]) -> list[list[System]]:
+        """Builds the dependency graph of the given systems and groups them into stages. Each system is placed in the stage after the latest earlier system that it conflicts with.
+
+        Args:
+            systems (list[System]): The systems in registration order.
+
+        Returns:
+            list[list[System]]: The stages, each one containing systems that do not conflict with each other.
+        """
+        stage_indices: list[int] = []
+        stages: list[list[System]] = []
+
+        for index, system in enumerate(systems):
+            stage_index = 0
+            for previous in range(index):
+                if stage_indices[previous] >= stage_index and self.conflicts(system, systems[previous]):
+                    stage_index = stage_indices[previous] + 1
+
+            stage_indices.append(stage_index)
+            if stage_index == len(stages):
+                stages.append([])
+            stages[stage_index].append(system)
+
+        self.cached_stages[tuple(systems)] = stages
+        self.stages = stages
+        return stages
+
+    def get_stages(self, systems: list[System]) -> list[list[System]]:
+        """Returns the stages of the given systems, building them only the first time the same systems are scheduled.
+
+        Args:
+            systems (list[System]): The systems in registration order.
+
+        Returns:
+            list[list[System]]: The stages, each one containing systems that do not conflict with each other.
+        """
+        stages = self.cached_stages.get(tuple(systems))
+        if stages is None:
+            return self.build(systems)
+
+        self.stages = stages
+        return stages
+
+    def describe(self) -> str:
+        """Returns a readable description of the most recently scheduled stages, for debugging.
+
+        Returns:
+            str: One line per stage with the names of its systems and the component types that they read and write.
+        """
+        lines = []
+        for index, stage in enumerate(self.stages):
+            descriptions = []
+            for system in stage:
+                if system.is_exclusive():
+                    descriptions.append(f'{type(system).__name__}(exclusive)')
+                else:
+                    reads, writes = system.get_access()
+                    descriptions.append(f'{type(system).__name__}(reads: {sorted(component_type.__name__ for component_type in reads)}, writes: {sorted(component_type.__name__ for component_type in writes)})')
+            lines.append(f'Stage {index}: ' + ', '.join(descriptions))
+        return '\n'.join(lines)
+
+    def run_stage(self, stage: list[System], ts: float):
+        """Updates the systems of the given stage, concurrently if there are more than one.
+
+        Args:
+            stage (list[System]): The systems of the stage.
+            ts (float): The application timestep.
+        """
+        if len(stage) == 1 or self.max_workers <= 1:
+            for system in stage:
+                system.on_update_base(ts)
+            return
+
+        if self.executor is None:
+            self.executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='SystemScheduler')
+
+        # The main thread updates the first system while the rest are updated by the thread pool.
+        futures = [self.executor.submit(system.on_update_base, ts) for system in stage[1:]]
+        stage[0].on_update_base(ts)
+
+        for future in futures:
+            future.result()
+
+    def shutdown(self):
+        """Stops the threads of the thread pool.
+        """
+        if self.executor is not None:
+            self.executor.shutdown()
+            self.executor = None
@@ -17,6 +17,8 @@ class CameraControllerSystem(System):
     """
     The system responsible for the cameras.
     """
+    update_per_frame = True
+
     def __init__(self, filters: list[type]):
         super().__init__(filters)
 
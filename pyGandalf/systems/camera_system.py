@@ -10,6 +10,12 @@ class CameraSystem(System):
     """
     The system responsible for the cameras.
     """
+    reads = (CameraComponent, TransformComponent)
+    writes = (CameraComponent,)
+
+    def on_create_system(self):
+        # The parameters of the last built projection of each camera, since they are usually set directly without marking the camera as changed.
+        self.projection_parameters = {}
 
     def on_create_entity(self, entity: Entity, components: Component | tuple[Component]):
         camera, transform = components
@@ -30,15 +36,25 @@ class CameraSystem(System):
         camera, transform = components
 
         if not transform.static:
-            if transform.dirty:
-                camera.view = glm.inverse(transform.world_matrix)
-                camera.view_projection = camera.projection * camera.view
-        
-            match camera.type:
-                case CameraComponent.Type.PERSPECTIVE:
-                    camera.projection = glm.perspective(glm.radians(camera.fov), camera.aspect_ratio, camera.near, camera.far)
-                case CameraComponent.Type.ORTHOGRAPHIC:
-                    camera.projection = glm.ortho(-camera.aspect_ratio * camera.zoom_level, camera.aspect_ratio * camera.zoom_level, -camera.zoom_level, camera.zoom_level, camera.near, camera.far)
+            # The projection is only built again when its parameters changed.
+            parameters = (camera.type, camera.fov, camera.aspect_ratio, camera.near, camera.far, camera.zoom_level)
+            if self.projection_parameters.get(entity) != parameters:
+                self.projection_parameters[entity] = parameters
+                match camera.type:
+                    case CameraComponent.Type.PERSPECTIVE:
+                        camera.projection = glm.perspective(glm.radians(camera.fov), camera.aspect_ratio, camera.near, camera.far)
+                    case CameraComponent.Type.ORTHOGRAPHIC:
+                        camera.projection = glm.ortho(-camera.aspect_ratio * camera.zoom_level, camera.aspect_ratio * camera.zoom_level, -camera.zoom_level, camera.zoom_level, camera.near, camera.far)
+
+            camera.view = glm.inverse(transform.world_matrix)
+            camera.view_projection = camera.projection * camera.view
 
         if camera.primary:
-            SceneManager().set_main_camera(entity, camera)
\ No newline at end of file
+            SceneManager().set_main_camera(entity, camera)
+
+    def remove_entity_components(self, entity, component):
+        removed = super().remove_entity_components(entity, component)
+        if removed:
+            # Entities may be removed before the system is created.
+            getattr(self, 'projection_parameters', {}).pop(entity, None)
+        return removed
@@ -28,6 +28,8 @@ class EditorPanelSystem(System):
     """
     The system responsible for drawing the editor panels.
     """
+    update_per_frame = True
+
     def __init__(self, filters: list[type]):
         super().__init__(filters)
         self.viewport_size = imgui.ImVec2(0, 0)
@@ -102,7 +104,7 @@ class EditorPanelSystem(System):
             return
         
         flags: imgui.TreeNodeFlags_ = (imgui.TreeNodeFlags_.selected if EditorVisibleComponent.SELECTED and EditorVisibleComponent.SELECTED_ENTITY == entt else 0) | (imgui.TreeNodeFlags_.open_on_arrow if link != None and len(link.children) != 0 else imgui.TreeNodeFlags_.bullet)
-        opened = imgui.tree_node_ex(f'{info_entt.tag}##{entt.id}', flags)
+        opened = imgui.tree_node_ex(f'{info_entt.tag}##{entt.index}', flags)
 
         if imgui.is_item_clicked():
             EditorVisibleComponent.SELECTED = True
@@ -129,6 +131,7 @@ class EditorPanelSystem(System):
             OpenGLRenderer().invalidate_framebuffer(self.viewport_panel_size.x, self.viewport_panel_size.y)
             self.viewport_size = imgui.ImVec2(self.viewport_panel_size.x, self.viewport_panel_size.y)
             camera.aspect_ratio = self.viewport_panel_size.x / self.viewport_panel_size.y
+            SceneManager().get_active_scene().mark_changed(camera_entity, CameraComponent)
         else:
             imgui.image(OpenGLRenderer().get_color_attachment(), imgui.ImVec2(self.viewport_size.x, self.viewport_size.y), imgui.ImVec2(0, 1), imgui.ImVec2(1, 0))
 
@@ -331,7 +334,12 @@ class EditorPanelSystem(System):
                     if aspect_ratio_changed: camera.aspect_ratio = new_aspect_ratio
                     if primary_changed: camera.primary = new_primary
 
-                    camera.type = CameraComponent.Type.ORTHOGRAPHIC if selected_projection == 'Orthographic' else CameraComponent.Type.PERSPECTIVE
+                    projection_type = CameraComponent.Type.ORTHOGRAPHIC if selected_projection == 'Orthographic' else CameraComponent.Type.PERSPECTIVE
+                    projection_changed = camera.type != projection_type
+                    camera.type = projection_type
+
+                    if fov_changed or near_changed or far_changed or aspect_ratio_changed or primary_changed or projection_changed:
+                        SceneManager().get_active_scene().mark_changed(EditorVisibleComponent.SELECTED_ENTITY, CameraComponent)
                     
                     imgui.tree_pop()
                 imgui.separator()
@@ -345,6 +353,9 @@ class EditorPanelSystem(System):
 
                     if color_changed: light.color = glm.vec3(new_color[0], new_color[1], new_color[2])
                     if intensity_changed: light.intensity = new_intensity
+
+                    if color_changed or intensity_changed:
+                        SceneManager().get_active_scene().mark_changed(EditorVisibleComponent.SELECTED_ENTITY, LightComponent)
                     
                     imgui.tree_pop()
                 imgui.separator()
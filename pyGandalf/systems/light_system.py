@@ -1,11 +1,13 @@
 from pyGandalf.scene.entity import Entity
-from pyGandalf.scene.components import Component
+from pyGandalf.scene.components import Component, LightComponent, TransformComponent
 from pyGandalf.systems.system import System
 
 class LightSystem(System):
     """
     The system responsible for the lighting.
     """
+    reads = (LightComponent, TransformComponent)
+    writes = ()
 
     def on_create_entity(self, entity: Entity, components: Component | tuple[Component]):
         pass
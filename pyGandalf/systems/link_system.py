@@ -1,39 +1,151 @@
 from pyGandalf.scene.entity import Entity
-from pyGandalf.scene.components import Component, LinkComponent
+from pyGandalf.scene.components import Component, LinkComponent, TransformComponent
 from pyGandalf.scene.scene_manager import SceneManager
 from pyGandalf.systems.system import System
 
 from pyGandalf.utilities.component_lib import ComponentLib
 
+import numpy as np
 import glm
 
 class LinkSystem(System):
     """
     The system responsible for the scene hierachy.
     """
+    reads = (LinkComponent, TransformComponent)
+    writes = (LinkComponent, TransformComponent)
+
+    def on_create_system(self):
+        # The hierachy flattened in topological order (parents precede their children), rebuilt only when it changes.
+        self.hierachy_changed = True
+        self.order: list[int] = []
+        self.parents = np.empty(0, dtype=np.int64)
+        self.levels: list[np.ndarray] = []
+        self.external_parents: dict[int, Entity] = {}
+        self.world_matrices = np.empty((0, 4, 4), dtype=np.float32)
 
     def on_create_entity(self, entity: Entity, components: Component | tuple[Component]):
         link, transform = components
 
+        scene = SceneManager().get_active_scene()
+
         if link.parent_id != 0:
-            for entt in SceneManager().get_active_scene().get_entities():
-                if entt.id == link.parent_id:
-                    link.parent = entt
-                    link.prev_parent = entt
-                    break
-        
-        link.children.clear()
+            parent = scene.find_entity(link.parent_id)
+            if parent is not None:
+                link.parent = parent
+                link.prev_parent = parent
+
+        # Children that were serialized along with the component are stale, keep only the registered ones.
+        link.children[:] = scene.get_children(entity)
 
         transform.world_matrix = self.get_world_space_transform(entity, link)
 
         self.add_children(entity, link)
 
-    def on_update_entity(self, ts, entity: Entity, components: Component | tuple[Component]):
-        link, transform = components
+        self.hierachy_changed = True
+
+    def remove_entity_components(self, entity, component):
+        removed = super().remove_entity_components(entity, component)
+        if removed:
+            self.hierachy_changed = True
+        return removed
+
+    def on_update_system(self, ts: float):
+        links = [components[0] for components in self.filtered_components]
+
+        # Detect reparented entities
+        for index, link in enumerate(links):
+            if link.prev_parent is not link.parent and link.prev_parent != link.parent:
+                self.update_children(self.filtered_entities[index], link)
+                self.hierachy_changed = True
+
+        if self.hierachy_changed:
+            self.build_hierachy()
+
+        count = len(self.order)
+        if count == 0:
+            return
+
+        transforms = [self.filtered_components[index][1] for index in self.order]
+
+        # Entities with a dirty transform and their whole subtrees need a new world matrix.
+        if self.hierachy_changed:
+            dirty = np.ones(count, dtype=np.bool_)
+            self.hierachy_changed = False
+        else:
+            dirty = np.fromiter((transform.dirty for transform in transforms), dtype=np.bool_, count=count)
+
+        for position in self.external_parents.keys():
+            dirty[position] = True
+
+        for level in self.levels[1:]:
+            dirty[level] |= dirty[self.parents[level]]
 
-        if not transform.static:
-            transform.world_matrix = self.get_world_space_transform(entity, link)
-            self.update_children(entity, link)
+        rows = np.flatnonzero(dirty)
+        if len(rows) == 0:
+            return
+
+        local_matrices = np.frombuffer(b''.join([bytes(transforms[row].local_matrix) for row in rows.tolist()]), dtype=np.float32).reshape(-1, 4, 4)
+        self.world_matrices[rows] = local_matrices
+
+        # Parents whose entity is not part of the system contribute with their local matrix.
+        scene = SceneManager().get_active_scene()
+        for position, parent in self.external_parents.items():
+            parent_transform = scene.get_component(parent, ComponentLib().Transform)
+            if parent_transform is not None:
+                self.world_matrices[position] = np.array(parent_transform.local_matrix) @ self.world_matrices[position]
+
+        # Propagate level by level, so that all the dirty entities of a level are computed at once.
+        for level in self.levels[1:]:
+            level = level[dirty[level]]
+            if len(level) != 0:
+                self.world_matrices[level] = self.world_matrices[self.parents[level]] @ self.world_matrices[level]
+
+        for row in rows.tolist():
+            transform = transforms[row]
+            if not transform.static:
+                transform.world_matrix = glm.mat4(self.world_matrices[row])
+                scene.mark_changed(self.filtered_entities[self.order[row]], ComponentLib().Transform)
+
+    def build_hierachy(self):
+        """Flattens the hierachy of the filtered entities in topological order, so that parents always precede their children, and groups them by depth.
+        """
+        count = len(self.filtered_entities)
+
+        parents = [-1] * count
+        children: list[list[int]] = [[] for _ in range(count)]
+        self.external_parents.clear()
+
+        external = []
+        for index, components in enumerate(self.filtered_components):
+            parent = components[0].parent
+            if parent is None:
+                continue
+
+            parent_index = self.entity_indices.get(parent.index)
+            if parent_index is not None and self.filtered_entities[parent_index] == parent:
+                parents[index] = parent_index
+                children[parent_index].append(index)
+            else:
+                external.append((index, parent))
+
+        self.order = []
+        self.levels = []
+        positions = [-1] * count
+
+        level = [index for index in range(count) if parents[index] == -1]
+        while len(level) != 0:
+            self.levels.append(np.arange(len(self.order), len(self.order) + len(level)))
+            for index in level:
+                positions[index] = len(self.order)
+                self.order.append(index)
+            level = [child for index in level for child in children[index]]
+
+        for index, parent in external:
+            self.external_parents[positions[index]] = parent
+
+        self.parents = np.array([-1 if parents[index] == -1 else positions[parents[index]] for index in self.order], dtype=np.int64)
+        self.world_matrices = np.zeros((len(self.order), 4, 4), dtype=np.float32)
 
     def get_world_space_transform(self, entity, link):
         transform = glm.mat4(1.0)
@@ -44,29 +156,22 @@ class LinkSystem(System):
                 transform = self.get_world_space_transform(link.parent, parent_link)
 
         return transform * SceneManager().get_active_scene().get_component(entity, ComponentLib().Transform).local_matrix
-    
+
     def add_children(self, entity: Entity, link: LinkComponent):
         # If the entity has a parent, add it as a child of the parent
         if link.parent is not None:
-            parent_link = SceneManager().get_active_scene().get_component(link.parent, LinkComponent)
-            if parent_link is not None:
-                if entity not in parent_link.children:
-                    parent_link.children.append(entity)
+            SceneManager().get_active_scene().add_child(link.parent, entity)
 
     def update_children(self, entity: Entity, link: LinkComponent):
         # Check if the entity's parent has changed or if it's no longer a child
         if link.prev_parent != link.parent:
             # Remove the entity from its previous parent's children list
             if link.prev_parent is not None:
-                previous_parent_link = SceneManager().get_active_scene().get_component(link.prev_parent, LinkComponent)
-                if previous_parent_link is not None and entity in previous_parent_link.children:
-                    previous_parent_link.children.remove(entity)
+                SceneManager().get_active_scene().remove_child(link.prev_parent, entity)
 
             # Add the entity to its new parent's children list
             if link.parent is not None:
-                current_parent_link = SceneManager().get_active_scene().get_component(link.parent, LinkComponent)
-                if current_parent_link is not None:
-                    current_parent_link.children.append(entity)
+                SceneManager().get_active_scene().add_child(link.parent, entity)
 
             # Update previous parent to be the current
-            link.prev_parent = link.parent
\ No newline at end of file
+            link.prev_parent = link.parent
@@ -1,20 +1,21 @@
 from pyGandalf.core.application import Application
 from pyGandalf.scene.components import Component, TransformComponent, MaterialComponent
-from pyGandalf.systems.system import System, SystemState
-from pyGandalf.systems.light_system import LightSystem
+from pyGandalf.systems.system import System
 from pyGandalf.renderer.opengl_renderer import OpenGLRenderer
+from pyGandalf.renderer.render_queue import RenderQueue, RenderPassType, DrawPacket
 
 from pyGandalf.utilities.opengl_texture_lib import OpenGLTextureLib, TextureData, TextureDescriptor
 from pyGandalf.utilities.opengl_material_lib import OpenGLMaterialLib
+from pyGandalf.utilities.opengl_shader_lib import OpenGLShaderLib
 from pyGandalf.utilities.mesh_lib import MeshLib
 
 from pyGandalf.scene.scene_manager import SceneManager
+from pyGandalf.scene.render_context import RenderContext
 from pyGandalf.scene.entity import Entity
 
 from pyGandalf.utilities.logger import logger
 
 import glm
-import glfw
 import numpy as np
 import OpenGL.GL as gl
 
@@ -22,9 +23,11 @@ class OpenGLStaticMeshRenderingSystem(System):
     """
     The system responsible for rendering static meshes.
     """
+    update_per_frame = True
 
     def on_create_system(self):
         self.pre_pass_material = None
+        self.render_queue = RenderQueue()
         self.SHADOW_WIDTH = 1024
         self.SHADOW_HEIGHT = 1024
 
@@ -44,6 +47,7 @@ class OpenGLStaticMeshRenderingSystem(System):
         depth_texture_id = OpenGLTextureLib().get_id('depth_texture')
 
         gl.glBindTexture(gl.GL_TEXTURE_2D, depth_texture_id)
+        OpenGLRenderer().invalidate_texture_bindings()
 
         gl.glBindFramebuffer(gl.GL_FRAMEBUFFER, self.framebuffer_id)
         gl.glFramebufferTexture2D(gl.GL_FRAMEBUFFER, gl.GL_DEPTH_ATTACHMENT, gl.GL_TEXTURE_2D, depth_texture_id, 0)
@@ -54,9 +58,8 @@ class OpenGLStaticMeshRenderingSystem(System):
     def on_create_entity(self, entity: Entity, components: Component | tuple[Component]):
         mesh, material, transform = components
 
-        mesh.render_pipeline = None
-        mesh.index_buffer = None
-        mesh.buffers.clear()
+        # Release the buffers that the mesh may still reference, e.g. when it is created again.
+        OpenGLRenderer().remove_batch(mesh)
 
         material.instance = OpenGLMaterialLib().get(material.name)
 
@@ -74,40 +77,40 @@ class OpenGLStaticMeshRenderingSystem(System):
         
         mesh.batch = OpenGLRenderer().add_batch(mesh, material)
 
-    def on_update_system(self, ts: float):
-        if OpenGLRenderer().get_shadows_enabled():
-            # Create the depth only pre-pass material is not already created
-            if self.pre_pass_material == None:
-                self.pre_pass_material = MaterialComponent('M_DepthPrePass')
-                self.pre_pass_material.instance = OpenGLMaterialLib().get('M_DepthPrePass')
+    def remove_entity_components(self, entity, component):
+        index = self.entity_indices.get(entity.index)
+        components = self.filtered_components[index] if index is not None and self.filtered_entities[index] == entity else None
 
-            OpenGLRenderer().resize(self.SHADOW_WIDTH, self.SHADOW_HEIGHT)
-            gl.glBindFramebuffer(gl.GL_FRAMEBUFFER, self.framebuffer_id)
-            gl.glClear(gl.GL_DEPTH_BUFFER_BIT)
+        removed = super().remove_entity_components(entity, component)
 
-            # Depth only pre-pass
-            for components in self.get_filtered_components():
-                mesh, entity_material, transform = components
+        # The buffers of the mesh are deleted along with its last user.
+        if removed and components is not None:
+            OpenGLRenderer().remove_batch(components[0])
 
-                if entity_material.instance.descriptor.cast_shadows == False:
-                    continue
+        return removed
 
-                if len(mesh.attributes) == 0:
-                    continue
+    def on_update_system(self, ts: float):
+        # In fixed timestep mode, objects are drawn between their last two simulation steps.
+        alpha = SceneManager().get_active_scene().interpolation_alpha
 
-                # Bind vao
-                OpenGLRenderer().set_pipeline(mesh)
-                # Bind vbo(s) and ebo
-                OpenGLRenderer().set_buffers(mesh)
-                # Bind shader program and set material properties
-                OpenGLRenderer().set_bind_groups(self.pre_pass_material)
+        shadows_enabled = OpenGLRenderer().get_shadows_enabled()
 
-                self.update_prepass_uniforms(transform.world_matrix, self.pre_pass_material)
+        # Create the depth only pre-pass material is not already created
+        if shadows_enabled and self.pre_pass_material == None:
+            self.pre_pass_material = MaterialComponent('M_DepthPrePass')
+            self.pre_pass_material.instance = OpenGLMaterialLib().get('M_DepthPrePass')
 
-                if (mesh.indices is None):
-                    OpenGLRenderer().draw(mesh, self.pre_pass_material)
-                else:
-                    OpenGLRenderer().draw_indexed(mesh, self.pre_pass_material)
+        self.update_uniform_buffers()
+        self.submit_draws(alpha, shadows_enabled)
+
+        if shadows_enabled:
+            OpenGLRenderer().resize(self.SHADOW_WIDTH, self.SHADOW_HEIGHT)
+            gl.glBindFramebuffer(gl.GL_FRAMEBUFFER, self.framebuffer_id)
+            OpenGLRenderer().set_depth_mask(gl.GL_TRUE)
+            gl.glClear(gl.GL_DEPTH_BUFFER_BIT)
+
+            # Depth only pre-pass
+            self.draw_packets(self.render_queue.get_packets(RenderPassType.SHADOW), True)
 
             gl.glBindFramebuffer(gl.GL_FRAMEBUFFER, 0)
 
@@ -117,17 +120,26 @@ class OpenGLStaticMeshRenderingSystem(System):
             else:
                 OpenGLRenderer().resize(Application().get_window().width, Application().get_window().height)
 
+            OpenGLRenderer().set_depth_mask(gl.GL_TRUE)
             gl.glClear(gl.GL_COLOR_BUFFER_BIT | gl.GL_DEPTH_BUFFER_BIT)
 
         # Color pass
-        for components in self.get_filtered_components():
-            mesh, material, transform = components
+        self.draw_packets(self.render_queue.get_packets(RenderPassType.COLOR), False)
 
-            if len(mesh.attributes) == 0:
-                continue
+    def draw_packets(self, packets: list[DrawPacket], pre_pass: bool):
+        """Draws the given draw packets in order, the runs of packets that draw the same mesh with the same instanced material are drawn with a single instanced draw.
 
-            if material.instance == None:
-                continue
+        Args:
+            packets (list[DrawPacket]): The draw packets of a pass in sort key order.
+            pre_pass (bool): Whether the packets belong to the depth only pre-pass.
+        """
+        runs = self.get_instance_runs(packets)
+
+        if any(packet.material.instance.is_instanced() for _, _, packet in runs):
+            OpenGLRenderer().set_instance_data(self.get_instance_data(packets))
+
+        for first_instance, instance_count, packet in runs:
+            mesh, material = packet.render_data, packet.material
 
             # Bind vao
             OpenGLRenderer().set_pipeline(mesh)
@@ -136,83 +148,186 @@ class OpenGLStaticMeshRenderingSystem(System):
             # Bind shader program and set material properties
             OpenGLRenderer().set_bind_groups(material)
 
-            self.update_uniforms(transform.world_matrix, material)
+            if pre_pass:
+                self.update_prepass_uniforms(packet.model, material)
+            else:
+                self.update_uniforms(packet.model, material)
+
+            if material.instance.is_instanced():
+                OpenGLRenderer().set_instance_buffers(mesh, material, first_instance)
 
-            if (mesh.indices is None):
-                OpenGLRenderer().draw(mesh, material)
+                if (mesh.indices is None):
+                    OpenGLRenderer().draw_instanced(mesh, material, instance_count)
+                else:
+                    OpenGLRenderer().draw_indexed_instanced(mesh, material, instance_count)
             else:
-                OpenGLRenderer().draw_indexed(mesh, material)
+                if (mesh.indices is None):
+                    OpenGLRenderer().draw(mesh, material)
+                else:
+                    OpenGLRenderer().draw_indexed(mesh, material)
 
-    def update_prepass_uniforms(self, model, material: MaterialComponent):
-        light_system: LightSystem = SceneManager().get_active_scene().get_system(LightSystem)
-        
-        if light_system is not None:
-            if light_system.get_state() != SystemState.PAUSE:
-                for components in light_system.get_filtered_components():
-                    light, transform = components
+    def get_mesh_key(self, mesh) -> int:
+        """Returns the identity of the geometry of the given mesh, meshes with the same geometry share it since they share their vao.
+
+        Args:
+            mesh (StaticMeshComponent): The mesh.
+
+        Returns:
+            int: The identity of the geometry of the mesh.
+        """
+        return mesh.render_pipeline
 
-                    if material.instance.has_uniform('u_LightSpaceMatrix'):
-                        light_projection = SceneManager().get_main_camera().projection
-                        light_view = glm.lookAt(transform.get_world_position(), glm.vec3(0.0), glm.vec3(0.0, 1.0, 0.0))
-                        material.instance.set_uniform('u_LightSpaceMatrix', light_projection * light_view)
+    def get_instance_runs(self, packets: list[DrawPacket]) -> list[tuple]:
+        """Splits the given draw packets into runs of consecutive packets that draw the same mesh with the same instanced material. Materials that are not instanced get one run per packet.
 
-                    break
+        Args:
+            packets (list[DrawPacket]): The draw packets in sort key order.
+
+        Returns:
+            list[tuple]: The first instance, the instance count and the first draw packet of every run.
+        """
+        runs = []
+        previous_key = None
+
+        for index, packet in enumerate(packets):
+            key = (packet.material.name, self.get_mesh_key(packet.render_data)) if packet.material.instance.is_instanced() else None
+
+            if key != None and key == previous_key:
+                first_instance, instance_count, first_packet = runs[-1]
+                runs[-1] = (first_instance, instance_count + 1, first_packet)
+            else:
+                runs.append((index, 1, packet))
+
+            previous_key = key
+
+        return runs
+
+    def get_instance_data(self, packets: list[DrawPacket]) -> np.ndarray:
+        """Packs the model and normal matrices of the given draw packets, one row per packet, in the column major layout of the per-instance attributes.
+
+        Args:
+            packets (list[DrawPacket]): The draw packets in sort key order.
+
+        Returns:
+            np.ndarray: The per-instance data.
+        """
+        count = len(packets)
+        instance_data = np.empty((count, 2, 4, 4), dtype=np.float32)
+
+        # The memory of a matrix is column major and NumPy reads it as its transpose, so the normal matrix transpose(inverse(model)) is stored as inverse(model).
+        models = np.frombuffer(b''.join([packet.model.to_bytes() for packet in packets]), dtype=np.float32).reshape(count, 4, 4)
+        instance_data[:, 0] = models
+        try:
+            instance_data[:, 1] = np.linalg.inv(models).transpose(0, 2, 1)
+        except np.linalg.LinAlgError:
+            instance_data[:, 1] = np.linalg.pinv(models).transpose(0, 2, 1)
+
+        return instance_data.reshape(count, -1)
+
+    def submit_draws(self, alpha: float, shadows_enabled: bool):
+        """Submits the draws of the shadow and color passes to the render queue, so that they are executed grouped by state and ordered by depth.
+
+        Args:
+            alpha (float): The interpolation factor between the last two simulation steps.
+            shadows_enabled (bool): Whether the draws of the shadow pass are submitted.
+        """
+        self.render_queue.clear()
+
+        context = RenderContext().get()
+        camera_position = None if context.camera == None else glm.vec3(glm.inverse(context.view)[3])
+        far = 0.0 if context.camera == None else context.camera.far
+
+        for components in self.get_filtered_components():
+            mesh, material, transform = components
+
+            if len(mesh.attributes) == 0:
+                continue
+
+            if material.instance == None:
+                continue
+
+            model = transform.get_interpolated_world_matrix(alpha)
+            depth = self.render_queue.depth_of(glm.vec3(model[3]), camera_position, far)
+            mesh_key = self.get_mesh_key(mesh)
+
+            if shadows_enabled and material.instance.descriptor.cast_shadows:
+                self.render_queue.submit(RenderPassType.SHADOW, mesh, self.pre_pass_material, transform, model, self.pre_pass_material.instance.shader_program, depth, mesh=mesh_key)
+
+            descriptor = material.instance.descriptor
+            transparent = descriptor.transparent or (descriptor.blend_enabled and material.instance.data.color.a < 1.0)
+            self.render_queue.submit(RenderPassType.COLOR, mesh, material, transform, model, material.instance.shader_program, depth, transparent, mesh_key)
+
+    def update_uniform_buffers(self):
+        """Fills the uniform buffers that all the shader programs share, i.e. the camera and the lights, from the render context and binds them. Gets called once per frame.
+        """
+        context = RenderContext().get()
+
+        values = {
+            'u_View': context.view,
+            'u_Projection': context.projection,
+            'u_LightSpaceMatrix': context.light_space_matrix,
+            'u_ViewPosition': context.camera_position,
+            'u_Time': context.time,
+            'u_LightCount': context.light_count,
+            'u_LightPositions': context.light_positions_vec4,
+            'u_LightColors': context.light_colors_vec4,
+            'u_LightIntensities': context.light_intensities,
+        }
+
+        for uniform_buffer in OpenGLShaderLib().get_uniform_buffers().values():
+            for member, value in values.items():
+                if value is not None and uniform_buffer.has_member(member):
+                    uniform_buffer.set(member, value)
+
+            uniform_buffer.upload()
+            OpenGLRenderer().bind_uniform_buffer(uniform_buffer)
+
+    def update_prepass_uniforms(self, model, material: MaterialComponent):
+        context = RenderContext().get()
+
+        if context.light_space_matrix is not None:
+            if material.instance.has_uniform('u_LightSpaceMatrix'):
+                material.instance.set_uniform('u_LightSpaceMatrix', context.light_space_matrix)
 
         if material.instance.has_uniform('u_Model'):
             material.instance.set_uniform('u_Model', model)
 
     def update_uniforms(self, model, material: MaterialComponent):
-        light_system: LightSystem = SceneManager().get_active_scene().get_system(LightSystem)
+        context = RenderContext().get()
 
-        light_positions: list[glm.vec3] = []
-        light_colors: list[glm.vec3] = []
-        light_intensities: list[np.float32] = []
-        
-        if light_system is not None:
-            if light_system.get_state() != SystemState.PAUSE:
-                for components in light_system.get_filtered_components():
-                    light, transform = components
-                    light_colors.append(light.color)
-                    light_positions.append(transform.get_world_position())
-                    light_intensities.append(light.intensity)
-
-                    # NOTE: Only works with one light, adding more will keep the last.
-                    if material.instance.has_uniform('u_LightSpaceMatrix'):
-                        light_projection = SceneManager().get_main_camera().projection
-                        light_view = glm.lookAt(transform.get_world_position(), glm.vec3(0.0), glm.vec3(0.0, 1.0, 0.0))
-                        material.instance.set_uniform('u_LightSpaceMatrix', light_projection * light_view)
-
-        count = len(light_positions)
+        # NOTE: Only works with one light, the shadows are cast by the first.
+        if context.light_space_matrix is not None:
+            if material.instance.has_uniform('u_LightSpaceMatrix'):
+                material.instance.set_uniform('u_LightSpaceMatrix', context.light_space_matrix)
+
+        count = context.light_count
 
         assert count <= 16, f"Maximum supported lights for WebGPU backend are 16, but {count} are defined"
 
         if count != 0:
             if material.instance.has_uniform('u_LightPositions'):
-                material.instance.set_uniform('u_LightPositions', glm.array(light_positions))
+                material.instance.set_uniform('u_LightPositions', context.light_positions_array)
             if material.instance.has_uniform('u_LightColors'):
-                material.instance.set_uniform('u_LightColors', glm.array(light_colors))
+                material.instance.set_uniform('u_LightColors', context.light_colors_array)
             if material.instance.has_uniform('u_LightIntensities'):
-                material.instance.set_uniform('u_LightIntensities', np.asarray(light_intensities, dtype=np.float32))
+                material.instance.set_uniform('u_LightIntensities', context.light_intensities)
             if material.instance.has_uniform('u_LightCount'):
                 material.instance.set_uniform('u_LightCount', count)
-            if material.instance.has_uniform('u_Glossiness'):
-                material.instance.set_uniform('u_Glossiness', material.instance.data.glossiness)
-        elif light_system is not None:
+        elif context.has_light_system:
             if material.instance.has_uniform('u_LightCount'):
                 material.instance.set_uniform('u_LightCount', 0)
 
-        camera = SceneManager().get_main_camera()
-        if camera != None:
+        if context.camera != None:
             if material.instance.has_uniform('u_ModelViewProjection'):
-                material.instance.set_uniform('u_ModelViewProjection', camera.projection * camera.view * model)
+                material.instance.set_uniform('u_ModelViewProjection', context.view_projection * model)
             if material.instance.has_uniform('u_Model'):
                 material.instance.set_uniform('u_Model', model)
             if material.instance.has_uniform('u_View'):
-                material.instance.set_uniform('u_View', camera.view)
+                material.instance.set_uniform('u_View', context.view)
             if material.instance.has_uniform('u_Projection'):
-                material.instance.set_uniform('u_Projection', camera.projection)
+                material.instance.set_uniform('u_Projection', context.projection)
             if material.instance.has_uniform('u_ViewProjection'):
-                material.instance.set_uniform('u_ViewProjection', camera.projection * glm.mat4(glm.mat3(camera.view)))
+                material.instance.set_uniform('u_ViewProjection', context.skybox_view_projection)
         else:
             if material.instance.has_uniform('u_ModelViewProjection'):
                 material.instance.set_uniform('u_ModelViewProjection', glm.mat4(1.0))
@@ -226,14 +341,16 @@ class OpenGLStaticMeshRenderingSystem(System):
                 material.instance.set_uniform('u_ViewProjection', glm.mat4(1.0))
 
         if material.instance.has_uniform('u_ViewPosition'):
-            camera_entity = SceneManager().get_main_camera_entity()
-            if camera_entity != None:
-                camera_transform = SceneManager().get_active_scene().get_component(camera_entity, TransformComponent)
-                if camera_transform != None and not camera_transform.static:
-                    material.instance.set_uniform('u_ViewPosition', camera_transform.get_world_position())
+            if context.camera_transform != None and not context.camera_transform.static:
+                material.instance.set_uniform('u_ViewPosition', context.camera_position)
 
         if material.instance.has_uniform('u_Color'):
             material.instance.set_uniform('u_Color', material.instance.data.color.rgb)
 
+        if material.instance.has_uniform('u_Glossiness'):
+            material.instance.set_uniform('u_Glossiness', material.instance.data.glossiness)
+
         if material.instance.has_uniform('u_Time'):
-            material.instance.set_uniform('u_Time', float(glfw.get_time()))
\ No newline at end of file
+            material.instance.set_uniform('u_Time', context.time)
+
+        material.instance.upload_uniform_buffer()
\ No newline at end of file
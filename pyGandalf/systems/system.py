@@ -1,4 +1,5 @@
 from pyGandalf.scene.entity import Entity
+from pyGandalf.scene.archetype import Archetype, ComponentColumn
 from pyGandalf.scene.components import Component
 
 from pyGandalf.core.events import Event, PushEvent, EventType
@@ -14,11 +15,42 @@ class SystemState(Enum):
 class System:
     """A class that represents a system that operates on entities that have all the specified components.
     """
-    def __init__(self, filters: list[type]):
+    # Systems that set it only receive in `on_update_entity` the entities whose filtered components changed since their previous update.
+    update_changed_only: bool = False
+
+    # The component types that the system reads and writes, so that systems without conflicts can be updated concurrently.
+    # Systems that declare neither are exclusive and are updated alone, on the main thread.
+    reads: tuple[type] = None
+    writes: tuple[type] = None
+
+    # In fixed timestep mode, systems are updated at the fixed rate of the simulation, unless they are updated once per rendered frame (e.g. rendering and input).
+    update_per_frame: bool = False
+
+    # The rate, in updates per second, of systems that should be updated less often than the rest (e.g. AI at 10 Hz), or None to be updated every time.
+    tick_rate: float = None
+
+    def __init__(self, filters: list[type], reads: tuple[type] = None, writes: tuple[type] = None):
         self.filters = filters
+        if reads is not None:
+            self.reads = tuple(reads)
+        if writes is not None:
+            self.writes = tuple(writes)
         self.filtered_components = []
         self.filtered_entities = []
-        self.state = SystemState.PLAY        
+        self.entity_indices: dict[int, int] = {}
+        self.archetypes: list[Archetype] = []
+        self.state = SystemState.PLAY
+
+        # The change tick of the current update and of the previous update that the system actually ran.
+        self.change_tick = 0
+        self.last_run_tick = 0
+
+        # The time that accumulated since the previous update of a system with a tick rate.
+        self.tick_accumulator = 0.0
+
+        # Systems opt in the batched update by overriding on_update_batch and skip the per entity update if they do not override on_update_entity.
+        self.batched = type(self).on_update_batch is not System.on_update_batch
+        self.updates_entities = type(self).on_update_entity is not System.on_update_entity
 
     def set_state(self, state: SystemState):
         """Sets the state of the system.
@@ -37,62 +69,124 @@ class System:
         """
         return self.state
     
+    def is_exclusive(self) -> bool:
+        """Returns whether or not the system has to be updated alone, because it does not declare which component types it reads and writes.
+
+        Returns:
+            bool: ```True``` if the system declares neither the component types it reads nor those it writes, ```False``` otherwise.
+        """
+        return self.reads is None and self.writes is None
+
+    def get_access(self) -> tuple[frozenset[type], frozenset[type]]:
+        """Returns the component types that the system reads and writes.
+
+        Returns:
+            tuple[frozenset[type], frozenset[type]]: The component types that the system reads and the component types that it writes.
+        """
+        return frozenset(self.reads or ()), frozenset(self.writes or ())
+
     def filter(self, scene):
         """Filters from the given scene the entities and their component that the system operates on and caches them.
 
         Args:
             scene (Scene): The scene to filter entities from.
         """
-        components_array = scene.get_components_array()
-
         for entity in scene.get_entities():
             entity_components = scene.get_entity_component_references(entity)
-            self.filter_entity_components(entity, entity_components, components_array)
+            self.filter_entity_components(entity, entity_components)
+
+        for archetype in scene.get_archetypes():
+            self.filter_archetype(archetype)
+
+    def filter_archetype(self, archetype: Archetype):
+        """Stores the given archetype if its entities have all the components that the system operates on.
+
+        Args:
+            archetype (Archetype): The archetype to process.
+        """
+        if archetype in self.archetypes:
+            return
+
+        for filter in self.filters:
+            if filter not in archetype.columns:
+                return
 
-    def filter_entity_components(self, entity, entity_components, components_array):
+        self.archetypes.append(archetype)
+
+    def filter_entity_components(self, entity, entity_components):
         """Stores the given entity and its components if the entity has all the components that the system operates on.
 
         Args:
             entity (Entity): The entity to process.
-            entity_components (_type_): The components of the entity.
-            components_array (_type_): The dictionary holding all the component arrays.
+            entity_components (dict[type, component]): The components of the entity.
+
+        Returns:
+            tuple[component] | None: The stored components of the entity or ```None``` if the entity was already stored or does not have all the components.
+        """
+        if entity.index in self.entity_indices:
+            return None
+
+        for filter in self.filters:
+            if filter not in entity_components:
+                return None
+
+        self.entity_indices[entity.index] = len(self.filtered_entities)
+        self.filtered_components.append(tuple(entity_components[filter] for filter in self.filters))
+        self.filtered_entities.append(entity)
+
+        return self.filtered_components[-1]
+
+    def filter_entities_batch(self, entities: list[Entity], columns: dict) -> list[tuple]:
+        """Stores the given new entities and their components at once, if they have all the components that the system operates on.
+
+        Args:
+            entities (list[Entity]): The new entities, none of which is stored yet.
+            columns (dict[type, list]): The components of the entities, one list per component type.
+
+        Returns:
+            list[tuple[component]]: The stored components of the entities or an empty list if the entities do not have all the components.
         """
-        if (entity in self.filtered_entities):
-            return
-        
-        i, j = 0, 0
         for filter in self.filters:
-            j += 1
-            if filter in entity_components.keys():
-                i += 1            
-        if (j == i):
-            self.filtered_components.append(tuple(components_array[filter][entity_components[filter]] for filter in self.filters))
-            self.filtered_entities.append(entity)
-            
-            return self.filtered_components[-1]
-        
-        return None
+            if filter not in columns:
+                return []
+
+        first = len(self.filtered_entities)
+        components = list(zip(*[columns[filter] for filter in self.filters]))
+
+        self.entity_indices.update(zip([entity.index for entity in entities], range(first, first + len(entities))))
+        self.filtered_components.extend(components)
+        self.filtered_entities.extend(entities)
+
+        return components
 
     def remove_entity_components(self, entity, component):
-        """Removes the entity and its component from the cached arrays.
+        """Removes the entity and its component from the cached arrays. The last cached entity is moved into the freed slot, so the arrays stay dense.
 
         Args:
             entity (Entity): The entity to remove.
-            component (_type_): The component to remove.
+            component (type): The type of the component to remove.
 
         Returns:
             bool: ```True``` if the enity and the component was successfully removed from the system or ```False``` if it was not present in the cached arrays of the system.
         """
-        if entity not in self.filtered_entities:
+        index = self.entity_indices.get(entity.index)
+        if index is None or self.filtered_entities[index] != entity:
             return False
 
-        index = self.filtered_entities.index(entity)
-        
-        if not tuple(filter(lambda i: (type(i) == component), self.filtered_components[index])):
+        if component not in self.filters:
             return False
 
-        self.filtered_entities.remove(entity)
-        self.filtered_components.pop(index)
+        del self.entity_indices[entity.index]
+
+        last = len(self.filtered_entities) - 1
+        if index != last:
+            last_entity = self.filtered_entities[last]
+            self.filtered_entities[index] = last_entity
+            self.filtered_components[index] = self.filtered_components[last]
+            self.entity_indices[last_entity.index] = index
+
+        self.filtered_entities.pop()
+        self.filtered_components.pop()
 
         return True
 
@@ -103,24 +197,45 @@ class System:
             self.on_create_system()
 
         if self.state is SystemState.PLAY:
-            for entity, components in zip(self.filtered_entities, self.filtered_components):
-                if (len(components) == 1):
+            if len(self.filters) == 1:
+                for entity, components in zip(self.filtered_entities, self.filtered_components):
                     self.on_create_entity(entity, components[0])
-                else:
+            else:
+                for entity, components in zip(self.filtered_entities, self.filtered_components):
                     self.on_create_entity(entity, components)
 
     def on_update_base(self, ts: float):
-        """Calls the `on_update_entity` and `on_update_system` methods of the system for each entity and its filtered components.
+        """Calls the `on_update_system` method of the system and then either the `on_update_batch` method for each archetype, if the system is batched, or the `on_update_entity` method for each entity and its filtered components.
+        Systems with a tick rate are only updated once enough time accumulated, with a timestep of one tick.
         """
+        if self.state is SystemState.PLAY and self.tick_rate is not None:
+            period = 1.0 / self.tick_rate
+            self.tick_accumulator += ts
+            if self.tick_accumulator < period:
+                return
+
+            # Ticks that were missed are dropped, instead of being caught up.
+            self.tick_accumulator = min(self.tick_accumulator - period, period)
+            ts = period
+
         if self.state is SystemState.PLAY:
             self.on_update_system(ts)
 
         if self.state is SystemState.PLAY:
-            for entity, components in zip(self.filtered_entities, self.filtered_components):
-                if (len(components) == 1):
-                    self.on_update_entity(ts, entity, components[0])
+            if self.batched:
+                for archetype in self.archetypes:
+                    if len(archetype) != 0:
+                        self.on_update_batch(ts, archetype.entities, self.get_columns(archetype))
+            elif self.updates_entities:
+                filtered_data = self.changed_data() if self.update_changed_only else self.filtered_data()
+                if len(self.filters) == 1:
+                    for entity, components in filtered_data:
+                        self.on_update_entity(ts, entity, components[0])
                 else:
-                    self.on_update_entity(ts, entity, components)
+                    for entity, components in filtered_data:
+                        self.on_update_entity(ts, entity, components)
+
+            self.last_run_tick = self.change_tick
 
     def on_gui_update_base(self, ts: float):
         """Calls the `on_gui_update_entity` and `on_gui_update_system` methods of the system for each entity and its filtered components.
@@ -129,11 +244,29 @@ class System:
             self.on_gui_update_system(ts)
 
         if self.state is SystemState.PLAY:
-            for entity, components in zip(self.filtered_entities, self.filtered_components):
-                if (len(components) == 1):
+            if len(self.filters) == 1:
+                for entity, components in zip(self.filtered_entities, self.filtered_components):
                     self.on_gui_update_entity(ts, entity, components[0])
-                else:
+            else:
+                for entity, components in zip(self.filtered_entities, self.filtered_components):
                     self.on_gui_update_entity(ts, entity, components)
+
+    def get_columns(self, archetype: Archetype) -> tuple:
+        """Returns the columns of the given archetype for the components that the system operates on, in the order of the filters.
+
+        Args:
+            archetype (Archetype): The archetype to get the columns from.
+
+        Returns:
+            tuple[ComponentColumn | list]: A `ComponentColumn` for the component types that declare a numeric schema or the plain list of components otherwise.
+        """
+        columns = []
+        for filter in self.filters:
+            if getattr(filter, 'schema', None) is not None:
+                columns.append(ComponentColumn(filter, archetype, self.change_tick))
+            else:
+                columns.append(archetype.columns[filter])
+        return tuple(columns)
     
     def on_create_entity(self, entity: Entity, components: Component | tuple[Component]):
         """Gets called once in the first frame for each entity that the system operates on.
@@ -144,6 +277,20 @@ class System:
         """
         raise NotImplementedError()
 
+    def on_create_batch(self, entities: list[Entity], components: list[tuple[Component]]):
+        """Gets called once for a group of entities that were spawned together while the application is running. By default it calls `on_create_entity` for each entity, override it to process all the entities in a single call.
+
+        Args:
+            entities (list[Entity]): The spawned entities.
+            components (list[tuple[Component]]): The filtered components of each spawned entity, in the order of the filters.
+        """
+        if len(self.filters) == 1:
+            for entity, entity_components in zip(entities, components):
+                self.on_create_entity(entity, entity_components[0])
+        else:
+            for entity, entity_components in zip(entities, components):
+                self.on_create_entity(entity, entity_components)
+
     def on_update_entity(self, ts: float, entity: Entity, components: Component | tuple[Component]):
         """Gets called every frame for each entity that the system operates on.
 
@@ -154,6 +301,16 @@ class System:
         """
         pass
 
+    def on_update_batch(self, ts: float, entities: list[Entity], columns: tuple):
+        """Gets called every frame, instead of `on_update_entity`, for each group of entities that are stored together and that the system operates on. Override it to process all the entities of the group in a single vectorized call.
+
+        Args:
+            ts (float): The application time step (delta time).
+            entities (list[Entity]): The entities of the group.
+            columns (tuple[ComponentColumn | list]): One column per filtered component type, in the order of the filters. Components with a numeric schema are given as a `ComponentColumn`.
+        """
+        pass
+
     def on_gui_update_entity(self, ts: float, entity: Entity, components: Component | tuple[Component]):
         """Gets called every frame for each entity that the system operates on and responsible for drawing gui elements.
 
@@ -193,6 +350,36 @@ class System:
         """
         return zip(self.filtered_entities, self.filtered_components)
     
+    def changed_data(self):
+        """Returns the entities and components that the system operates on, whose components changed since the previous update of the system.
+        Archetypes without any changed column are skipped at once.
+
+        Yields:
+            tuple[Entity, tuple]: The entity and its filtered components.
+        """
+        last_run_tick = self.last_run_tick
+        for archetype in self.archetypes:
+            if all(archetype.changed_ticks[filter] <= last_run_tick for filter in self.filters):
+                continue
+
+            columns = [archetype.columns[filter] for filter in self.filters]
+            for entity, components in zip(archetype.entities, zip(*columns)):
+                for component in components:
+                    if component.changed_tick > last_run_tick:
+                        yield entity, components
+                        break
+
+    def is_changed(self, component) -> bool:
+        """Checks if the given component changed since the previous update of the system.
+
+        Args:
+            component (Component): The component to check.
+
+        Returns:
+            bool: ```True``` if the component was added or marked as changed since the previous update of the system, ```False``` otherwise.
+        """
+        return component.changed_tick > self.last_run_tick
+
     def get_filtered_entities(self):
         """Returns the entities that the system operates on.
 
@@ -1,7 +1,9 @@
 from pyGandalf.scene.entity import Entity
-from pyGandalf.scene.components import Component
+from pyGandalf.scene.components import Component, TransformComponent
 from pyGandalf.systems.system import System
 
+from pyGandalf.utilities.math import quaternions_from_euler_batch, trs_batch
+
 import numpy as np
 import glm
 
@@ -9,6 +11,12 @@ class TransformSystem(System):
     """
     The system responsible for transformations.
     """
+    reads = (TransformComponent,)
+    writes = (TransformComponent,)
+
+    def on_create_system(self):
+        # The entities, the translation, rotation and scale of the last computed matrices and the dirty flags, per archetype.
+        self.previous_inputs = {}
 
     def on_create_entity(self, entity: Entity, components: Component | tuple[Component]):
         transform = components
@@ -21,23 +29,72 @@ class TransformSystem(System):
         transform.local_matrix = T * glm.mat4(R) * S
         transform.world_matrix = transform.local_matrix
 
-    def on_update_entity(self, ts, entity: Entity, components: Component | tuple[Component]):
-        transform = components
+    def on_create_batch(self, entities: list[Entity], components: list[tuple[Component]]):
+        transforms = [entity_components[0] for entity_components in components]
+
+        translations = np.frombuffer(b''.join([bytes(transform.translation) for transform in transforms]), dtype=np.float32).reshape(-1, 3)
+        rotations = np.frombuffer(b''.join([bytes(transform.rotation) for transform in transforms]), dtype=np.float32).reshape(-1, 3)
+        scales = np.frombuffer(b''.join([bytes(transform.scale) for transform in transforms]), dtype=np.float32).reshape(-1, 3)
+
+        quaternions = quaternions_from_euler_batch(rotations)
+        matrices = trs_batch(translations, quaternions, scales)
+
+        for transform, quaternion, matrix in zip(transforms, quaternions.tolist(), matrices):
+            transform.quaternion = glm.quat(*quaternion)
+            transform.local_matrix = glm.mat4(matrix)
+            transform.world_matrix = transform.local_matrix
+
+    def on_update_system(self, ts: float):
+        # Drop the previous inputs of the archetypes that no longer store any transform.
+        for archetype in [archetype for archetype in self.previous_inputs if len(archetype) == 0 or archetype not in self.archetypes]:
+            del self.previous_inputs[archetype]
+
+    def on_update_batch(self, ts, entities: list[Entity], columns: tuple):
+        transforms = columns[0]
+        archetype = transforms.archetype
 
-        if not transform.static:
-            previous_local_matrix = transform.local_matrix
-
-            T = glm.translate(glm.mat4(1.0), glm.vec3(transform.translation.x, transform.translation.y, transform.translation.z))
-            R = glm.quat(glm.vec3(glm.radians(transform.rotation.x), glm.radians(transform.rotation.y), glm.radians(transform.rotation.z)))
-            S = glm.scale(glm.mat4(1.0), glm.vec3(transform.scale.x, transform.scale.y, transform.scale.z))
-            
-            transform.quaternion = R
-            transform.local_matrix = T * glm.mat4(R) * S
-            transform.world_matrix = transform.local_matrix        
-
-            if (np.array_equal(previous_local_matrix, transform.local_matrix)):
-                transform.dirty = False
-            else:
-                transform.dirty = True
+        inputs = np.concatenate((transforms['translation'], transforms['rotation'], transforms['scale']), axis=1)
+        static = transforms['static']
+
+        # After a structural change, only the rows that still hold the same entity line up with the previous update, the appended or moved rows are rebuilt.
+        previous = self.previous_inputs.get(archetype)
+        aligned = None
+        if previous is not None and previous[0] == archetype.version:
+            _, previous_entities, previous_inputs, previous_dirty = previous
         else:
-            transform.dirty = False
\ No newline at end of file
+            previous_entities = list(entities)
+            previous_inputs = np.full_like(inputs, np.nan)
+            previous_dirty = np.zeros(len(entities), dtype=bool)
+            aligned = np.zeros(len(entities), dtype=bool)
+
+            if previous is not None:
+                _, last_entities, last_inputs, last_dirty = previous
+                aligned[:min(len(last_entities), len(entities))] = [last_entity == entity for last_entity, entity in zip(last_entities, entities)]
+                aligned_rows = np.flatnonzero(aligned)
+                previous_inputs[aligned_rows] = last_inputs[aligned_rows]
+                previous_dirty[aligned_rows] = last_dirty[aligned_rows]
+
+        # A transform is dirty when its inputs changed, static transforms are never updated.
+        dirty = np.any(inputs != previous_inputs, axis=1) & ~static
+        previous_inputs[dirty] = inputs[dirty]
+        self.previous_inputs[archetype] = (archetype.version, previous_entities, previous_inputs, dirty)
+
+        rows = np.flatnonzero(dirty)
+        if len(rows) != 0:
+            quaternions = quaternions_from_euler_batch(transforms['rotation'][rows])
+            matrices = trs_batch(transforms['translation'][rows], quaternions, transforms['scale'][rows])
+
+            for row, quaternion, matrix in zip(rows.tolist(), quaternions.tolist(), matrices):
+                transform = transforms.components[row]
+                transform.quaternion = glm.quat(*quaternion)
+                transform.local_matrix = glm.mat4(matrix)
+                transform.world_matrix = transform.local_matrix
+
+            transforms.mark_changed(rows.tolist())
+
+        # Only write the flags that changed since the previous update, and those of the rows that were rebuilt.
+        changed = dirty != previous_dirty
+        if aligned is not None:
+            changed |= ~aligned
+        for row in np.flatnonzero(changed).tolist():
+            transforms.components[row].dirty = bool(dirty[row])
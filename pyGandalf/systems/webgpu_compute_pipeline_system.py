@@ -16,6 +16,7 @@ class WebGPUComputePipelineSystem(System):
     """
     The system responsible for compute pipeline invocations.
     """
+    update_per_frame = True
 
     def on_create_entity(self, entity: Entity, components: Component | tuple[Component]):
         compute = components
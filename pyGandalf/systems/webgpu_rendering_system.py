@@ -1,10 +1,11 @@
-from pyGandalf.systems.system import System, SystemState
+from pyGandalf.systems.system import System
 from pyGandalf.scene.entity import Entity
 from pyGandalf.scene.scene_manager import SceneManager
+from pyGandalf.scene.render_context import RenderContext
 
 from pyGandalf.renderer.webgpu_renderer import WebGPURenderer, RenderPipelineDescription, RenderPassDescription, ColorAttachmentDescription
+from pyGandalf.renderer.render_queue import RenderQueue, RenderPassType, DrawPacket
 from pyGandalf.scene.components import Component, TransformComponent, StaticMeshComponent, MaterialComponent
-from pyGandalf.systems.light_system import LightSystem
 
 from pyGandalf.utilities.webgpu_material_lib import WebGPUMaterialLib, MaterialInstance, CPUBuffer
 from pyGandalf.utilities.webgpu_texture_lib import WebGPUTextureLib, TextureData, TextureDescriptor, TextureInstance
@@ -16,31 +17,20 @@ import glm
 import wgpu
 import numpy as np
 
-import hashlib
-
 class WebGPUStaticMeshRenderingSystem(System):
     """
     The system responsible for rendering static meshes on WebGPU.
     """
+    update_per_frame = True
 
-    def calculate_hash(self, attributes, indices):
-        # Convert numpy arrays to their string representations
-        attributes_str = ",".join([np.array2string(arr) for arr in attributes])
-        indices_str = None if indices is None else np.array2string(indices)
-
-        # Concatenate string representations
-        combined_str = f"{attributes_str}_{indices_str}"
-
-        # Compute hash value
-        hash_value = hashlib.sha256(combined_str.encode()).hexdigest()
-
-        return hash_value
-    
     def on_create_system(self):
-        self.batches: dict[str, dict[str, list]] = {}
+        self.batches: dict[str, dict[tuple, list]] = {}
         self.pre_pass_material = None
         self.pre_pass_render_data = None
-        self.render_pipeline_descriptions: list[RenderPipelineDescription] = []
+        self.render_queue = RenderQueue()
+
+        # The position only meshes of the shadow pass, one per unique mesh, created the first time the mesh casts a shadow.
+        self.shadow_casters: dict[object, StaticMeshComponent] = {}
 
         self.SHADOW_WIDTH = 1024
         self.SHADOW_HEIGHT = 1024
@@ -70,15 +60,17 @@ class WebGPUStaticMeshRenderingSystem(System):
         if len(mesh.attributes) == 0:
             return
         
-        # Create render pipeline and buffers
+        # Create buffers and render pipeline, the pipeline uses the vertex layout of the buffers
+        key = None if mesh.gpu_mesh is None else mesh.gpu_mesh.key
+        WebGPURenderer().create_buffers(mesh)
+        self.release_shadow_caster(key)
         render_pipeline_desc = RenderPipelineDescription()
         render_pipeline_desc.render_data = mesh
         render_pipeline_desc.material_instance = material.instance
         WebGPURenderer().create_render_pipeline(render_pipeline_desc)
-        WebGPURenderer().create_buffers(mesh)
 
-        # Calculate mesh hash
-        mesh.hash = self.calculate_hash(mesh.attributes, mesh.indices)
+        # Meshes with the same geometry and vertex layout share their buffers and are drawn instanced
+        mesh.hash = mesh.gpu_mesh.key
 
         # Categorize meshes based on material and then on mesh hash
         if material.name not in self.batches.keys():
@@ -88,14 +80,38 @@ class WebGPUStaticMeshRenderingSystem(System):
         
         self.batches[material.name][mesh.hash].append(components)
 
+    def remove_entity_components(self, entity, component):
+        index = self.entity_indices.get(entity.index)
+        components = self.filtered_components[index] if index is not None and self.filtered_entities[index] == entity else None
+
+        removed = super().remove_entity_components(entity, component)
+
+        if removed and components is not None:
+            mesh, material, _ = components
+            key = None if mesh.gpu_mesh is None else mesh.gpu_mesh.key
+
+            batch = self.batches.get(material.name, {}).get(mesh.hash)
+            if batch is not None:
+                batch[:] = [batch_components for batch_components in batch if batch_components is not components]
+                if len(batch) == 0:
+                    del self.batches[material.name][mesh.hash]
+
+            # The buffers of the mesh are destroyed along with its last user, and so are the buffers of its shadow caster.
+            WebGPURenderer().release_buffers(mesh)
+            self.release_shadow_caster(key)
+
+        return removed
+
     def on_update_system(self, ts):
-        if WebGPURenderer().get_shadows_enabled():
-            if self.pre_pass_material == None:
-                self.pre_pass_material = MaterialComponent('M_DepthPrePass')
-                self.pre_pass_material.instance = WebGPUMaterialLib().get('M_DepthPrePass')
+        shadows_enabled = WebGPURenderer().get_shadows_enabled()
+
+        if shadows_enabled and self.pre_pass_material == None:
+            self.pre_pass_material = MaterialComponent('M_DepthPrePass')
+            self.pre_pass_material.instance = WebGPUMaterialLib().get('M_DepthPrePass')
 
-            self.render_pipeline_descriptions.clear()
+        self.submit_draws(shadows_enabled)
 
+        if shadows_enabled:
             shadow_pass_color_attachment: ColorAttachmentDescription = ColorAttachmentDescription()
             shadow_pass_color_attachment.resolve_target = None
             shadow_pass_color_attachment.view = WebGPUTextureLib().get_instance('gfx_texture').view
@@ -105,46 +121,22 @@ class WebGPUStaticMeshRenderingSystem(System):
             shadow_pass_desc.depth_texture_view = WebGPUTextureLib().get_instance('depth_texture').view
 
             WebGPURenderer().begin_render_pass(shadow_pass_desc)
-            for material in self.batches.keys():
-                current_batch = self.batches[material]
-                material_instance = WebGPUMaterialLib().get(material)
-
-                if material_instance.descriptor.cast_shadows == False:
-                    continue
-
-                self.set_prepass_uniforms(self.pre_pass_material.instance, current_batch.values())
-
-                first_instance = 0
-
-                for mesh_hash in current_batch.keys():
-                    current_mesh_group = current_batch[mesh_hash]
-
-                    mesh_group_size = len(current_mesh_group)
-
-                    mesh, _, _ = current_mesh_group[0]
-
-                    self.render_pipeline_descriptions.append(RenderPipelineDescription())
-                    self.render_pipeline_descriptions[-1].render_data = StaticMeshComponent('shadow_render_data', [mesh.attributes[0]], mesh.indices)
-                    self.render_pipeline_descriptions[-1].material_instance = self.pre_pass_material.instance
-                    WebGPURenderer().create_render_pipeline(self.render_pipeline_descriptions[-1])
-                    WebGPURenderer().create_buffers(self.render_pipeline_descriptions[-1].render_data)
-
-                    WebGPURenderer().set_pipeline(self.render_pipeline_descriptions[-1].render_data)
-                    WebGPURenderer().set_buffers(self.render_pipeline_descriptions[-1].render_data)
-                    WebGPURenderer().set_bind_groups(self.pre_pass_material)
-
-                    if mesh_group_size == 1:
-                        if (mesh.indices is None):
-                            WebGPURenderer().draw(self.render_pipeline_descriptions[-1].render_data, 1, first_instance)
-                        else:
-                            WebGPURenderer().draw_indexed(self.render_pipeline_descriptions[-1].render_data, 1, first_instance)
-                        first_instance += 1
-                    else:
-                        if (mesh.indices is None):
-                            WebGPURenderer().draw(self.render_pipeline_descriptions[-1].render_data, mesh_group_size)
-                        else:
-                            WebGPURenderer().draw_indexed(self.render_pipeline_descriptions[-1].render_data, mesh_group_size)
-                        first_instance = 0
+
+            # All the shadow casters share the pre-pass material, their model matrices are laid out in draw order.
+            packets = self.render_queue.get_packets(RenderPassType.SHADOW)
+            self.set_prepass_uniforms(self.pre_pass_material.instance, packets)
+
+            for first_instance, instance_count, mesh, _ in self.get_instance_runs(packets):
+                shadow_caster = self.get_shadow_caster(mesh)
+
+                WebGPURenderer().set_pipeline(shadow_caster)
+                WebGPURenderer().set_buffers(shadow_caster)
+                WebGPURenderer().set_bind_groups(self.pre_pass_material)
+
+                if (mesh.indices is None):
+                    WebGPURenderer().draw(shadow_caster, instance_count, first_instance)
+                else:
+                    WebGPURenderer().draw_indexed(shadow_caster, instance_count, first_instance)
             WebGPURenderer().end_render_pass()
 
         color_attachment: ColorAttachmentDescription = ColorAttachmentDescription()
@@ -155,94 +147,178 @@ class WebGPUStaticMeshRenderingSystem(System):
         base_pass_desc.color_attachments.append(color_attachment)
 
         WebGPURenderer().begin_render_pass(base_pass_desc)
-        for material in self.batches.keys():
-            current_batch = self.batches[material]
-            material_instance = WebGPUMaterialLib().get(material)
-            # WebGPURenderer().set_pipeline(material_instance)
+
+        # The model matrices of each material are laid out in draw order, so that every run of the same mesh is one instanced draw.
+        packets = self.render_queue.get_packets(RenderPassType.COLOR)
+
+        packets_per_material: dict[str, list[DrawPacket]] = {}
+        for packet in packets:
+            packets_per_material.setdefault(packet.material.name, []).append(packet)
+
+        for material_packets in packets_per_material.values():
+            self.set_uniforms(material_packets[0].material.instance, material_packets)
+
+        for first_instance, instance_count, mesh, material in self.get_instance_runs(packets):
+            WebGPURenderer().set_pipeline(mesh)
+            WebGPURenderer().set_buffers(mesh)
+            WebGPURenderer().set_bind_groups(material)
+
+            if (mesh.indices is None):
+                WebGPURenderer().draw(mesh, instance_count, first_instance)
+            else:
+                WebGPURenderer().draw_indexed(mesh, instance_count, first_instance)
+        WebGPURenderer().end_render_pass()
+
+    def get_shadow_caster(self, mesh: StaticMeshComponent) -> StaticMeshComponent:
+        """Returns the position only mesh that the given mesh is drawn with in the shadow pass, creating its buffers and render pipeline the first time.
+        The meshes with the same geometry share the same shadow caster, and the shadow casters with the same vertex layout share the same depth pipeline.
+
+        Args:
+            mesh (StaticMeshComponent): The mesh that casts the shadow.
+
+        Returns:
+            StaticMeshComponent: The shadow caster of the mesh.
+        """
+        key = mesh.gpu_mesh.key
+        shadow_caster = self.shadow_casters.get(key)
+        if shadow_caster is None:
+            shadow_caster = StaticMeshComponent('shadow_render_data', [mesh.attributes[0]], mesh.indices, mesh.layout_descriptor)
+            WebGPURenderer().create_buffers(shadow_caster)
+
+            render_pipeline_desc = RenderPipelineDescription()
+            render_pipeline_desc.render_data = shadow_caster
+            render_pipeline_desc.material_instance = self.pre_pass_material.instance
+            WebGPURenderer().create_render_pipeline(render_pipeline_desc)
+
+            self.shadow_casters[key] = shadow_caster
+
+        return shadow_caster
+
+    def release_shadow_caster(self, key):
+        """Releases the shadow caster of the geometry with the given key, if no mesh uses that geometry anymore.
+
+        Args:
+            key (Any): The identity of the geometry, or None.
+        """
+        if key is None or key in WebGPURenderer().mesh_cache:
+            return
+
+        shadow_caster = self.shadow_casters.pop(key, None)
+        if shadow_caster is not None:
+            WebGPURenderer().release_buffers(shadow_caster)
+
+    def submit_draws(self, shadows_enabled: bool):
+        """Submits the draws of the shadow and color passes to the render queue, so that they are executed grouped by state and ordered by depth.
+
+        Args:
+            shadows_enabled (bool): Whether the draws of the shadow pass are submitted.
+        """
+        self.render_queue.clear()
+
+        # In fixed timestep mode, objects are drawn between their last two simulation steps.
+        alpha = SceneManager().get_active_scene().interpolation_alpha
+
+        context = RenderContext().get()
+        camera_position = None if context.camera == None else glm.vec3(glm.inverse(context.view)[3])
+        far = 0.0 if context.camera == None else context.camera.far
+
+        for material_name, current_batch in self.batches.items():
+            material_instance = WebGPUMaterialLib().get(material_name)
 
             if material_instance == None:
                 continue
 
-            self.set_uniforms(material_instance, current_batch.values())
+            transparent = material_instance.descriptor.transparent
 
-            first_instance = 0
+            for mesh_hash, current_mesh_group in current_batch.items():
+                for mesh, material, transform in current_mesh_group:
+                    model = transform.get_interpolated_world_matrix(alpha)
+                    depth = self.render_queue.depth_of(glm.vec3(model[3]), camera_position, far)
 
-            for mesh_hash in current_batch.keys():
-                current_mesh_group = current_batch[mesh_hash]
+                    if shadows_enabled and material_instance.descriptor.cast_shadows:
+                        self.render_queue.submit(RenderPassType.SHADOW, mesh, self.pre_pass_material, transform, model, self.pre_pass_material.instance.shader_module, depth, mesh=mesh_hash)
 
-                mesh_group_size = len(current_mesh_group)
+                    self.render_queue.submit(RenderPassType.COLOR, mesh, material, transform, model, material_instance.shader_module, depth, transparent, mesh=mesh_hash)
 
-                mesh, material, _ = current_mesh_group[0]
+    def get_instance_runs(self, packets: list[DrawPacket]) -> list[tuple]:
+        """Splits the given draw packets into runs of consecutive packets that draw the same mesh with the same material, each run is drawn with a single instanced draw.
+        The instances of each material are numbered in draw order, the same order that their model matrices are laid out in.
 
-                # if there is nothing to render, continue
-                if len(mesh.attributes) == 0:
-                    return
+        Args:
+            packets (list[DrawPacket]): The draw packets in sort key order.
 
-                WebGPURenderer().set_pipeline(mesh)
-                WebGPURenderer().set_buffers(mesh)
-                WebGPURenderer().set_bind_groups(material)
+        Returns:
+            list[tuple]: The first instance, the instance count, the mesh and the material of every run.
+        """
+        runs = []
+        instance_counts: dict[str, int] = {}
+        previous: DrawPacket = None
 
-                if mesh_group_size == 1:
-                    if (mesh.indices is None):
-                        WebGPURenderer().draw(mesh, 1, first_instance)
-                    else:
-                        WebGPURenderer().draw_indexed(mesh, 1, first_instance)
-                    first_instance += 1
-                else:
-                    if (mesh.indices is None):
-                        WebGPURenderer().draw(mesh, mesh_group_size)
-                    else:
-                        WebGPURenderer().draw_indexed(mesh, mesh_group_size)
-                    first_instance = 0
-        WebGPURenderer().end_render_pass()
+        for packet in packets:
+            instance = instance_counts.get(packet.material.name, 0)
+            instance_counts[packet.material.name] = instance + 1
+
+            if previous is not None and previous.material.name == packet.material.name and previous.render_data.hash == packet.render_data.hash:
+                first_instance, instance_count, mesh, material = runs[-1]
+                runs[-1] = (first_instance, instance_count + 1, mesh, material)
+            else:
+                runs.append((instance, 1, packet.render_data, packet.material))
+
+            previous = packet
+
+        return runs
     
-    def set_prepass_uniforms(self, material_instance: MaterialInstance, meshes):
-        light_system: LightSystem = SceneManager().get_active_scene().get_system(LightSystem)
-        
-        if light_system is not None:
-            if light_system.get_state() != SystemState.PAUSE:
-                for components in light_system.get_filtered_components():
-                    light, transform = components
-
-                    if material_instance.has_uniform('u_UniformData'):
-                        camera = SceneManager().get_main_camera()
-                        if camera != None:
-                            light_projection = glm.transpose(glm.perspectiveLH(glm.radians(camera.fov), camera.aspect_ratio, camera.near, camera.far))
-                            light_view = glm.transpose(glm.lookAtLH(transform.get_world_position(), glm.vec3(0.0), glm.vec3(0.0, 1.0, 0.0)))
-                            uniform_data = material_instance.get_cpu_buffer_type('u_UniformData')
-                            if uniform_data.has_member("lightSpaceMatrix"):
-                                uniform_data["lightSpaceMatrix"] = np.asarray(light_projection * light_view)
-                    break
-        
-        storage_data = material_instance.get_cpu_buffer_type('u_ModelData')
+    def set_instance_data(self, material_instance: MaterialInstance, packets: list[DrawPacket]):
+        """Fills the instance buffer of the given material with the model matrices of the given draw packets, in draw order, and uploads the instances that changed.
+
+        Args:
+            material_instance (MaterialInstance): The material that the packets are drawn with.
+            packets (list[DrawPacket]): The draw packets of the material in sort key order.
+        """
+        count = len(packets)
+        instance_data = material_instance.get_instance_buffer('u_ModelData', count)
+
+        if instance_data == None or count == 0:
+            return
+
+        # The memory of a matrix is column major, the layout of a WGSL matrix, so NumPy reads it as its transpose.
+        models = np.frombuffer(b''.join([packet.model.to_bytes() for packet in packets]), dtype=np.float32).reshape(count, 4, 4)
+
+        if instance_data.has_member('modelMatrix'):
+            instance_data['modelMatrix'] = models
 
-        if storage_data != None:
-            if storage_data.has_member('modelMatrix'):
-                object_data = np.zeros((512, 4, 4))
+        if instance_data.has_member('inverseModelMatrix'):
+            try:
+                instance_data['inverseModelMatrix'] = np.linalg.inv(models)
+            except np.linalg.LinAlgError:
+                instance_data['inverseModelMatrix'] = np.linalg.pinv(models)
 
-                i = 0
-                for mesh in meshes:
-                    for components in mesh:
-                        _, _, transform = components
-                        object_data[i] = glm.transpose(transform.world_matrix)
-                        i += 1
+        material_instance.set_instance_buffer('u_ModelData')
 
-                storage_data["modelMatrix"] = np.ascontiguousarray(object_data)
-            material_instance.set_storage_buffer('u_ModelData', storage_data)
+    def set_prepass_uniforms(self, material_instance: MaterialInstance, packets: list[DrawPacket]):
+        context = RenderContext().get()
+
+        if context.light_space_matrix_lh is not None:
+            if material_instance.has_uniform('u_UniformData'):
+                uniform_data = material_instance.get_cpu_buffer_type('u_UniformData')
+                if uniform_data.has_member("lightSpaceMatrix"):
+                    uniform_data["lightSpaceMatrix"] = context.light_space_matrix_lh
+        
+        self.set_instance_data(material_instance, packets)
+
+    def set_uniforms(self, material_instance: MaterialInstance, packets: list[DrawPacket]):
+        context = RenderContext().get()
 
-    def set_uniforms(self, material_instance: MaterialInstance, meshes):
         if material_instance.has_uniform('u_UniformData'):
             uniform_data = material_instance.get_cpu_buffer_type('u_UniformData')
 
-            from pyGandalf.scene.scene_manager import SceneManager
-            camera = SceneManager().get_main_camera()
-            if camera != None:
+            if context.camera != None:
                 if uniform_data.has_member("viewMatrix"):
-                    uniform_data["viewMatrix"] = np.asarray(glm.transpose(camera.view))
+                    uniform_data["viewMatrix"] = context.view_t
                 if uniform_data.has_member("projectionMatrix"):
-                    uniform_data["projectionMatrix"] = np.asarray(glm.transpose(glm.perspectiveLH(glm.radians(camera.fov), camera.aspect_ratio, camera.near, camera.far)))
+                    uniform_data["projectionMatrix"] = context.projection_lh
                 if uniform_data.has_member("viewProjection"):
-                    uniform_data["viewProjection"] = np.asarray(glm.transpose(glm.perspectiveLH(glm.radians(camera.fov), camera.aspect_ratio, camera.near, camera.far) * glm.mat4(glm.mat3(camera.view))))
+                    uniform_data["viewProjection"] = context.skybox_view_projection_lh
             else:
                 if uniform_data.has_member("viewMatrix"):
                     uniform_data["viewMatrix"] = np.identity(4)
@@ -255,99 +331,32 @@ class WebGPUStaticMeshRenderingSystem(System):
                 uniform_data["objectColor"] = np.asarray(material_instance.data.color)
 
             if uniform_data.has_member("viewPosition"):
-                camera_entity = SceneManager().get_main_camera_entity()
-                if camera_entity != None:
-                    camera_transform = SceneManager().get_active_scene().get_component(camera_entity, TransformComponent)
-                    if camera_transform != None:
-                        uniform_data["viewPosition"] = np.asarray(glm.vec4(camera_transform.get_world_position(), 1.0))
-
-            light_system: LightSystem = SceneManager().get_active_scene().get_system(LightSystem)
-
-            light_positions: list[glm.vec4] = []
-            light_colors: list[glm.vec4] = []
-            light_intensities: list[glm.vec4] = []
-            
-            if light_system is not None:
-                if light_system.get_state() != SystemState.PAUSE:
-                    for components in light_system.get_filtered_components():
-                        light, transform = components
-                        light_colors.append(glm.vec4(light.color, 1.0))
-                        light_positions.append(glm.vec4(transform.get_world_position(), 1.0))
-                        light_intensities.append(glm.vec4(light.intensity, 1.0, 1.0, 1.0))
-
-                        # NOTE: Only works with one light, adding more will keep the last.
-                        if material_instance.has_uniform('u_UniformData'):
-                            from pyGandalf.scene.scene_manager import SceneManager
-                            camera = SceneManager().get_main_camera()
-                            if camera != None:
-                                light_projection = glm.transpose(glm.perspectiveLH(glm.radians(camera.fov), camera.aspect_ratio, camera.near, camera.far))
-                                light_view = glm.transpose(glm.lookAtLH(transform.get_world_position(), glm.vec3(0.0), glm.vec3(0.0, 1.0, 0.0)))
-                                uniform_data = material_instance.get_cpu_buffer_type('u_UniformData')
-                                if uniform_data.has_member("lightSpaceMatrix"):
-                                    uniform_data["lightSpaceMatrix"] = np.asarray(light_projection * light_view)
-
-            count = len(light_positions)
+                if context.camera_position != None:
+                    uniform_data["viewPosition"] = np.asarray(glm.vec4(context.camera_position, 1.0))
+
+            # NOTE: Only works with one light, the shadows are cast by the first.
+            if context.light_space_matrix_lh is not None:
+                if uniform_data.has_member("lightSpaceMatrix"):
+                    uniform_data["lightSpaceMatrix"] = context.light_space_matrix_lh
+
+            count = context.light_count
 
             assert count <= 4, f"Maximum supported lights for WebGPU backend are 4, but {count} are defined"
 
             if count != 0:
                 if uniform_data.has_member("lightPositions"):
-                    uniform_data["lightPositions"] = np.ascontiguousarray(light_positions)
+                    uniform_data["lightPositions"] = context.light_positions_vec4
                 if uniform_data.has_member("lightColors"):
-                    uniform_data["lightColors"] = np.ascontiguousarray(light_colors)
+                    uniform_data["lightColors"] = context.light_colors_vec4
                 if uniform_data.has_member("lightIntensities"):
-                    uniform_data["lightIntensities"] = np.ascontiguousarray(light_intensities)
+                    uniform_data["lightIntensities"] = context.light_intensities_vec4
                 if uniform_data.has_member("lightCount"):
                     uniform_data["lightCount"] = np.float32(count)
 
             material_instance.set_uniform_buffer('u_UniformData', uniform_data)
 
-        storage_data = material_instance.get_cpu_buffer_type('u_ModelData')
-
-        if storage_data != None:
-            if storage_data.has_member('modelMatrix'):
-                object_data = np.zeros((512, 4, 4))
-
-                i = 0
-                for mesh in meshes:
-                    for components in mesh:
-                        _, _, transform = components
-                        object_data[i] = glm.transpose(transform.world_matrix)
-                        i += 1
-
-                storage_data["modelMatrix"] = np.ascontiguousarray(object_data)
-
-            if storage_data.has_member('inverseModelMatrix'):
-                object_data = np.zeros((512, 4, 4))
-
-                i = 0
-                for mesh in meshes:
-                    for components in mesh:
-                        _, _, transform = components
-                        object_data[i] = glm.transpose(glm.inverse(transform.world_matrix))
-                        i += 1
-
-                storage_data["inverseModelMatrix"] = np.ascontiguousarray(object_data)
-
-            material_instance.set_storage_buffer('u_ModelData', storage_data)
-
-        if material_instance.has_uniform('u_AlbedoMap'):
-            material_instance.set_uniform('u_AlbedoMap')
-
-        if material_instance.has_uniform('u_NormalMap'):
-            material_instance.set_uniform('u_NormalMap')
-        
-        if material_instance.has_uniform('u_MetallicMap'):
-            material_instance.set_uniform('u_MetallicMap')
-
-        if material_instance.has_uniform('u_RoughnessMap'):
-            material_instance.set_uniform('u_RoughnessMap')
-        
-        if material_instance.has_uniform('u_DisplacementMap'):
-            material_instance.set_uniform('u_DisplacementMap')
-
-        if material_instance.has_uniform('u_ShadowSampler'):
-            material_instance.set_uniform('u_ShadowSampler')
+        self.set_instance_data(material_instance, packets)
 
-        if material_instance.has_uniform('u_Sampler'):
-            material_instance.set_uniform('u_Sampler')
+        # The textures are resident, only the ones whose data was marked as dirty are uploaded again.
+        for uniform_name in material_instance.other_uniforms.keys():
+            material_instance.set_uniform(uniform_name)
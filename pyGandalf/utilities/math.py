@@ -489,3 +489,58 @@ def quaternion_slerp(q0, q1, fraction):
 
     return   q0*math.cos(theta) + q2*math.sin(theta)
 
+
+
+# batched transform functions ----------------------------------------------------
+def quaternions_from_euler_batch(degrees):
+    """Create N quaternions out of N euler angles (x, y, z) in degrees, with the same convention as glm.quat(glm.vec3)
+
+    :param degrees: euler angles in degrees
+    :type degrees: numpy array of shape (N, 3)
+    :return: the quaternions as (w, x, y, z)
+    :rtype: numpy array of shape (N, 4)
+    """
+    half = np.radians(degrees) * 0.5
+    c, s = np.cos(half), np.sin(half)
+    cx, cy, cz = c[:, 0], c[:, 1], c[:, 2]
+    sx, sy, sz = s[:, 0], s[:, 1], s[:, 2]
+
+    quaternions = np.empty((len(degrees), 4), dtype=np.float32)
+    quaternions[:, 0] = cx * cy * cz + sx * sy * sz
+    quaternions[:, 1] = sx * cy * cz - cx * sy * sz
+    quaternions[:, 2] = cx * sy * cz + sx * cy * sz
+    quaternions[:, 3] = cx * cy * sz - sx * sy * cz
+    return quaternions
+
+def trs_batch(translations, quaternions, scales):
+    """Compose N translation * rotation * scale matrices at once. The matrices are indexed as matrices[n, row, column],
+    which is the order numpy.array(glm.mat4) returns and glm.mat4(numpy array) expects.
+
+    :param translations: translations
+    :type translations: numpy array of shape (N, 3)
+    :param quaternions: unit quaternions as (w, x, y, z)
+    :type quaternions: numpy array of shape (N, 4)
+    :param scales: scales
+    :type scales: numpy array of shape (N, 3)
+    :return: the composed matrices
+    :rtype: numpy array of shape (N, 4, 4)
+    """
+    w, x, y, z = quaternions[:, 0], quaternions[:, 1], quaternions[:, 2], quaternions[:, 3]
+    xx, yy, zz = x * x, y * y, z * z
+    xy, xz, yz = x * y, x * z, y * z
+    wx, wy, wz = w * x, w * y, w * z
+
+    matrices = np.zeros((len(quaternions), 4, 4), dtype=np.float32)
+    matrices[:, 0, 0] = 1.0 - 2.0 * (yy + zz)
+    matrices[:, 1, 0] = 2.0 * (xy + wz)
+    matrices[:, 2, 0] = 2.0 * (xz - wy)
+    matrices[:, 0, 1] = 2.0 * (xy - wz)
+    matrices[:, 1, 1] = 1.0 - 2.0 * (xx + zz)
+    matrices[:, 2, 1] = 2.0 * (yz + wx)
+    matrices[:, 0, 2] = 2.0 * (xz + wy)
+    matrices[:, 1, 2] = 2.0 * (yz - wx)
+    matrices[:, 2, 2] = 1.0 - 2.0 * (xx + yy)
+    matrices[:, :3, :3] *= scales[:, np.newaxis, :]
+    matrices[:, :3, 3] = translations
+    matrices[:, 3, 3] = 1.0
+    return matrices
@@ -0,0 +1,72 @@
+from pyGandalf.utilities.mesh_lib import MeshLib
+
+import numpy as np
+
+import hashlib
+import weakref
+
+class MeshRegistry(object):
+    """Gives every mesh an identity, so that the meshes with the same geometry can share their buffers and be drawn together.
+    Meshes loaded through the MeshLib are identified by their file, other meshes by the digests of their arrays. The digest of an array is computed once over its raw bytes
+    and memoised for as long as the array object lives, so meshes that share the same arrays are never hashed again. Arrays are assumed not to change after they are registered.
+    """
+    def __new__(cls):
+        if not hasattr(cls, 'instance'):
+            cls.instance = super(MeshRegistry, cls).__new__(cls)
+            cls.instance.array_digests: dict[int, tuple[weakref.ref, str]] = {} # type: ignore
+        return cls.instance
+
+    def get_array_id(cls, array) -> str:
+        """Returns the digest of the given array, computing it only the first time that the array object is seen.
+
+        Args:
+            array (np.ndarray | None): The array.
+
+        Returns:
+            str: The digest of the type, shape and contents of the array.
+        """
+        if array is None:
+            return 'None'
+
+        if not isinstance(array, np.ndarray):
+            return cls.instance.calculate_digest(np.asarray(array))
+
+        key = id(array)
+        entry = cls.instance.array_digests.get(key)
+        if entry is not None and entry[0]() is array:
+            return entry[1]
+
+        digest = cls.instance.calculate_digest(array)
+
+        # The digest is forgotten along with the array, so that its id can be reused safely.
+        reference = weakref.ref(array, lambda _, key=key: cls.instance.array_digests.pop(key, None))
+        cls.instance.array_digests[key] = (reference, digest)
+        return digest
+
+    def calculate_digest(cls, array: np.ndarray) -> str:
+        array = np.ascontiguousarray(array)
+
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(f'{array.dtype.str}{array.shape}'.encode())
+        digest.update(memoryview(array).cast('B'))
+        return digest.hexdigest()
+
+    def get_mesh_id(cls, render_data) -> tuple:
+        """Returns the identity of the geometry of the given mesh.
+
+        Args:
+            render_data (StaticMeshComponent): The mesh.
+
+        Returns:
+            tuple: The file that the mesh was loaded from, or the digests of its attributes and indices.
+        """
+        if render_data.load_from_file:
+            filename = MeshLib().meshes_names.get(render_data.name)
+            if filename is not None:
+                return ('file', filename)
+
+        attributes = tuple(cls.instance.get_array_id(attribute) for attribute in render_data.attributes)
+        return ('data', attributes, cls.instance.get_array_id(render_data.indices))
+
+    def clear(cls):
+        cls.instance.array_digests.clear()
@@ -1,21 +1,110 @@
-from pyGandalf.utilities.opengl_shader_lib import OpenGLShaderLib
+from pyGandalf.utilities.opengl_shader_lib import OpenGLShaderLib, UniformBuffer, MATERIAL_UNIFORM_BLOCK
 from pyGandalf.utilities.logger import logger
 
 import glm
 import numpy as np
 import OpenGL.GL as gl
 
-import re
 from dataclasses import dataclass
 
+# The per-instance vertex attributes that instanced shaders declare, in the order they are laid out in the instance buffer.
+INSTANCE_ATTRIBUTES = ('a_Model', 'a_NormalMatrix')
+
+# The setter and the expected data type of a single uniform, by its GL type.
+UNIFORM_SETTERS = {
+    gl.GL_FLOAT: (lambda location, data: gl.glUniform1f(location, data), float),
+    gl.GL_INT: (lambda location, data: gl.glUniform1i(location, data), int),
+    gl.GL_BOOL: (lambda location, data: gl.glUniform1i(location, data), int),
+    gl.GL_SAMPLER_2D: (lambda location, data: gl.glUniform1i(location, data), int),
+    gl.GL_SAMPLER_2D_SHADOW: (lambda location, data: gl.glUniform1i(location, data), int),
+    gl.GL_SAMPLER_2D_ARRAY: (lambda location, data: gl.glUniform1i(location, data), int),
+    gl.GL_SAMPLER_3D: (lambda location, data: gl.glUniform1i(location, data), int),
+    gl.GL_SAMPLER_CUBE: (lambda location, data: gl.glUniform1i(location, data), int),
+    gl.GL_FLOAT_VEC2: (lambda location, data: gl.glUniform2f(location, data.x, data.y), glm.vec2),
+    gl.GL_FLOAT_VEC3: (lambda location, data: gl.glUniform3f(location, data.x, data.y, data.z), glm.vec3),
+    gl.GL_FLOAT_VEC4: (lambda location, data: gl.glUniform4f(location, data.x, data.y, data.z, data.w), glm.vec4),
+    gl.GL_INT_VEC2: (lambda location, data: gl.glUniform2i(location, data.x, data.y), glm.ivec2),
+    gl.GL_INT_VEC3: (lambda location, data: gl.glUniform3i(location, data.x, data.y, data.z), glm.ivec3),
+    gl.GL_INT_VEC4: (lambda location, data: gl.glUniform4i(location, data.x, data.y, data.z, data.w), glm.ivec4),
+    gl.GL_UNSIGNED_INT_VEC2: (lambda location, data: gl.glUniform2ui(location, data.x, data.y), glm.uvec2),
+    gl.GL_UNSIGNED_INT_VEC3: (lambda location, data: gl.glUniform3ui(location, data.x, data.y, data.z), glm.uvec3),
+    gl.GL_UNSIGNED_INT_VEC4: (lambda location, data: gl.glUniform4ui(location, data.x, data.y, data.z, data.w), glm.uvec4),
+    gl.GL_DOUBLE_VEC2: (lambda location, data: gl.glUniform2d(location, data.x, data.y), glm.dvec2),
+    gl.GL_DOUBLE_VEC3: (lambda location, data: gl.glUniform3d(location, data.x, data.y, data.z), glm.dvec3),
+    gl.GL_DOUBLE_VEC4: (lambda location, data: gl.glUniform4d(location, data.x, data.y, data.z, data.w), glm.dvec4),
+    gl.GL_FLOAT_MAT2: (lambda location, data: gl.glUniformMatrix2fv(location, 1, gl.GL_FALSE, glm.value_ptr(data)), glm.mat2),
+    gl.GL_FLOAT_MAT3: (lambda location, data: gl.glUniformMatrix3fv(location, 1, gl.GL_FALSE, glm.value_ptr(data)), glm.mat3),
+    gl.GL_FLOAT_MAT4: (lambda location, data: gl.glUniformMatrix4fv(location, 1, gl.GL_FALSE, glm.value_ptr(data)), glm.mat4),
+}
+
+# The setter and the expected element type of an array uniform, by its GL type.
+UNIFORM_ARRAY_SETTERS = {
+    gl.GL_FLOAT: (lambda location, data: gl.glUniform1fv(location, len(data), data), np.float32),
+    gl.GL_INT: (lambda location, data: gl.glUniform1iv(location, len(data), data), np.int32),
+    gl.GL_SAMPLER_2D: (lambda location, data: gl.glUniform1iv(location, len(data), data), np.int32),
+    gl.GL_FLOAT_VEC2: (lambda location, data: gl.glUniform2fv(location, len(data), data.ptr), glm.vec2),
+    gl.GL_FLOAT_VEC3: (lambda location, data: gl.glUniform3fv(location, len(data), data.ptr), glm.vec3),
+    gl.GL_FLOAT_VEC4: (lambda location, data: gl.glUniform4fv(location, len(data), data.ptr), glm.vec4),
+    gl.GL_FLOAT_MAT2: (lambda location, data: gl.glUniformMatrix2fv(location, len(data), gl.GL_FALSE, data.ptr), glm.mat2),
+    gl.GL_FLOAT_MAT3: (lambda location, data: gl.glUniformMatrix3fv(location, len(data), gl.GL_FALSE, data.ptr), glm.mat3),
+    gl.GL_FLOAT_MAT4: (lambda location, data: gl.glUniformMatrix4fv(location, len(data), gl.GL_FALSE, data.ptr), glm.mat4),
+}
+
+def uniform_value_key(uniform_data):
+    """Returns a snapshot of the provided uniform data that can be compared with the data of the previous upload.
+    Vectors, matrices and arrays are copied to bytes, so that modifying them in place is still detected.
+
+    Args:
+        uniform_data (Any): The uniform data.
+
+    Returns:
+        Any: The snapshot of the uniform data.
+    """
+    if isinstance(uniform_data, (int, float)):
+        return uniform_data
+    if isinstance(uniform_data, np.ndarray):
+        return uniform_data.tobytes()
+    return bytes(uniform_data)
+
 class MaterialInstance:
-    def __init__(self, name, data, descriptor, shader_program, shader_params = []):
+    def __init__(self, name, data, descriptor, shader_program, shader_params = [], uniforms: dict = {}, uniform_values: dict = None, attributes: dict = {}, uniform_blocks: dict = {}):
         self.name = name
         self.data = data
         self.descriptor = descriptor
         self.shader_program = shader_program
         self.shader_params = shader_params
 
+        # The values last uploaded to the shader program, shared by all the materials of the program.
+        self.uniform_values: dict[int, object] = uniform_values if uniform_values is not None else {}
+
+        # The location, setter, expected type and array size of every active uniform, resolved once.
+        self.uniforms: dict[str, tuple] = {}
+        for uniform_name, (location, uniform_type, size) in uniforms.items():
+            setter, expected_type = (UNIFORM_SETTERS if size == 1 else UNIFORM_ARRAY_SETTERS).get(uniform_type, (None, None))
+            if setter is not None:
+                self.uniforms[uniform_name] = (location, setter, expected_type, size)
+
+        # The locations of the per-instance attributes, a shader that reads its model matrix from an attribute is drawn instanced.
+        self.instance_attributes: dict[str, int] = { attribute_name: attributes[attribute_name][0] for attribute_name in INSTANCE_ATTRIBUTES if attribute_name in attributes }
+
+        # The uniform buffer of the material block of the shader, if it declares one, holds the uniforms of the material instead of the program.
+        self.uniform_buffer: UniformBuffer = None
+        if MATERIAL_UNIFORM_BLOCK in uniform_blocks:
+            self.uniform_buffer = UniformBuffer(MATERIAL_UNIFORM_BLOCK, uniform_blocks[MATERIAL_UNIFORM_BLOCK], OpenGLShaderLib().get_uniform_block_binding(MATERIAL_UNIFORM_BLOCK))
+
+            # Starts from the values of the material data, as the buffer is zero filled.
+            for uniform_name, uniform_data in (('u_Color', data.color.rgb), ('u_Glossiness', data.glossiness)):
+                if self.uniform_buffer.has_member(uniform_name):
+                    self.uniform_buffer.set(uniform_name, uniform_data)
+
+    def is_instanced(self) -> bool:
+        """Returns True if the shader of the material reads the model matrix from a per-instance attribute, otherwise False.
+
+        Returns:
+            bool: True if the material can be drawn instanced, otherwise False.
+        """
+        return 'a_Model' in self.instance_attributes
+
     def has_uniform(self, uniform_name: str) -> bool:
         """Returns True if the material has the uniform with the given name, otherwise False.
 
@@ -25,20 +114,38 @@ class MaterialInstance:
         Returns:
             bool: True if the material has the uniform with the given name, otherwise False.
         """
-        return gl.glGetUniformLocation(self.shader_program, uniform_name) != -1
+        return uniform_name in self.uniforms or (self.uniform_buffer is not None and self.uniform_buffer.has_member(uniform_name))
 
     def set_uniform(self, uniform_name: str, uniform_data):
         """Stes the uniform with the provided name (if valid), with the provided data.
+        Nothing is uploaded if the uniform already holds the same data since the last upload to the shader program.
+        Uniforms of the material block are written to the uniform buffer of the material, which is uploaded by upload_uniform_buffer().
 
         Args:
             uniform_name (str): The name of the uniform to set.
             uniform_data (Any): The new data for the unform.
         """
-        uniform_location = gl.glGetUniformLocation(self.shader_program, uniform_name)
-        if uniform_location != -1:
-            self.update_uniform(uniform_location, uniform_name, uniform_data)
-        else:
-            self.uniform_not_found(uniform_name)
+        uniform = self.uniforms.get(uniform_name)
+        if uniform == None:
+            if self.uniform_buffer is not None and self.uniform_buffer.has_member(uniform_name):
+                self.uniform_buffer.set(uniform_name, uniform_data)
+            else:
+                self.uniform_not_found(uniform_name)
+            return
+
+        location = uniform[0]
+        value = uniform_value_key(uniform_data)
+        if self.uniform_values.get(location) == value:
+            return
+
+        self.update_uniform(location, uniform_name, uniform_data)
+        self.uniform_values[location] = value
+
+    def upload_uniform_buffer(self):
+        """Uploads the uniform buffer of the material, if it has one and its contents changed since the last upload.
+        """
+        if self.uniform_buffer is not None:
+            self.uniform_buffer.upload()
 
     def update_uniform(self, uniform_location: int, uniform_name: str, uniform_data):
         """Updates the uniform at specfied location and the given name with the given data.
@@ -48,141 +155,12 @@ class MaterialInstance:
             uniform_name (str): The uniform name.
             uniform_data (Any): The new uniform data.
         """
-        uniform_type = self.shader_params[uniform_name]
-        match uniform_type:
-            case 'float':
-                assert isinstance(uniform_data, float), f"Uniform type with name: {uniform_name} is not a floating point number"
-                gl.glUniform1f(uniform_location, uniform_data)
-                return
-            case 'int':
-                assert isinstance(uniform_data, int), f"Uniform type with name: {uniform_name} is not an integer number"
-                gl.glUniform1i(uniform_location, uniform_data)
-                return
-            case 'sampler2D':
-                assert isinstance(uniform_data, int), f"Uniform type with name: {uniform_name} is not an integer number"
-                gl.glUniform1i(uniform_location, uniform_data)
-                return
-            case 'samplerCube':
-                assert isinstance(uniform_data, int), f"Uniform type with name: {uniform_name} is not an integer number"
-                gl.glUniform1i(uniform_location, uniform_data)
-                return
-            case 'vec2':
-                assert isinstance(uniform_data, glm.vec2), f"Uniform type with name: {uniform_name} is not a 2x1 glm array of float32 type"
-                gl.glUniform2f(uniform_location, uniform_data.x, uniform_data.y)
-                return
-            case 'vec3':
-                assert isinstance(uniform_data, glm.vec3), f"Uniform type with name: {uniform_name} is not a 3x1 glm array of float32 type"
-                gl.glUniform3f(uniform_location, uniform_data.x, uniform_data.y, uniform_data.z)
-                return
-            case 'vec4':
-                assert isinstance(uniform_data, glm.vec4), f"Uniform type with name: {uniform_name} is not a 4x1 glm array of float32 type"
-                gl.glUniform4f(uniform_location, uniform_data.x, uniform_data.y, uniform_data.z, uniform_data.w)
-                return
-            case 'ivec2':
-                assert isinstance(uniform_data, glm.ivec2), f"Uniform type with name: {uniform_name} is not a 2x1 glm array of int32 type"
-                gl.glUniform2i(uniform_location, uniform_data.x, uniform_data.y)
-                return
-            case 'ivec3':
-                assert isinstance(uniform_data, glm.ivec3), f"Uniform type with name: {uniform_name} is not a 3x1 glm array of int32 type"
-                gl.glUniform3i(uniform_location, uniform_data.x, uniform_data.y, uniform_data.z)
-                return
-            case 'ivec4':
-                assert isinstance(uniform_data, glm.ivec4), f"Uniform type with name: {uniform_name} is not a 4x1 glm array of int32 type"
-                gl.glUniform4ui(uniform_location, uniform_data.x, uniform_data.y, uniform_data.z, uniform_data.w)
-                return
-            case 'uvec2':
-                assert isinstance(uniform_data, glm.uvec2), f"Uniform type with name: {uniform_name} is not a 2x1 glm array of uint32 type"
-                gl.glUniform2ui(uniform_location, uniform_data.x, uniform_data.y)
-                return
-            case 'uvec3':
-                assert isinstance(uniform_data, glm.uvec3), f"Uniform type with name: {uniform_name} is not a 3x1 glm array of uint32 type"
-                gl.glUniform3ui(uniform_location, uniform_data.x, uniform_data.y, uniform_data.z)
-                return
-            case 'uvec4':
-                assert isinstance(uniform_data, glm.uvec4), f"Uniform type with name: {uniform_name} is not a 4x1 glm array of uint32 type"
-                gl.glUniform4ui(uniform_location, uniform_data.x, uniform_data.y, uniform_data.z, uniform_data.w)
-                return
-            case 'dvec2':
-                assert isinstance(uniform_data, glm.dvec2), f"Uniform type with name: {uniform_name} is not a 2x1 glm array of double type"
-                gl.glUniform2d(uniform_location, uniform_data.x, uniform_data.y)
-                return
-            case 'dvec3':
-                assert isinstance(uniform_data, glm.dvec3), f"Uniform type with name: {uniform_name} is not a 3x1 glm array of double type"
-                gl.glUniform3d(uniform_location, uniform_data.x, uniform_data.y, uniform_data.z)
-                return
-            case 'dvec4':
-                assert isinstance(uniform_data, glm.dvec4), f"Uniform type with name: {uniform_name} is not a 4x1 glm array of double type"
-                gl.glUniform4d(uniform_location, uniform_data.x, uniform_data.y, uniform_data.z, uniform_data.w)
-                return
-            case 'mat2':
-                assert isinstance(uniform_data, glm.mat2), f"Uniform type with name: {uniform_name} is not a 2x2 glm matrix type"
-                gl.glUniformMatrix2fv(uniform_location, 1, gl.GL_FALSE, glm.value_ptr(uniform_data))
-                return
-            case 'mat3':
-                assert isinstance(uniform_data, glm.mat3), f"Uniform type with name: {uniform_name} is not a 3x3 glm matrix type"
-                gl.glUniformMatrix3fv(uniform_location, 1, gl.GL_FALSE, glm.value_ptr(uniform_data))
-                return
-            case 'mat4':
-                assert isinstance(uniform_data, glm.mat4), f"Uniform type with name: {uniform_name} is not a 4x4 glm matrix type"
-                gl.glUniformMatrix4fv(uniform_location, 1, gl.GL_FALSE, glm.value_ptr(uniform_data))
-                return
-
-        if 'int[' in uniform_type or 'sampler2D[' in uniform_type:
-            number_pattern = re.compile(r'\[(\d+)\]')
-            match = number_pattern.search(uniform_type)
-            if match:
-                count = int(match.group(1))
-                assert len(uniform_data) <= count and isinstance(uniform_data[0], np.int32), f"Uniform type with name: {uniform_name} is not a NumPy array of {count} integers"
-                gl.glUniform1iv(uniform_location, len(uniform_data), uniform_data)
-        elif 'float[' in uniform_type:
-            number_pattern = re.compile(r'\[(\d+)\]')
-            match = number_pattern.search(uniform_type)
-            if match:
-                count = int(match.group(1))
-                assert len(uniform_data) <= count and isinstance(uniform_data[0], np.float32), f"Uniform type with name: {uniform_name} is not a NumPy array of {count} floats"
-                gl.glUniform1fv(uniform_location, len(uniform_data), uniform_data)
-        elif 'mat2[' in uniform_type:
-            number_pattern = re.compile(r'\[(\d+)\]')
-            match = number_pattern.search(uniform_type)
-            if match:
-                count = int(match.group(1))
-                assert len(uniform_data) <= count and isinstance(uniform_data[0], glm.mat2), f"Uniform type with name: {uniform_name} is not a NumPy array of {count} 2x2 glm matrices"
-                gl.glUniformMatrix2fv(uniform_location, len(uniform_data), gl.GL_FALSE, uniform_data.ptr)
-        elif 'mat3[' in uniform_type:
-            number_pattern = re.compile(r'\[(\d+)\]')
-            match = number_pattern.search(uniform_type)
-            if match:
-                count = int(match.group(1))
-                assert len(uniform_data) <= count and isinstance(uniform_data[0], glm.mat3), f"Uniform type with name: {uniform_name} is not an array of {count} 3x3 glm matrices"
-                gl.glUniformMatrix3fv(uniform_location, len(uniform_data), gl.GL_FALSE, uniform_data.ptr)
-        elif 'mat4[' in uniform_type:
-            number_pattern = re.compile(r'\[(\d+)\]')
-            match = number_pattern.search(uniform_type)
-            if match:
-                count = int(match.group(1))
-                assert len(uniform_data) <= count and isinstance(uniform_data[0], glm.mat4), f"Uniform type with name: {uniform_name} is not an array of {count} 4x4 glm matrices"
-                gl.glUniformMatrix4fv(uniform_location, len(uniform_data), gl.GL_FALSE, uniform_data.ptr)
-        elif 'vec2[' in uniform_type:
-            number_pattern = re.compile(r'\[(\d+)\]')
-            match = number_pattern.search(uniform_type)
-            if match:
-                count = int(match.group(1))
-                assert len(uniform_data) <= count and isinstance(uniform_data[0], glm.vec2), f"Uniform type with name: {uniform_name} is not an array of {count} 2x1 glm array of float"
-                gl.glUniform2fv(uniform_location, len(uniform_data), uniform_data.ptr)
-        elif 'vec3[' in uniform_type:
-            number_pattern = re.compile(r'\[(\d+)\]')
-            match = number_pattern.search(uniform_type)
-            if match:
-                count = int(match.group(1))
-                assert len(uniform_data) <= count and isinstance(uniform_data[0], glm.vec3), f"Uniform type with name: {uniform_name} is not an array of {count} 3x1 glm array of float"
-                gl.glUniform3fv(uniform_location, len(uniform_data), uniform_data.ptr)
-        elif 'vec4[' in uniform_type:
-            number_pattern = re.compile(r'\[(\d+)\]')
-            match = number_pattern.search(uniform_type)
-            if match:
-                count = int(match.group(1))
-                assert len(uniform_data) <= count and isinstance(uniform_data[0], glm.vec4), f"Uniform type with name: {uniform_name} is not an array of {count} 4x1 glm array of float"
-                gl.glUniform4fv(uniform_location, len(uniform_data), uniform_data.ptr)
+        _, setter, expected_type, size = self.uniforms[uniform_name]
+        if size == 1:
+            assert isinstance(uniform_data, expected_type), f"Uniform type with name: {uniform_name} is not of {expected_type.__name__} type"
+        else:
+            assert len(uniform_data) <= size and isinstance(uniform_data[0], expected_type), f"Uniform type with name: {uniform_name} is not an array of {size} elements of {expected_type.__name__} type"
+        setter(uniform_location, uniform_data)
 
     def uniform_not_found(self, uniform_name: str):
         """Prints a message stating that the uniform with the provided name was not found.
@@ -201,6 +179,7 @@ class MaterialInstance:
 class MaterialDescriptor:
     primitive: gl.Constant = gl.GL_TRIANGLES
     cast_shadows = True
+    transparent: bool = False
     cull_enabled: bool = True
     cull_face: gl.Constant = gl.GL_BACK
     patch_resolution: int = 20
@@ -281,8 +260,10 @@ class OpenGLMaterialLib(object):
         if shader_data.tes_code != None:
             shader_params_tess_eval = OpenGLShaderLib().parse(shader_data.tes_code)
 
-        cls.instance.cached_materials[data] = MaterialInstance(name, data, descriptor, shader_program, shader_params_vertex | shader_params_fragment | shader_params_geometry | shader_params_tess_control | shader_params_tess_eval)
-        cls.instance.materials[name] = MaterialInstance(name, data, descriptor, shader_program, shader_params_vertex | shader_params_fragment | shader_params_geometry | shader_params_tess_control | shader_params_tess_eval)
+        shader_params = shader_params_vertex | shader_params_fragment | shader_params_geometry | shader_params_tess_control | shader_params_tess_eval
+
+        cls.instance.cached_materials[data] = MaterialInstance(name, data, descriptor, shader_program, shader_params, shader_data.uniforms, shader_data.uniform_values, shader_data.attributes, shader_data.uniform_blocks)
+        cls.instance.materials[name] = MaterialInstance(name, data, descriptor, shader_program, shader_params, shader_data.uniforms, shader_data.uniform_values, shader_data.attributes, shader_data.uniform_blocks)
 
         return cls.instance.materials[name]
 
@@ -1,11 +1,134 @@
 from pyGandalf.utilities.definitions import SHADERS_PATH
+from pyGandalf.utilities.logger import logger
 
 import OpenGL.GL as gl
+import numpy as np
+import glm
 
 import os
 import re
 from pathlib import Path
 
+# The fixed binding points of the uniform blocks, blocks with other names get the next free binding point the first time they are seen.
+UNIFORM_BLOCK_BINDINGS = { 'Camera': 0, 'Lights': 1, 'Material': 2 }
+
+# The uniform block that every material has its own uniform buffer for, the rest of the blocks are shared by all the shader programs.
+MATERIAL_UNIFORM_BLOCK = 'Material'
+
+# The NumPy type, shape and std140 base alignment of the GLSL types that are allowed in uniform blocks.
+STD140_TYPES = {
+    'float': (np.float32, (), 4),
+    'int': (np.int32, (), 4),
+    'uint': (np.uint32, (), 4),
+    'bool': (np.int32, (), 4),
+    'vec2': (np.float32, (2,), 8),
+    'vec3': (np.float32, (3,), 16),
+    'vec4': (np.float32, (4,), 16),
+    'ivec2': (np.int32, (2,), 8),
+    'ivec3': (np.int32, (3,), 16),
+    'ivec4': (np.int32, (4,), 16),
+    'mat3': (np.float32, (3, 4), 16),
+    'mat4': (np.float32, (4, 4), 16),
+}
+
+class UniformBuffer:
+    """A uniform block laid out with the std140 rules as a NumPy structured array, so that it is filled on the CPU and uploaded with a single call.
+    The elements of arrays and the columns of matrices are padded to a vec4, as std140 requires. The buffer is only uploaded when its contents changed.
+    """
+    def __init__(self, name: str, members: dict[str, str], binding: int):
+        self.name = name
+        self.members = members
+        self.binding = binding
+        self.buffer_id = None
+        self.uploaded_data = None
+
+        names, formats, offsets = [], [], []
+        offset = 0
+
+        for member_name, member_type in members.items():
+            array_match = re.fullmatch(r'(\w+)\[(\d+)\]', member_type)
+            base_type = array_match.group(1) if array_match else member_type
+            dtype, shape, alignment = STD140_TYPES[base_type]
+
+            # Every element of an array is aligned to a vec4.
+            if array_match:
+                alignment = 16
+                shape = (int(array_match.group(2)),) + (shape if len(shape) == 2 else (4,))
+
+            offset = (offset + alignment - 1) // alignment * alignment
+
+            names.append(member_name)
+            formats.append((dtype, shape) if len(shape) != 0 else dtype)
+            offsets.append(offset)
+            offset += np.dtype(dtype).itemsize * int(np.prod(shape))
+
+        # The size of a block is rounded up to a vec4.
+        self.type = np.dtype({ 'names': names, 'formats': formats, 'offsets': offsets, 'itemsize': (offset + 15) // 16 * 16 })
+        self.data = np.zeros((1,), self.type)
+
+    @property
+    def nbytes(self):
+        return self.data.nbytes
+
+    def has_member(self, member: str) -> bool:
+        return member in self.members
+
+    def get_offset(self, member: str) -> int:
+        return self.type.fields[member][1]
+
+    def __getitem__(self, key):
+        return self.data[key]
+
+    def set(self, member: str, value):
+        """Sets the member with the given name, vectors, matrices and arrays are written in their std140 padded layout.
+
+        Args:
+            member (str): The name of the member.
+            value (Any): The new value, a number, a glm type, a glm array or a NumPy array.
+        """
+        field = self.data[member]
+
+        # Matrices are written column by column, as they are laid out in memory.
+        if isinstance(value, (glm.mat3, glm.mat4)):
+            value = np.frombuffer(value.to_bytes(), dtype=np.float32).reshape(len(value), -1)
+
+        value = np.asarray(value, dtype=field.dtype)
+
+        if field.ndim == 1:
+            field[0] = value
+        elif field.ndim == 2:
+            field[0, :value.size] = value.ravel()
+        else:
+            rows = value.reshape(len(value), -1) if value.ndim > 1 else value.reshape(-1, 1)
+            count = min(len(rows), field.shape[1])
+            field[0, :count, :rows.shape[1]] = rows[:count]
+
+    def create(self):
+        """Creates the GL buffer of the uniform block.
+        """
+        self.buffer_id = gl.glGenBuffers(1)
+        gl.glBindBuffer(gl.GL_UNIFORM_BUFFER, self.buffer_id)
+        gl.glBufferData(gl.GL_UNIFORM_BUFFER, self.nbytes, None, gl.GL_DYNAMIC_DRAW)
+        self.uploaded_data = None
+
+    def upload(self) -> bool:
+        """Uploads the contents of the uniform block, if they changed since the last upload.
+
+        Returns:
+            bool: ```True``` if the contents were uploaded, ```False``` if they did not change.
+        """
+        if self.buffer_id is None:
+            self.create()
+
+        data = self.data.tobytes()
+        if data == self.uploaded_data:
+            return False
+
+        gl.glBindBuffer(gl.GL_UNIFORM_BUFFER, self.buffer_id)
+        gl.glBufferSubData(gl.GL_UNIFORM_BUFFER, 0, self.nbytes, self.data)
+        self.uploaded_data = data
+        return True
+
 class ShaderData:
     def __init__(self, shader_program, name: str, vs_path: Path, fs_path: Path, gs_path: Path, tcs_path: Path, tes_path: Path, vs_code: str, fs_code: str, gs_code: str, tcs_code: str, tes_code: str):
         self.name = name
@@ -20,12 +143,18 @@ class ShaderData:
         self.gs_code = gs_code
         self.tcs_code = tcs_code
         self.tes_code = tes_code
+        self.uniforms: dict[str, tuple[int, int, int]] = {}
+        self.attributes: dict[str, tuple[int, int, int]] = {}
+        self.uniform_values: dict[int, object] = {}
+        self.uniform_blocks: dict[str, dict[str, str]] = {}
 
 class OpenGLShaderLib(object):
     def __new__(cls):
         if not hasattr(cls, 'instance'):
             cls.instance = super(OpenGLShaderLib, cls).__new__(cls)
             cls.instance.shaders : dict[str, ShaderData] = {} # type: ignore
+            cls.instance.uniform_block_bindings: dict[str, int] = dict(UNIFORM_BLOCK_BINDINGS) # type: ignore
+            cls.instance.uniform_buffers: dict[str, UniformBuffer] = {} # type: ignore
         return cls.instance
     
     def compile_shader(cls, source, shader_type):
@@ -120,9 +249,128 @@ class OpenGLShaderLib(object):
 
         shader_program = cls.instance.create_shader_program(vs_code, fs_code, gs_code, tcs_code, tes_code)
         cls.instance.shaders[name] = ShaderData(shader_program, name, vs_rel_path, fs_rel_path, gs_rel_path, tcs_rel_path, tes_rel_path, vs_code, fs_code, gs_code, tcs_code, tes_code)
+        cls.instance.shaders[name].uniforms = cls.instance.reflect(shader_program)
+        cls.instance.shaders[name].attributes = cls.instance.reflect_attributes(shader_program)
+        cls.instance.shaders[name].uniform_blocks = cls.instance.bind_uniform_blocks(shader_program, [vs_code, fs_code, gs_code, tcs_code, tes_code])
         
         return shader_program
+
+    def bind_uniform_blocks(cls, shader_program: int, shader_codes: list[str]) -> dict[str, dict[str, str]]:
+        """Assigns the binding point of every uniform block of the provided shader program. The blocks with the same name share their binding point across all the programs,
+        and all the blocks except the material one share a single uniform buffer.
+
+        Args:
+            shader_program (int): The linked shader program.
+            shader_codes (list[str]): The source code of the stages of the shader program.
+
+        Returns:
+            dict[str, dict[str, str]]: A dictionary holding the block name as a key and its members, the member name to the member type, as a value.
+        """
+        uniform_blocks = {}
+        for shader_code in shader_codes:
+            if shader_code == None:
+                continue
+
+            for uniform_name, uniform_type in cls.instance.parse(shader_code).items():
+                if isinstance(uniform_type, dict):
+                    uniform_blocks[uniform_name] = uniform_type
+
+        for block_name, members in uniform_blocks.items():
+            binding = cls.instance.get_uniform_block_binding(block_name)
+
+            block_index = gl.glGetUniformBlockIndex(shader_program, block_name)
+            if block_index != gl.GL_INVALID_INDEX:
+                gl.glUniformBlockBinding(shader_program, block_index, binding)
+
+            if block_name == MATERIAL_UNIFORM_BLOCK:
+                continue
+
+            uniform_buffer = cls.instance.uniform_buffers.get(block_name)
+            if uniform_buffer == None:
+                cls.instance.uniform_buffers[block_name] = UniformBuffer(block_name, members, binding)
+            elif uniform_buffer.members != members:
+                logger.error(f"Uniform block '{block_name}' is declared with different members across shaders, they share the same uniform buffer")
+
+        return uniform_blocks
+
+    def get_uniform_block_binding(cls, block_name: str) -> int:
+        """Returns the binding point of the uniform block with the given name, assigning the next free one the first time it is seen.
+
+        Args:
+            block_name (str): The name of the uniform block.
+
+        Returns:
+            int: The binding point of the uniform block.
+        """
+        binding = cls.instance.uniform_block_bindings.get(block_name)
+        if binding == None:
+            binding = max(cls.instance.uniform_block_bindings.values()) + 1
+            cls.instance.uniform_block_bindings[block_name] = binding
+        return binding
+
+    def get_uniform_buffer(cls, block_name: str) -> UniformBuffer:
+        """Returns the uniform buffer that all the shader programs share for the uniform block with the given name.
+
+        Args:
+            block_name (str): The name of the uniform block.
+
+        Returns:
+            UniformBuffer: The shared uniform buffer, or None if no shader declares the block.
+        """
+        return cls.instance.uniform_buffers.get(block_name)
+
+    def get_uniform_buffers(cls) -> dict[str, UniformBuffer]:
+        """Returns the dictionary that holds all the shared uniform buffers, by uniform block name.
+
+        Returns:
+            dict[str, UniformBuffer]: the dictionary that holds all the shared uniform buffers.
+        """
+        return cls.instance.uniform_buffers
     
+    def reflect(cls, shader_program: int) -> dict[str, tuple[int, int, int]]:
+        """Queries the active uniforms of the provided linked shader program. Uniforms that are members of a uniform block have no location and they are skipped.
+
+        Args:
+            shader_program (int): The linked shader program.
+
+        Returns:
+            dict[str, tuple[int, int, int]]: A dictionary holding the uniform name as a key and its location, GL type and array size as a value.
+        """
+        uniforms = {}
+        for index in range(gl.glGetProgramiv(shader_program, gl.GL_ACTIVE_UNIFORMS)):
+            name, size, uniform_type = gl.glGetActiveUniform(shader_program, index)
+            name = name.decode('utf-8') if isinstance(name, bytes) else str(name)
+
+            # Arrays are reported by their first element, e.g. u_LightPositions[0]
+            if name.endswith('[0]'):
+                name = name[:-3]
+
+            location = gl.glGetUniformLocation(shader_program, name)
+            if location != -1:
+                uniforms[name] = (location, int(uniform_type), int(size))
+
+        return uniforms
+
+    def reflect_attributes(cls, shader_program: int) -> dict[str, tuple[int, int, int]]:
+        """Queries the active vertex attributes of the provided linked shader program.
+
+        Args:
+            shader_program (int): The linked shader program.
+
+        Returns:
+            dict[str, tuple[int, int, int]]: A dictionary holding the attribute name as a key and its location, GL type and array size as a value.
+        """
+        attributes = {}
+        for index in range(gl.glGetProgramiv(shader_program, gl.GL_ACTIVE_ATTRIBUTES)):
+            name, size, attribute_type = gl.glGetActiveAttrib(shader_program, index)
+            name = name.decode('utf-8') if isinstance(name, bytes) else str(name)
+
+            location = gl.glGetAttribLocation(shader_program, name)
+            if location != -1:
+                attributes[name] = (location, int(attribute_type), int(size))
+
+        return attributes
+
     def parse(cls, shader_code: str) -> dict:
         """Parses the provided shader code and identifies all the uniforms along with their types.
 
@@ -135,6 +383,7 @@ class OpenGLShaderLib(object):
         uniform_pattern = re.compile(r'uniform\s+(\w+)\s+(\w+)\s*')
         uniform_buffer_pattern = re.compile(r'layout\s*\(\s*std140\s*\)\s*uniform\s+(\w+)\s*{([^}]*)\s*};')
         uniform_array_pattern = re.compile(r'uniform\s+(\w+)\s+(\w+)\s*\[\s*(\d+)\s*\]\s*')
+        uniform_buffer_member_pattern = re.compile(r'(\w+)\s+(\w+)\s*(?:\[\s*(\d+)\s*\])?\s*;')
 
         uniforms = {}
         matches = uniform_pattern.findall(shader_code)
@@ -153,9 +402,9 @@ class OpenGLShaderLib(object):
             buffer_name = match[0]
             buffer_content = match[1]
             buffer_uniforms = {}
-            buffer_matches = uniform_pattern.findall(buffer_content)
+            buffer_matches = uniform_buffer_member_pattern.findall(buffer_content)
             for buffer_match in buffer_matches:
-                buffer_uniforms[buffer_match[1]] = buffer_match[0]
+                buffer_uniforms[buffer_match[1]] = buffer_match[0] if buffer_match[2] == '' else f'{buffer_match[0]}[{buffer_match[2]}]'
             uniforms[buffer_name] = buffer_uniforms
         
         return uniforms
@@ -188,4 +437,5 @@ class OpenGLShaderLib(object):
             return file.read()
         
     def clean(cls):
-        cls.instance.shaders.clear()
\ No newline at end of file
+        cls.instance.shaders.clear()
+        cls.instance.uniform_buffers.clear()
\ No newline at end of file
@@ -63,6 +63,8 @@ class OpenGLTextureLib(object):
         Returns:
             int: The texture slot.
         """
+        from pyGandalf.renderer.opengl_renderer import OpenGLRenderer
+
         if cls.instance.textures.get(name) != None:
             return cls.instance.textures[name].slot
 
@@ -104,6 +106,9 @@ class OpenGLTextureLib(object):
 
             gl.glBindTexture(gl.GL_TEXTURE_2D, 0)
 
+            # The texture was bound outside of the renderer, so its tracked bindings are stale.
+            OpenGLRenderer().invalidate_texture_bindings()
+
             if data.path is not None:
                 data.path = Path(os.path.relpath(data.path, TEXTURES_PATH))
 
@@ -155,6 +160,9 @@ class OpenGLTextureLib(object):
 
             gl.glBindTexture(gl.GL_TEXTURE_CUBE_MAP, 0)
 
+            # The texture was bound outside of the renderer, so its tracked bindings are stale.
+            OpenGLRenderer().invalidate_texture_bindings()
+
             texture_instance : TextureInstance = TextureInstance(texture_id, cls.instance.current_slot, name, data, descriptor)
             cls.instance.textures[name] = texture_instance
 
@@ -209,8 +217,8 @@ class OpenGLTextureLib(object):
             case TextureDimension.CUBE:
                 target = gl.GL_TEXTURE_CUBE_MAP
 
-        gl.glActiveTexture(texture.slot + gl.GL_TEXTURE0)
-        gl.glBindTexture(target, cls.instance.get_id(name))
+        from pyGandalf.renderer.opengl_renderer import OpenGLRenderer
+        OpenGLRenderer().bind_texture(texture.slot, target, texture.id)
 
     def unbind(cls, name: str):
         """Unbinds the texture with the given name.
@@ -231,12 +239,14 @@ class OpenGLTextureLib(object):
             case TextureDimension.CUBE:
                 target = gl.GL_TEXTURE_CUBE_MAP
 
-        gl.glActiveTexture(texture.slot + gl.GL_TEXTURE0)
-        gl.glBindTexture(target, 0)
+        from pyGandalf.renderer.opengl_renderer import OpenGLRenderer
+        OpenGLRenderer().bind_texture(texture.slot, target, 0)
 
     def bind_textures(cls):
         """Binds all the available textures.
         """
+        from pyGandalf.renderer.opengl_renderer import OpenGLRenderer
+
         for texture in cls.instance.textures.values():
             target = None
             match texture.descriptor.dimention:
@@ -244,12 +254,13 @@ class OpenGLTextureLib(object):
                     target = gl.GL_TEXTURE_2D
                 case TextureDimension.CUBE:
                     target = gl.GL_TEXTURE_CUBE_MAP
-            gl.glActiveTexture(texture.slot + gl.GL_TEXTURE0)
-            gl.glBindTexture(target, texture.id)
+            OpenGLRenderer().bind_texture(texture.slot, target, texture.id)
 
     def unbind_textures(cls):
         """Unbinds all the available textures.
         """
+        from pyGandalf.renderer.opengl_renderer import OpenGLRenderer
+
         for texture in cls.instance.textures.values():
             target = None
             match texture.descriptor.dimention:
@@ -257,8 +268,7 @@ class OpenGLTextureLib(object):
                     target = gl.GL_TEXTURE_2D
                 case TextureDimension.CUBE:
                     target = gl.GL_TEXTURE_CUBE_MAP
-            gl.glActiveTexture(texture.slot + gl.GL_TEXTURE0)
-            gl.glBindTexture(target, 0)
+            OpenGLRenderer().bind_texture(texture.slot, target, 0)
     
     def get_textures(cls) -> dict[str, TextureInstance]:
         """Returns a dictionary the holds all the textures. As the key is the name of the texture, as the value is the texture data.
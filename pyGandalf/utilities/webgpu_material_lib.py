@@ -63,6 +63,105 @@ class CPUBuffer:
     def __setitem__(self, key, val):
         self.data[key] = val
 
+class InstanceBuffer:
+    """A persistent storage buffer that holds one element per drawn instance, e.g. the model matrices of a material, for shaders that declare a runtime sized array of them.
+    The buffer grows geometrically along with the instance count, and only the ranges of elements that changed since the last upload are written to it.
+    """
+    INITIAL_CAPACITY = 64
+
+    # Above this many changed ranges, a single range from the first to the last changed element is written instead.
+    MAX_UPLOAD_RANGES = 16
+
+    def __init__(self, element_type: np.dtype, group: int, binding: int):
+        self.element_type = element_type
+        self.group = group
+        self.binding = binding
+
+        self.count = 0
+        self.capacity = 0
+        self.data = np.zeros(0, dtype=element_type)
+        self.uploaded_data = np.zeros(0, dtype=element_type)
+        self.uploaded_count = 0
+        self.buffer: wgpu.GPUBuffer = None
+
+        self.resize(0)
+
+    def has_member(self, member):
+        return member in self.element_type.names
+
+    def __getitem__(self, key):
+        return self.data[key][:self.count]
+
+    def __setitem__(self, key, val):
+        self.data[key][:self.count] = val
+
+    def resize(self, count: int) -> bool:
+        """Sets the number of instances, growing the buffer if they do not fit.
+
+        Args:
+            count (int): The number of instances.
+
+        Returns:
+            bool: ```True``` if the gpu buffer was recreated, so the bind groups that use it have to be recreated too, ```False``` otherwise.
+        """
+        self.count = count
+        if count <= self.capacity and self.buffer != None:
+            return False
+
+        self.capacity = max(count, 2 * self.capacity, self.INITIAL_CAPACITY)
+
+        data = np.zeros(self.capacity, dtype=self.element_type)
+        data[:len(self.data)] = self.data
+        self.data = data
+        self.uploaded_data = np.zeros(self.capacity, dtype=self.element_type)
+
+        if self.buffer != None:
+            self.buffer.destroy()
+
+        self.buffer = WebGPURenderer().get_device().create_buffer(
+            size=self.data.nbytes, usage=wgpu.BufferUsage.STORAGE | wgpu.BufferUsage.COPY_DST
+        )
+
+        # The new buffer holds nothing yet.
+        self.uploaded_count = 0
+        return True
+
+    def get_dirty_ranges(self) -> list[tuple[int, int]]:
+        """Returns the ranges of instances that changed since the last upload.
+
+        Returns:
+            list[tuple[int, int]]: The first and one past the last instance of every changed range.
+        """
+        if self.count == 0:
+            return []
+
+        # The elements are compared bitwise, so that NaNs compare equal to themselves.
+        current = self.data[:self.count].view(np.uint32).reshape(self.count, -1)
+        uploaded = self.uploaded_data[:self.count].view(np.uint32).reshape(self.count, -1)
+        dirty = np.any(current != uploaded, axis=1)
+        dirty[self.uploaded_count:] = True
+
+        edges = np.flatnonzero(np.diff(dirty, prepend=False, append=False))
+        ranges = list(zip(edges[0::2].tolist(), edges[1::2].tolist()))
+
+        if len(ranges) > self.MAX_UPLOAD_RANGES:
+            ranges = [(ranges[0][0], ranges[-1][1])]
+        return ranges
+
+    def upload(self) -> list[tuple[int, int]]:
+        """Writes the instances that changed since the last upload to the gpu buffer.
+
+        Returns:
+            list[tuple[int, int]]: The ranges of instances that were written.
+        """
+        ranges = self.get_dirty_ranges()
+        for first, last in ranges:
+            WebGPURenderer().write_buffer(self.buffer, self.data[first:last], 0, first * self.element_type.itemsize)
+            self.uploaded_data[first:last] = self.data[first:last]
+
+        self.uploaded_count = max(self.uploaded_count, self.count)
+        return ranges
+
 @dataclass
 class MaterialDescriptor:
     primitive: wgpu.PrimitiveTopology = wgpu.PrimitiveTopology.triangle_list
@@ -75,6 +174,7 @@ class MaterialDescriptor:
     depth_compare: wgpu.CompareFunction = wgpu.CompareFunction.less_equal
 
     cast_shadows: bool = True
+    transparent: bool = False
 
 class MaterialData:
     def __init__(self, base_template: str, textures: list[str], color: glm.vec4 = glm.vec4(1.0, 1.0, 1.0, 1.0), glossiness = 3.0):
@@ -101,7 +201,7 @@ class MaterialData:
         return hash((self.base_template, self.color.r, self.color.g, self.color.b, self.color.a, len(self.textures), self.glossiness, tuple(texture for texture in self.textures)))
 
 class MaterialInstance:
-    def __init__(self, name, data: MaterialData, descriptor: MaterialDescriptor, shader_module, pipeline_layout, bind_groups, uniform_buffers, uniform_buffer_types, storage_buffers, storage_buffer_types, other_uniforms, shader_params = []):
+    def __init__(self, name, data: MaterialData, descriptor: MaterialDescriptor, shader_module, pipeline_layout, bind_groups, uniform_buffers, uniform_buffer_types, storage_buffers, storage_buffer_types, other_uniforms, shader_params = [], instance_buffers = None, bind_group_layouts = None, bind_groups_entries = None):
         self.name = name
         self.data: MaterialData = data
         self.descriptor: MaterialDescriptor = descriptor
@@ -115,6 +215,11 @@ class MaterialInstance:
         self.other_uniforms = other_uniforms
         self.shader_params = shader_params
 
+        # The growable storage buffers, along with what is needed to recreate their bind groups when they grow.
+        self.instance_buffers: dict[str, InstanceBuffer] = instance_buffers if instance_buffers != None else {}
+        self.bind_group_layouts = bind_group_layouts
+        self.bind_groups_entries = bind_groups_entries
+
     def has_uniform(self, uniform_name: str) -> bool:
         """Returns True if the material has the uniform with the given name, otherwise False.
 
@@ -134,8 +239,9 @@ class MaterialInstance:
         """
         uniform = self.other_uniforms[uniform_name]
 
+        # Textures stay resident, they are uploaded again only if their data was marked as dirty.
         if isinstance(uniform, TextureInstance):
-            WebGPURenderer().write_texture(uniform)
+            WebGPUTextureLib().upload(uniform)
 
     def set_uniform_buffer(self, uniform_name: str, uniform_data: CPUBuffer):
         """Sets the uniform buffer with the provided name (if valid), with the provided data.
@@ -166,6 +272,45 @@ class MaterialInstance:
 
         temporary_buffer.destroy()
 
+    def get_instance_buffer(self, buffer_name: str, count: int) -> InstanceBuffer | None:
+        """Returns the instance buffer with the given name, resized to hold the given number of instances.
+
+        Args:
+            buffer_name (str): The name of the instance buffer.
+            count (int): The number of instances.
+
+        Returns:
+            InstanceBuffer | None: The instance buffer, or None if the material has no instance buffer with that name.
+        """
+        instance_buffer = self.instance_buffers.get(buffer_name)
+        if instance_buffer == None:
+            return None
+
+        if instance_buffer.resize(count):
+            # Bind groups can not change, the one of the grown buffer is created again.
+            for entry in self.bind_groups_entries[instance_buffer.group]:
+                if entry['binding'] == instance_buffer.binding:
+                    entry['resource'] = {
+                        "buffer": instance_buffer.buffer,
+                        "offset": 0,
+                        "size": instance_buffer.buffer.size,
+                    }
+
+            self.bind_groups[instance_buffer.group] = WebGPURenderer().get_device().create_bind_group(
+                layout=self.bind_group_layouts[instance_buffer.group],
+                entries=self.bind_groups_entries[instance_buffer.group]
+            )
+
+        return instance_buffer
+
+    def set_instance_buffer(self, buffer_name: str):
+        """Uploads the instances of the instance buffer with the given name that changed since its last upload.
+
+        Args:
+            buffer_name (str): The name of the instance buffer.
+        """
+        self.instance_buffers[buffer_name].upload()
+
     def get_cpu_buffer_type(self, buffer_name: str) -> CPUBuffer | None:
         if buffer_name in self.uniform_buffer_types.keys():
             return self.uniform_buffer_types[buffer_name]
@@ -223,6 +368,7 @@ class WebGPUMaterialLib(object):
         uniform_buffer_types = {}
         storage_buffers = {}
         storage_buffer_types = {}
+        instance_buffers = {}
         other_uniforms = {}
 
         bind_groups_entries = [[]]
@@ -266,6 +412,20 @@ class WebGPUMaterialLib(object):
             if len(bind_groups_entries) <= storage_buffer_data['group']:
                 bind_groups_entries.append([])
 
+            # Storage buffers with a runtime sized array hold one element per instance and grow along with the instance count.
+            instance_buffer = cls.instance.create_instance_buffer(storage_buffer_data, shader_data.shader_code)
+            if instance_buffer != None:
+                instance_buffers[buffer_name] = instance_buffer
+                bind_groups_entries[storage_buffer_data['group']].append({
+                    "binding": storage_buffer_data['binding'],
+                    "resource": {
+                        "buffer": instance_buffer.buffer,
+                        "offset": 0,
+                        "size": instance_buffer.buffer.size,
+                    },
+                })
+                continue
+
             # Find storage buffer layout and fields from shader reflection.
             fields = []
             for member_name in storage_buffer_data['type']['members']:
@@ -300,6 +460,20 @@ class WebGPUMaterialLib(object):
             if len(bind_groups_entries) <= read_only_storage_buffer_data['group']:
                 bind_groups_entries.append([])
 
+            # Storage buffers with a runtime sized array hold one element per instance and grow along with the instance count.
+            instance_buffer = cls.instance.create_instance_buffer(read_only_storage_buffer_data, shader_data.shader_code)
+            if instance_buffer != None:
+                instance_buffers[buffer_name] = instance_buffer
+                bind_groups_entries[read_only_storage_buffer_data['group']].append({
+                    "binding": read_only_storage_buffer_data['binding'],
+                    "resource": {
+                        "buffer": instance_buffer.buffer,
+                        "offset": 0,
+                        "size": instance_buffer.buffer.size,
+                    },
+                })
+                continue
+
             # Find storage buffer layout and fields from shader reflection.
             fields = []
             for member_name in read_only_storage_buffer_data['type']['members']:
@@ -407,8 +581,8 @@ class WebGPUMaterialLib(object):
                 entries=bind_group_entry
             ))
 
-        cls.instance.cached_materials[data] = MaterialInstance(name, data, descriptor, shader_data.shader_module, shader_data.pipeline_layout, bind_groups, uniform_buffers, uniform_buffer_types, storage_buffers, storage_buffer_types, other_uniforms, [])
-        cls.instance.materials[name] = MaterialInstance(name, data, descriptor, shader_data.shader_module, shader_data.pipeline_layout, bind_groups, uniform_buffers, uniform_buffer_types, storage_buffers, storage_buffer_types, other_uniforms, [])
+        cls.instance.cached_materials[data] = MaterialInstance(name, data, descriptor, shader_data.shader_module, shader_data.pipeline_layout, bind_groups, uniform_buffers, uniform_buffer_types, storage_buffers, storage_buffer_types, other_uniforms, [], instance_buffers, shader_data.bind_group_layouts, bind_groups_entries)
+        cls.instance.materials[name] = MaterialInstance(name, data, descriptor, shader_data.shader_module, shader_data.pipeline_layout, bind_groups, uniform_buffers, uniform_buffer_types, storage_buffers, storage_buffer_types, other_uniforms, [], instance_buffers, shader_data.bind_group_layouts, bind_groups_entries)
 
         return cls.instance.materials[name]
 
@@ -431,6 +605,31 @@ class WebGPUMaterialLib(object):
         """
         return cls.instance.materials
     
+    def create_instance_buffer(cls, storage_buffer_data: dict, shader_code: str) -> InstanceBuffer | None:
+        """Creates an instance buffer for the given storage buffer, if its only member is a runtime sized array of structs, e.g. array<InstanceData>.
+
+        Args:
+            storage_buffer_data (dict): The reflection data of the storage buffer.
+            shader_code (str): The source code of the shader that declares the storage buffer.
+
+        Returns:
+            InstanceBuffer | None: The instance buffer, or None if the storage buffer has a fixed size.
+        """
+        members = list(storage_buffer_data['type']['members'].values())
+        if len(members) != 1:
+            return None
+
+        match = re.fullmatch(r'array<\s*(\w+)\s*>', members[0].strip())
+        if match == None:
+            return None
+
+        # Find the element layout and fields from shader reflection.
+        fields = []
+        for member_name, member_type in WebGPUShaderLib().parse_struct(shader_code, match.group(1)).items():
+            fields.append(cls.instance.compute_field_layout(member_type, member_name))
+
+        return InstanceBuffer(CPUBuffer(*fields).dtype, storage_buffer_data['group'], storage_buffer_data['binding'])
+
     def extract_array_size(cls, declaration: str) -> tuple[str, int]:
         # Define the regular expression pattern to match the array declaration
         pattern = r'array<([^,]+), (\d+)>'
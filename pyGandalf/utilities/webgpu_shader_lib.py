@@ -211,6 +211,39 @@ class WebGPUShaderLib(object):
 
         return uniform_buffers, storage_buffers | read_write_storage_buffers, read_only_storage_buffers, other  
 
+    def parse_struct(cls, shader_code: str, struct_name: str) -> dict[str, str]:
+        """Parses the members of the struct with the given name from the provided shader code.
+
+        Args:
+            shader_code (str): The source code of the shader to parse.
+            struct_name (str): The name of the struct.
+
+        Returns:
+            dict[str, str]: A dictionary holding the member name as a key and the member type as a value, empty if there is no such struct.
+        """
+        struct_match = re.search(r"struct " + re.escape(struct_name) + r"\s*\{([^}]*)\}", shader_code)
+        if struct_match == None:
+            return {}
+
+        # Split the members on the commas outside of template brackets, the last member may omit its trailing comma.
+        declarations = []
+        declaration = ''
+        depth = 0
+        for character in struct_match.group(1) + ',':
+            if character == ',' and depth == 0:
+                declarations.append(declaration)
+                declaration = ''
+                continue
+            depth += 1 if character == '<' else -1 if character == '>' else 0
+            declaration += character
+
+        members = {}
+        for declaration in declarations:
+            member = re.fullmatch(r"\s*(\w+)\s*:\s*(.+?)\s*", declaration, re.DOTALL)
+            if member != None:
+                members[member.group(1)] = member.group(2)
+        return members
+
     def get(cls, name: str) -> ShaderData:
         """Gets the shader data of the given shader name.
 
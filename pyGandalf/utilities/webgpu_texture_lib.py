@@ -37,6 +37,8 @@ class TextureInstance:
     sampler: wgpu.GPUSampler = None
     data: TextureData = None
     descriptor: TextureDescriptor = None
+    # Whether the data changed since it was uploaded to the texture.
+    dirty: bool = False
 
 class WebGPUTextureLib(object):
     def __new__(cls):
@@ -112,29 +114,64 @@ class WebGPUTextureLib(object):
             max_anisotropy=1,
         )
 
+        cls.instance.textures[name] = TextureInstance(texture, view, sampler, data, descriptor)
+
+        # The texture is uploaded once, it is uploaded again only if its data is marked as dirty.
         if data.image_bytes != None:
-            WebGPURenderer().get_device().queue.write_texture(
-                {
-                    "texture": texture,
-                    "mip_level": 0,
-                    "origin": (0, 0, 0)
-                },
-                data.image_bytes,
-                {
-                    "offset": 0,
-                    "bytes_per_row": data.width * 4,
-                    "rows_per_image": data.height,
-                },
-                size
-            )
+            WebGPURenderer().write_texture(cls.instance.textures[name])
 
-        cls.instance.textures[name] = TextureInstance(texture, view, sampler, data, descriptor)
         cls.instance.slots[name] = cls.instance.current_slot
 
         cls.instance.current_slot += 1
 
         return cls.instance.slots[name]
 
+    def mark_dirty(cls, name: str):
+        """Marks the data of the texture with the given name as changed, so that it is uploaded again the next time the texture is used.
+
+        Args:
+            name (str): The name of the texture.
+        """
+        texture_instance = cls.instance.textures.get(name)
+        if texture_instance != None:
+            texture_instance.dirty = True
+
+    def upload(cls, texture_instance: TextureInstance) -> bool:
+        """Uploads the data of the given texture, if it was marked as dirty.
+
+        Args:
+            texture_instance (TextureInstance): The texture.
+
+        Returns:
+            bool: ```True``` if the texture was uploaded, ```False``` otherwise.
+        """
+        if not texture_instance.dirty or texture_instance.data.image_bytes is None:
+            return False
+
+        WebGPURenderer().write_texture(texture_instance)
+        texture_instance.dirty = False
+        return True
+
+    def update(cls, name: str, image_bytes: bytes, origin: tuple = (0, 0, 0), size: list = None):
+        """Streams new data to the texture with the given name right away, for textures that change often, e.g. video frames.
+        If no size is given the whole texture is replaced, otherwise only the given region of the texture is written and the data of the texture is left as is.
+
+        Args:
+            name (str): The name of the texture.
+            image_bytes (bytes): The new RGBA data.
+            origin (tuple, optional): The texel and layer to start writing at.
+            size (list, optional): The width, height and layer count of the written region.
+        """
+        texture_instance = cls.instance.textures.get(name)
+        if texture_instance == None:
+            return
+
+        if size == None:
+            texture_instance.data.image_bytes = image_bytes
+            texture_instance.dirty = False
+
+        WebGPURenderer().write_texture(texture_instance, image_bytes, origin, size)
+
     def get_instance(cls, name: str) -> TextureInstance:
         """Returns the instance of the texture with the given name.
 
@@ -3,11 +3,16 @@ import pytest
 from pyGandalf.scene.scene import Scene
 from pyGandalf.systems.transform_system import TransformSystem
 from pyGandalf.systems.link_system import LinkSystem
+from pyGandalf.systems.system import System, SystemState
 from pyGandalf.scene.components import TransformComponent, InfoComponent, LinkComponent
+from pyGandalf.scene.editor_components import EditorVisibleComponent
 
 from pyGandalf.scene.scene_manager import SceneManager
+from pyGandalf.core.application import Application
 
 import glm
+import uuid
+import numpy as np
 
 def test_enroll_entity():
     scene = Scene()
@@ -78,8 +83,16 @@ def test_destroy_entity():
     scene.get_system(TransformSystem).on_create_base()
     scene.get_system(LinkSystem).on_create_base()
 
+    # The destroyed entities are removed from their archetype directly, without moving through intermediate archetypes.
+    archetype_count = len(scene.get_archetypes())
+    archetype, _ = scene.get_entity_location(entity1)
+
     scene.destroy_entity(entity1)
 
+    assert len(scene.get_archetypes()) == archetype_count
+    assert len(archetype) == 0
+    assert scene.get_entity_location(entity3) is not None
+
     assert entity2 not in scene.get_entities() and entity1 not in scene.get_entities()
     assert entity3 in scene.get_entities()
 
@@ -216,4 +229,814 @@ def test_scene_change():
     assert SceneManager().get_active_scene() is scene2
     assert SceneManager().get_active_scene().get_system(LinkSystem) is None
 
-    SceneManager().clean()
\ No newline at end of file
+    SceneManager().clean()
+
+def test_archetype_storage():
+    scene = Scene()
+
+    entity1 = scene.enroll_entity()
+    scene.add_component(entity1, InfoComponent('e1'))
+    transform1 = scene.add_component(entity1, TransformComponent(glm.vec3(1, 0, 0), glm.vec3(0, 0, 0), glm.vec3(1, 1, 1)))
+
+    entity2 = scene.enroll_entity()
+    scene.add_component(entity2, InfoComponent('e2'))
+    transform2 = scene.add_component(entity2, TransformComponent(glm.vec3(2, 0, 0), glm.vec3(0, 0, 0), glm.vec3(1, 1, 1)))
+
+    entity3 = scene.enroll_entity()
+    scene.add_component(entity3, InfoComponent('e3'))
+
+    # Entities with the same set of components share the same dense table.
+    archetype, row1 = scene.get_entity_location(entity1)
+    assert archetype is scene.get_entity_location(entity2)[0]
+    assert len(archetype) == 2
+    assert archetype.get(row1, TransformComponent) is transform1
+
+    # Removing a component moves the entity to another table and keeps the previous one dense.
+    scene.remove_component(entity1, TransformComponent)
+    assert len(archetype) == 1
+    assert archetype.entities == [entity2]
+    assert archetype.columns[TransformComponent] == [transform2]
+    assert scene.get_entity_location(entity1)[0] is scene.get_entity_location(entity3)[0]
+    assert scene.get_component(entity1, InfoComponent).tag == 'e1'
+    assert scene.get_component(entity2, TransformComponent) is transform2
+
+    scene.destroy_entity(entity2)
+    assert len(archetype) == 0
+    assert scene.get_component(entity2, InfoComponent) is None
+
+def test_system_membership_index():
+    scene = Scene()
+
+    transform_system = TransformSystem([TransformComponent])
+    link_system = LinkSystem([LinkComponent, TransformComponent])
+    scene.register_system(transform_system)
+    scene.register_system(link_system)
+
+    assert scene.system_interests[TransformComponent] == [transform_system, link_system]
+    assert scene.system_interests[LinkComponent] == [link_system]
+
+    entities = []
+    for i in range(4):
+        entity = scene.enroll_entity()
+        scene.add_component(entity, TransformComponent(glm.vec3(i, 0, 0), glm.vec3(0, 0, 0), glm.vec3(1, 1, 1)))
+        entities.append(entity)
+
+    assert transform_system.get_filtered_entities() == entities
+    assert len(link_system.get_filtered_entities()) == 0
+
+    # Removing an entity swaps the last one into its slot and keeps the index consistent.
+    scene.remove_component(entities[1], TransformComponent)
+    assert transform_system.get_filtered_entities() == [entities[0], entities[3], entities[2]]
+    for index, entity in enumerate(transform_system.get_filtered_entities()):
+        assert transform_system.entity_indices[entity.index] == index
+        assert transform_system.get_filtered_components()[index][0] is scene.get_component(entity, TransformComponent)
+
+    assert transform_system.remove_entity_components(entities[1], TransformComponent) is False
+
+def test_entity_handles():
+    scene = Scene()
+
+    entity1 = scene.enroll_entity()
+    entity2 = scene.enroll_entity()
+    assert (entity1.index, entity1.generation) == (0, 0)
+    assert (entity2.index, entity2.generation) == (1, 0)
+    assert entity1.persistent_id is None
+
+    scene.add_component(entity1, InfoComponent('e1'))
+    scene.destroy_entity(entity1)
+    assert scene.is_alive(entity1) is False
+
+    # The index of the destroyed entity is reused with a new generation, so the stale handle is detected.
+    entity3 = scene.enroll_entity()
+    assert entity3.index == entity1.index and entity3.generation == entity1.generation + 1
+    assert entity3 != entity1
+    assert scene.get_component(entity1, EditorVisibleComponent) is None
+    assert scene.get_component(entity3, EditorVisibleComponent) is not None
+    assert scene.add_component(entity1, InfoComponent('stale')) is None
+    assert scene.has_component(entity3, InfoComponent) is False
+
+    # Persistent ids are only generated when requested.
+    assert entity2.id is not None and entity2.id == entity2.persistent_id
+
+def test_batched_system():
+    class MoveSystem(System):
+        def on_create_entity(self, entity, components):
+            pass
+
+        def on_update_batch(self, ts, entities, columns):
+            info, transform = columns
+            self.batches.append(list(entities))
+            assert isinstance(info, list)
+            transform.write('translation', transform['translation'] + np.array([1.0, 0.0, 0.0], dtype=np.float32) * ts)
+
+    scene = Scene()
+
+    entities = []
+    for i in range(3):
+        entity = scene.enroll_entity()
+        scene.add_component(entity, InfoComponent(f'e{i}'))
+        scene.add_component(entity, TransformComponent(glm.vec3(i, 0, 0), glm.vec3(0, 0, 0), glm.vec3(1, 1, 1)))
+        entities.append(entity)
+
+    # An entity with an extra component is stored in a different archetype.
+    scene.add_component(entities[2], LinkComponent(None))
+
+    move_system = MoveSystem([InfoComponent, TransformComponent])
+    move_system.batches = []
+    scene.register_system(move_system)
+
+    assert move_system.batched is True
+    assert LinkSystem([LinkComponent, TransformComponent]).batched is False
+
+    move_system.on_update_base(2.0)
+
+    assert sorted(len(batch) for batch in move_system.batches) == [1, 2]
+    for i, entity in enumerate(entities):
+        translation = scene.get_component(entity, TransformComponent).translation
+        assert isinstance(translation, glm.vec3)
+        assert translation == glm.vec3(i + 2, 0, 0)
+
+def test_batched_transform_system():
+    scene = Scene()
+
+    entities = []
+    for i in range(3):
+        entity = scene.enroll_entity()
+        scene.add_component(entity, TransformComponent(glm.vec3(i, 1, 2), glm.vec3(30 * i, 45, 60), glm.vec3(1, 2, 3)))
+        entities.append(entity)
+
+    transform_system = TransformSystem([TransformComponent])
+    scene.register_system(transform_system)
+    transform_system.on_create_base()
+
+    transform_system.on_update_base(0.0)
+
+    for entity in entities:
+        transform = scene.get_component(entity, TransformComponent)
+        T = glm.translate(glm.mat4(1.0), transform.translation)
+        R = glm.quat(glm.radians(transform.rotation))
+        S = glm.scale(glm.mat4(1.0), transform.scale)
+        assert np.allclose(transform.local_matrix, T * glm.mat4(R) * S, atol=1e-5)
+        assert transform.world_matrix == transform.local_matrix
+        assert transform.dirty is True
+
+    # Only the transforms whose translation, rotation or scale changed are recomputed.
+    moved = scene.get_component(entities[1], TransformComponent)
+    moved.translation.x += 5.0
+    static = scene.get_component(entities[2], TransformComponent)
+    static.static = True
+    static.translation.x += 5.0
+    unchanged = scene.get_component(entities[0], TransformComponent)
+    unchanged_matrix = unchanged.local_matrix
+
+    transform_system.on_update_base(0.0)
+
+    assert moved.dirty is True and moved.local_matrix[3].x == 6.0
+    assert static.dirty is False and static.local_matrix[3].x == 2.0
+    assert unchanged.dirty is False and unchanged.local_matrix is unchanged_matrix
+
+    # A structural change only rebuilds the appended or moved rows of the archetype.
+    moved_matrix = moved.local_matrix
+    spawned_entity = scene.enroll_entity()
+    spawned = scene.add_component(spawned_entity, TransformComponent(glm.vec3(7, 0, 0), glm.vec3(0, 0, 0), glm.vec3(1, 1, 1)))
+    assert scene.get_entity_location(spawned_entity)[0] is scene.get_entity_location(entities[0])[0]
+
+    transform_system.on_update_base(0.0)
+
+    assert spawned.dirty is True and spawned.local_matrix[3].x == 7.0
+    assert unchanged.local_matrix is unchanged_matrix and moved.local_matrix is moved_matrix
+    assert moved.dirty is False
+
+    # The last row is moved into the row of a destroyed entity and rebuilt.
+    spawned_matrix = spawned.local_matrix
+    scene.destroy_entity(entities[0])
+    assert scene.get_entity_location(spawned_entity)[1] == 0
+
+    transform_system.on_update_base(0.0)
+
+    assert spawned.local_matrix is not spawned_matrix and spawned.local_matrix == spawned_matrix
+    assert moved.local_matrix is moved_matrix
+    assert len(transform_system.previous_inputs) == 1
+
+    # The previous inputs of archetypes without transforms are dropped.
+    for entity in [entities[1], entities[2], spawned_entity]:
+        scene.destroy_entity(entity)
+    transform_system.on_update_base(0.0)
+    assert len(transform_system.previous_inputs) == 0
+
+def test_flattened_hierachy():
+    Application().set_is_running(False)
+
+    scene = Scene()
+
+    # A chain root -> child -> grandchild, plus a second root.
+    root = scene.enroll_entity()
+    root_transform = scene.add_component(root, TransformComponent(glm.vec3(1, 0, 0), glm.vec3(0, 0, 0), glm.vec3(1, 1, 1)))
+    scene.add_component(root, LinkComponent(None))
+
+    child = scene.enroll_entity()
+    child_transform = scene.add_component(child, TransformComponent(glm.vec3(0, 2, 0), glm.vec3(0, 90, 0), glm.vec3(2, 2, 2)))
+    scene.add_component(child, LinkComponent(root))
+
+    grandchild = scene.enroll_entity()
+    grandchild_transform = scene.add_component(grandchild, TransformComponent(glm.vec3(0, 0, 3), glm.vec3(0, 0, 0), glm.vec3(1, 1, 1)))
+    scene.add_component(grandchild, LinkComponent(child))
+
+    other = scene.enroll_entity()
+    other_transform = scene.add_component(other, TransformComponent(glm.vec3(5, 0, 0), glm.vec3(0, 0, 0), glm.vec3(1, 1, 1)))
+    scene.add_component(other, LinkComponent(None))
+
+    scene.register_system(TransformSystem([TransformComponent]))
+    scene.register_system(LinkSystem([LinkComponent, TransformComponent]))
+
+    SceneManager().add_scene(scene)
+    scene.on_create()
+
+    def expected_world(transforms):
+        world = glm.mat4(1.0)
+        for transform in transforms:
+            world = world * transform.local_matrix
+        return world
+
+    scene.on_update(0.0)
+
+    link_system = scene.get_system(LinkSystem)
+    assert len(link_system.levels) == 3
+    assert all(link_system.parents[position] < position for position in range(len(link_system.order)))
+    assert np.allclose(grandchild_transform.world_matrix, expected_world([root_transform, child_transform, grandchild_transform]), atol=1e-5)
+
+    # Moving the root updates the world matrices of its whole subtree only.
+    root_transform.translation.x = 10.0
+    other_world = other_transform.world_matrix
+    scene.on_update(0.0)
+
+    assert np.allclose(child_transform.world_matrix, expected_world([root_transform, child_transform]), atol=1e-5)
+    assert np.allclose(grandchild_transform.world_matrix, expected_world([root_transform, child_transform, grandchild_transform]), atol=1e-5)
+    assert other_transform.world_matrix is other_world
+
+    # Reparenting rebuilds the hierachy.
+    scene.get_component(grandchild, LinkComponent).parent = other
+    scene.on_update(0.0)
+
+    assert grandchild in scene.get_component(other, LinkComponent).children
+    assert grandchild not in scene.get_component(child, LinkComponent).children
+    assert np.allclose(grandchild_transform.world_matrix, expected_world([other_transform, grandchild_transform]), atol=1e-5)
+
+    Application().set_is_running(False)
+    SceneManager().clean()
+
+def test_entity_id_index():
+    Application().set_is_running(False)
+
+    scene = Scene()
+
+    # Enrolling with a uuid indexes the entity, lazily generated ids are indexed as soon as they are generated.
+    id = uuid.uuid4()
+    loaded = scene.enroll_entity_with_uuid(id)
+    created = scene.enroll_entity()
+    assert len(scene.entity_ids) == 1
+
+    assert scene.find_entity(id) == loaded
+    assert scene.entity_ids[created.id] == created
+    assert scene.find_entity(created.id) == created
+    assert scene.find_entity(uuid.uuid4()) is None
+
+    # Assigning a new id replaces the previous one in the index.
+    other = scene.enroll_entity()
+    previous_id = other.id
+    other.id = uuid.uuid4()
+    assert scene.find_entity(previous_id) is None
+    assert scene.find_entity(other.id) == other
+    assert 'id_index' not in other.__getstate__()
+    scene.destroy_entity(other)
+
+    # A child linked through its serialized parent id, before the parent has its link component.
+    scene.add_component(created, TransformComponent(glm.vec3(0, 0, 0), glm.vec3(0, 0, 0), glm.vec3(1, 1, 1)))
+    link = LinkComponent(None)
+    link.parent_id = id
+    scene.add_component(created, link)
+
+    scene.add_component(loaded, TransformComponent(glm.vec3(0, 0, 0), glm.vec3(0, 0, 0), glm.vec3(1, 1, 1)))
+    scene.add_component(loaded, LinkComponent(None))
+
+    scene.register_system(LinkSystem([LinkComponent, TransformComponent]))
+    SceneManager().add_scene(scene)
+    scene.on_create()
+
+    assert link.parent == loaded
+    assert scene.get_children(loaded) == [created]
+    assert scene.get_component(loaded, LinkComponent).children == [created]
+
+    # Destroying the child unregisters it from its parent and from the id index.
+    created_id = created.id
+    scene.destroy_entity(created)
+
+    assert scene.get_children(loaded) == []
+    assert scene.get_component(loaded, LinkComponent).children == []
+    assert scene.find_entity(created_id) is None
+    assert scene.get_entities() == [loaded]
+
+    Application().set_is_running(False)
+    SceneManager().clean()
+
+def test_cached_query():
+    scene = Scene()
+
+    entities = [scene.enroll_entity() for _ in range(4)]
+    for entity in entities:
+        scene.add_component(entity, TransformComponent(glm.vec3(0, 0, 0), glm.vec3(0, 0, 0), glm.vec3(1, 1, 1)))
+    for entity in entities[:2]:
+        scene.add_component(entity, InfoComponent('Info'))
+    scene.add_component(entities[0], LinkComponent(None))
+
+    query = scene.query(TransformComponent, InfoComponent, without=(LinkComponent,))
+    assert scene.query(TransformComponent, InfoComponent, without=(LinkComponent,)) is query
+    assert [entity for entity, _ in query] == [entities[1]]
+
+    entity, (transform, info) = next(iter(query))
+    assert transform is scene.get_component(entities[1], TransformComponent)
+    assert info is scene.get_component(entities[1], InfoComponent)
+
+    # The result is not gathered again when nothing structural changes.
+    components = query.get_components()
+    assert query.get_components() is components
+
+    # Structural changes to the matching archetypes, or new matching archetypes, invalidate the result.
+    scene.add_component(entities[2], InfoComponent('Info'))
+    assert set(query.get_entities()) == { entities[1], entities[2] }
+
+    scene.remove_component(entities[0], LinkComponent)
+    assert set(query.get_entities()) == { entities[0], entities[1], entities[2] }
+
+    scene.destroy_entity(entities[1])
+    assert len(query) == 2
+
+    assert [entity for entity, _ in scene.query(InfoComponent, without=(TransformComponent,))] == []
+
+def test_change_ticks():
+    Application().set_is_running(False)
+
+    class ChangedOnlySystem(System):
+        update_changed_only = True
+
+        def on_create_entity(self, entity, components):
+            pass
+
+        def on_update_system(self, ts):
+            self.updated = []
+
+        def on_update_entity(self, ts, entity, components):
+            self.updated.append(entity)
+
+    scene = Scene()
+
+    entities = [scene.enroll_entity() for _ in range(4)]
+    for entity in entities:
+        scene.add_component(entity, InfoComponent('Info'))
+
+    system = ChangedOnlySystem([InfoComponent])
+    scene.register_system(system)
+
+    # Newly added components count as changed once.
+    scene.on_update(0.0)
+    assert system.updated == entities
+
+    scene.on_update(0.0)
+    assert system.updated == []
+
+    # Only the marked components are processed, changes made between updates are not missed.
+    scene.mark_changed(entities[2], InfoComponent)
+    scene.on_update(0.0)
+    assert system.updated == [entities[2]]
+
+    # Paused systems see the changes that happened while they did not run.
+    system.state = SystemState.PAUSE
+    scene.mark_changed(entities[1], InfoComponent)
+    scene.on_update(0.0)
+    system.state = SystemState.PLAY
+    scene.on_update(0.0)
+    assert system.updated == [entities[1]]
+
+    # Changes made by earlier systems of the same update are visible to later systems.
+    scene = Scene()
+    entity = scene.enroll_entity()
+    transform = scene.add_component(entity, TransformComponent(glm.vec3(0, 0, 0), glm.vec3(0, 0, 0), glm.vec3(1, 1, 1)))
+
+    scene.register_system(TransformSystem([TransformComponent]))
+    observer = ChangedOnlySystem([TransformComponent])
+    scene.register_system(observer)
+    scene.on_create()
+
+    scene.on_update(0.0)
+    scene.on_update(0.0)
+    assert observer.updated == []
+
+    transform.translation.x = 1.0
+    scene.on_update(0.0)
+    assert observer.updated == [entity]
+
+    Application().set_is_running(False)
+
+def test_command_buffer():
+    Application().set_is_running(False)
+
+    class ProjectileSystem(System):
+        def on_create_system(self):
+            self.created = []
+
+        def on_create_entity(self, entity, components):
+            self.created.append(entity)
+
+        def on_update_entity(self, ts, entity, components):
+            # Structural changes are recorded while iterating and applied at the end of the update.
+            info = components[0]
+            if info.tag == 'expired':
+                scene.commands.destroy(entity)
+                scene.commands.spawn(InfoComponent('spawned'), TransformComponent(glm.vec3(0, 0, 0), glm.vec3(0, 0, 0), glm.vec3(1, 1, 1)))
+
+    scene = Scene()
+
+    entities = [scene.enroll_entity() for _ in range(6)]
+    for index, entity in enumerate(entities):
+        scene.add_component(entity, InfoComponent('expired' if index % 2 == 0 else 'alive'))
+        scene.add_component(entity, TransformComponent(glm.vec3(0, 0, 0), glm.vec3(0, 0, 0), glm.vec3(1, 1, 1)))
+
+    system = ProjectileSystem([InfoComponent, TransformComponent])
+    scene.register_system(system)
+    scene.on_create()
+    system.created = []
+
+    scene.on_update(0.0)
+
+    assert all(not scene.is_alive(entity) for entity in entities[0::2])
+    assert all(scene.is_alive(entity) for entity in entities[1::2])
+    assert len(system.created) == 3
+    assert len(system.get_filtered_entities()) == 6
+    assert sorted(scene.get_component(entity, InfoComponent).tag for entity in system.get_filtered_entities()) == ['alive'] * 3 + ['spawned'] * 3
+    assert all(scene.has_component(entity, EditorVisibleComponent) for entity in system.created)
+
+    # Commands of the same entity are collapsed into a single move.
+    entity = entities[1]
+    archetype, _ = scene.get_entity_location(entity)
+    scene.commands.remove_component(entity, TransformComponent)
+    scene.commands.add_component(entity, LinkComponent(None))
+    scene.commands.remove_component(entity, LinkComponent)
+    assert scene.has_component(entity, TransformComponent)
+
+    version = archetype.version
+    scene.commands.flush()
+
+    assert archetype.version == version + 1
+    assert not scene.has_component(entity, TransformComponent)
+    assert not scene.has_component(entity, LinkComponent)
+    assert entity not in system.get_filtered_entities()
+
+    # Destroying a spawned entity before the flush releases its handle.
+    spawned = scene.commands.spawn(InfoComponent('never'))
+    scene.commands.destroy(spawned)
+    scene.commands.flush()
+    assert not scene.is_alive(spawned)
+    assert spawned not in scene.get_entities()
+
+    Application().set_is_running(False)
+
+def test_structural_changes_during_update():
+    Application().set_is_running(False)
+
+    class ExpireSystem(System):
+        def on_create_system(self):
+            self.visited = []
+
+        def on_create_entity(self, entity, components):
+            pass
+
+        def on_update_entity(self, ts, entity, components):
+            # Destroying directly while iterating is deferred, so no entity is skipped.
+            self.visited.append(components.tag)
+            if components.tag == '0':
+                scene.destroy_entity(entity)
+                scene.remove_component(entities[1], InfoComponent)
+                scene.add_component(entities[2], LinkComponent(None))
+                assert scene.is_alive(entity)
+
+                # A component added and removed in the same update is not kept, and one removed and added again is replaced.
+                scene.add_component(entities[3], TransformComponent(glm.vec3(0, 0, 0), glm.vec3(0, 0, 0), glm.vec3(1, 1, 1)))
+                scene.remove_component(entities[3], TransformComponent)
+                scene.remove_component(entities[2], InfoComponent)
+                scene.add_component(entities[2], replacement)
+
+    scene = Scene()
+    replacement = InfoComponent('2')
+
+    entities = [scene.enroll_entity() for _ in range(4)]
+    for index, entity in enumerate(entities):
+        scene.add_component(entity, InfoComponent(str(index)))
+
+    system = ExpireSystem([InfoComponent])
+    scene.register_system(system)
+    scene.on_create()
+
+    scene.on_update(0.0)
+
+    assert system.visited == ['0', '1', '2', '3']
+    assert not scene.is_alive(entities[0])
+    assert not scene.has_component(entities[1], InfoComponent)
+    assert scene.has_component(entities[2], LinkComponent)
+    assert scene.get_component(entities[2], InfoComponent) is replacement
+    assert not scene.has_component(entities[3], TransformComponent)
+    assert scene.is_updating is False
+    assert sorted(system.get_filtered_entities(), key=lambda entity: entity.index) == [entities[2], entities[3]]
+
+    Application().set_is_running(False)
+
+def test_spawn_batch():
+    Application().set_is_running(False)
+
+    class CountingSystem(System):
+        def on_create_entity(self, entity, components):
+            pass
+
+        def on_create_batch(self, entities, components):
+            self.batches.append(len(entities))
+
+    scene = Scene()
+
+    transform_system = TransformSystem([TransformComponent])
+    counting_system = CountingSystem([InfoComponent, TransformComponent])
+    counting_system.batches = []
+    scene.register_system(transform_system)
+    scene.register_system(counting_system)
+    scene.on_create()
+
+    count = 100
+    translations = np.random.rand(count, 3).astype(np.float32)
+    entities = scene.spawn_batch(count, {
+        TransformComponent: { 'translation': translations, 'rotation': np.zeros((count, 3)), 'scale': (1.0, 1.0, 1.0), 'static': True },
+        InfoComponent: lambda index: InfoComponent(f'Particle{index}'),
+    })
+
+    assert len(entities) == count
+    assert all(scene.is_alive(entity) for entity in entities)
+    assert scene.get_entities()[-count:] == entities
+    assert len({ scene.get_entity_location(entity)[0] for entity in entities }) == 1
+
+    transform = scene.get_component(entities[42], TransformComponent)
+    assert isinstance(transform.translation, glm.vec3)
+    assert np.allclose(transform.translation, translations[42])
+    assert transform.static is True
+    assert scene.get_component(entities[42], InfoComponent).tag == 'Particle42'
+    assert scene.has_component(entities[42], EditorVisibleComponent)
+
+    # Each interested system is notified once with the whole batch.
+    assert counting_system.batches == [count]
+    assert len(transform_system.get_filtered_entities()) == count
+    assert np.allclose(transform.local_matrix, glm.translate(glm.mat4(1.0), transform.translation), atol=1e-6)
+
+    # Components can also be given as lists, with one component per entity.
+    infos = [InfoComponent(str(index)) for index in range(3)]
+    assert scene.spawn_batch(3, { InfoComponent: infos })[1] is not None
+    assert scene.spawn_batch(2, { InfoComponent: infos }) == []
+
+    Application().set_is_running(False)
+
+def test_spawn_batch_during_update():
+    Application().set_is_running(False)
+
+    class EmitterSystem(System):
+        def on_create_entity(self, entity, components):
+            pass
+
+        def on_create_batch(self, entities, components):
+            self.batches.append(len(entities))
+
+        def on_update_batch(self, ts, entities, columns):
+            # The spawned batch is stored at the end of the update, so the iterated archetype does not grow.
+            self.rows.append(len(entities))
+            spawned = scene.spawn_batch(3, { InfoComponent: lambda index: InfoComponent(f'Spawned{index}') })
+            self.spawned.extend(spawned)
+            scene.destroy_entity(spawned[0])
+            assert len(entities) == self.rows[-1]
+            assert scene.get_entity_location(spawned[1]) is None
+
+    scene = Scene()
+    entity = scene.enroll_entity()
+    scene.add_component(entity, InfoComponent('Emitter'))
+
+    system = EmitterSystem([InfoComponent])
+    system.batches, system.rows, system.spawned = [], [], []
+    scene.register_system(system)
+    scene.on_create()
+
+    scene.on_update(0.0)
+
+    assert system.rows == [1]
+    assert system.batches == [2]
+    assert not scene.is_alive(system.spawned[0])
+    assert all(scene.is_alive(entity) and scene.get_entity_location(entity) is not None for entity in system.spawned[1:])
+    assert scene.get_component(system.spawned[2], InfoComponent).tag == 'Spawned2'
+    assert len(system.get_filtered_entities()) == 3
+
+    Application().set_is_running(False)
+
+def test_system_scheduler():
+    Application().set_is_running(False)
+
+    import threading
+
+    class AccessSystem(System):
+        def on_create_entity(self, entity, components):
+            pass
+
+        def on_update_system(self, ts):
+            self.thread = threading.current_thread()
+            self.barrier.wait(timeout=5)
+
+    class ExclusiveSystem(System):
+        def on_create_entity(self, entity, components):
+            pass
+
+    scene = Scene()
+    entity = scene.enroll_entity()
+    scene.add_component(entity, TransformComponent(glm.vec3(0, 0, 0), glm.vec3(0, 0, 0), glm.vec3(1, 1, 1)))
+    scene.add_component(entity, InfoComponent('Info'))
+    scene.add_component(entity, LinkComponent(None))
+
+    transform_system = TransformSystem([TransformComponent])
+    link_system = LinkSystem([LinkComponent, TransformComponent])
+    info_reader = AccessSystem([InfoComponent], reads=(InfoComponent,))
+    transform_reader = AccessSystem([TransformComponent], reads=(TransformComponent,))
+    exclusive_system = ExclusiveSystem([InfoComponent])
+    info_writer = AccessSystem([InfoComponent], writes=(InfoComponent,))
+
+    for system in [transform_system, info_reader, link_system, transform_reader, exclusive_system, info_writer]:
+        scene.register_system(system)
+
+    # Systems are placed after the earlier systems they conflict with, exclusive systems are alone in their stage.
+    assert scene.get_stages() == [[transform_system, info_reader], [link_system], [transform_reader], [exclusive_system], [info_writer]]
+    assert 'Stage 0: TransformSystem' in scene.scheduler.describe()
+    assert 'ExclusiveSystem(exclusive)' in scene.scheduler.describe()
+
+    SceneManager().add_scene(scene)
+    scene.on_create()
+
+    # The systems of a stage are updated concurrently, each one waits for the other on a barrier.
+    scene.scheduler.max_workers = 2
+    scene.scheduler.build([info_reader, transform_reader])
+    scene.systems = [info_reader, transform_reader]
+    info_reader.barrier = transform_reader.barrier = threading.Barrier(2)
+    scene.on_update(0.0)
+
+    assert info_reader.thread is threading.main_thread()
+    assert transform_reader.thread is not threading.main_thread()
+    executor = scene.scheduler.executor
+    assert executor is not None
+
+    # Cleaning the scene manager stops the threads of its scenes.
+    Application().set_is_running(False)
+    SceneManager().clean()
+    assert scene.scheduler.executor is None
+    assert executor._shutdown
+
+def test_fixed_timestep():
+    Application().set_is_running(False)
+
+    class CountingSystem(System):
+        def on_create_entity(self, entity, components):
+            pass
+
+        def on_update_system(self, ts):
+            self.timesteps.append(ts)
+
+    class FrameSystem(CountingSystem):
+        update_per_frame = True
+
+    class SlowSystem(CountingSystem):
+        tick_rate = 10.0
+
+    scene = Scene()
+    entity = scene.enroll_entity()
+    transform = scene.add_component(entity, TransformComponent(glm.vec3(0, 0, 0), glm.vec3(0, 0, 0), glm.vec3(1, 1, 1)))
+
+    simulation_system = CountingSystem([InfoComponent])
+    frame_system = FrameSystem([InfoComponent])
+    slow_system = SlowSystem([InfoComponent])
+    for system in [TransformSystem([TransformComponent]), simulation_system, frame_system, slow_system]:
+        system.timesteps = []
+        scene.register_system(system)
+
+    SceneManager().add_scene(scene)
+    scene.on_create()
+
+    Application().set_fixed_timestep(60.0, max_steps=5)
+
+    # Two simulation steps fit in a frame of 1/30 seconds, the per frame systems are updated once.
+    Application().fixed_update(1.0 / 30.0 + 1e-6)
+    assert simulation_system.timesteps == pytest.approx([1.0 / 60.0] * 2)
+    assert frame_system.timesteps == pytest.approx([1.0 / 30.0 + 1e-6])
+
+    # The simulation steps of a long frame are capped and the rest are dropped.
+    Application().fixed_update(1.0 + 1.0 / 120.0)
+    assert len(simulation_system.timesteps) == 2 + 5
+    assert Application().get_interpolation_alpha() == pytest.approx(0.5, abs=1e-3)
+
+    # Systems with a tick rate are updated once every enough simulation steps.
+    assert slow_system.timesteps == pytest.approx([0.1])
+
+    # Rendering interpolates between the last two simulation steps.
+    transform.translation.x = 1.0
+    Application().fixed_update(1.0 / 60.0)
+    assert transform.get_interpolated_world_matrix(0.0)[3][0] == pytest.approx(0.0)
+    assert transform.get_interpolated_world_matrix(0.5)[3][0] == pytest.approx(0.5)
+    assert transform.get_interpolated_world_matrix(1.0)[3][0] == pytest.approx(1.0)
+
+    Application().set_fixed_timestep(None)
+    Application().set_is_running(False)
+    SceneManager().clean()
+
+def test_render_context():
+    Application().set_is_running(False)
+
+    from pyGandalf.scene.render_context import RenderContext
+    from pyGandalf.scene.components import CameraComponent, LightComponent
+    from pyGandalf.systems.camera_system import CameraSystem
+    from pyGandalf.systems.light_system import LightSystem
+
+    scene = Scene()
+
+    camera = scene.enroll_entity()
+    scene.add_component(camera, TransformComponent(glm.vec3(0, 0, 5), glm.vec3(0, 0, 0), glm.vec3(1, 1, 1)))
+    scene.add_component(camera, CameraComponent(45, 1.778, 0.1, 1000, 1.2, CameraComponent.Type.PERSPECTIVE))
+
+    light_transforms = []
+    for position in [glm.vec3(1, 10, 2), glm.vec3(3, 3, 3)]:
+        light = scene.enroll_entity()
+        light_transforms.append(scene.add_component(light, TransformComponent(position, glm.vec3(0, 0, 0), glm.vec3(1, 1, 1))))
+        scene.add_component(light, LightComponent(glm.vec3(1.0, 0.5, 0.25), 0.75))
+
+    scene.register_system(TransformSystem([TransformComponent]))
+    scene.register_system(CameraSystem([CameraComponent, TransformComponent]))
+    scene.register_system(LightSystem([LightComponent, TransformComponent]))
+
+    SceneManager().add_scene(scene)
+    scene.on_create()
+    scene.on_update(0.0)
+
+    RenderContext().invalidate()
+    context = RenderContext().get()
+
+    main_camera = SceneManager().get_main_camera()
+    assert context.camera is main_camera
+    assert context.view_projection == main_camera.projection * main_camera.view
+    assert context.light_count == 2
+    assert np.allclose(context.light_positions_vec4, [tuple(transform.get_world_position()) + (1.0,) for transform in light_transforms])
+    assert np.allclose(context.light_intensities, [0.75, 0.75])
+    assert context.light_space_matrix == main_camera.projection * glm.lookAt(light_transforms[0].get_world_position(), glm.vec3(0.0), glm.vec3(0.0, 1.0, 0.0))
+
+    # The context is only built again after it is invalidated at the beginning of the next frame.
+    light_positions = context.light_positions
+    assert RenderContext().get().light_positions is light_positions
+    RenderContext().invalidate()
+    assert RenderContext().get().light_positions is not light_positions
+
+    RenderContext().invalidate()
+    Application().set_is_running(False)
+    SceneManager().clean()
+
+def test_camera_system():
+    Application().set_is_running(False)
+
+    from pyGandalf.scene.components import CameraComponent
+    from pyGandalf.systems.camera_system import CameraSystem
+
+    scene = Scene()
+
+    cameras = []
+    for primary in [True, False]:
+        entity = scene.enroll_entity()
+        scene.add_component(entity, TransformComponent(glm.vec3(0, 0, 5), glm.vec3(0, 0, 0), glm.vec3(1, 1, 1)))
+        cameras.append(scene.add_component(entity, CameraComponent(45, 1.778, 0.1, 1000, 1.2, CameraComponent.Type.PERSPECTIVE, primary)))
+
+    scene.register_system(TransformSystem([TransformComponent]))
+    scene.register_system(CameraSystem([CameraComponent, TransformComponent]))
+
+    SceneManager().add_scene(scene)
+    scene.on_create()
+    scene.on_update(0.0)
+
+    assert SceneManager().get_main_camera() is cameras[0]
+
+    # Fields that are set directly, without marking the camera as changed, are still applied.
+    projection = cameras[0].projection
+    scene.on_update(0.0)
+    assert cameras[0].projection is projection
+
+    cameras[0].fov = 90
+    cameras[0].primary = False
+    cameras[1].primary = True
+    scene.on_update(0.0)
+
+    assert cameras[0].projection == glm.perspective(glm.radians(90), 1.778, 0.1, 1000)
+    assert SceneManager().get_main_camera() is cameras[1]
+
+    Application().set_is_running(False)
+    SceneManager().clean()
@@ -0,0 +1,282 @@
+from pyGandalf.renderer.opengl_renderer import OpenGLRenderer
+from pyGandalf.scene.components import StaticMeshComponent
+from pyGandalf.utilities.opengl_material_lib import MaterialDescriptor, MaterialData, MaterialInstance
+from pyGandalf.utilities.opengl_shader_lib import OpenGLShaderLib, UniformBuffer
+from pyGandalf.utilities.opengl_texture_lib import OpenGLTextureLib, TextureData
+from pyGandalf.renderer.vertex_layout import VertexFormat, QUANTIZED_VERTEX_LAYOUT, build_vertex_buffer, build_index_buffer, VertexLayoutDescriptor
+
+from unittest import mock
+
+import numpy as np
+import OpenGL.GL as gl
+import glm
+
+class MaterialInstanceStub:
+    def __init__(self, name, shader_program, descriptor = MaterialDescriptor()):
+        self.name = name
+        self.shader_program = shader_program
+        self.descriptor = descriptor
+        self.data = mock.Mock(textures=[])
+        self.uniform_buffer = None
+
+class MaterialStub:
+    def __init__(self, instance):
+        self.instance = instance
+
+class MeshStub:
+    def __init__(self, render_pipeline):
+        self.render_pipeline = render_pipeline
+
+def test_opengl_renderer_state_cache():
+    with mock.patch('pyGandalf.renderer.opengl_renderer.gl') as gl_mock, mock.patch('pyGandalf.renderer.opengl_renderer.OpenGLMaterialLib'):
+        gl_mock.GL_TRUE = gl.GL_TRUE
+        gl_mock.GL_FALSE = gl.GL_FALSE
+
+        OpenGLRenderer().initialize(False)
+        OpenGLRenderer().reset_counts()
+
+        material1 = MaterialStub(MaterialInstanceStub('M_Stub1', 3))
+        material2 = MaterialStub(MaterialInstanceStub('M_Stub2', 3))
+        mesh1 = MeshStub(1)
+        mesh2 = MeshStub(2)
+
+        # Same program and state for all the draws, only the vao changes between the meshes
+        for mesh, material in [(mesh1, material1), (mesh1, material2), (mesh2, material1), (mesh2, material2)]:
+            OpenGLRenderer().set_pipeline(mesh)
+            OpenGLRenderer().set_buffers(mesh)
+            OpenGLRenderer().set_bind_groups(material)
+
+        assert gl_mock.glUseProgram.call_count == 1
+        assert gl_mock.glBindVertexArray.call_count == 2
+        assert gl_mock.glDepthFunc.call_count == 1
+        assert gl_mock.glCullFace.call_count == 1
+        assert gl_mock.glDepthMask.call_count == 1
+        assert gl_mock.glEnable.call_count == 3
+        assert gl_mock.glVertexAttribPointer.call_count == 0
+
+        assert OpenGLRenderer().get_call_counts()['glUseProgram'] == 1
+        assert OpenGLRenderer().get_skipped_counts()['glUseProgram'] == 3
+        assert OpenGLRenderer().get_call_counts()['glBindVertexArray'] == 2
+        assert OpenGLRenderer().get_skipped_counts()['glBindVertexArray'] == 2
+
+        # A material with a different descriptor only changes the state that differs
+        descriptor = MaterialDescriptor()
+        descriptor.cull_enabled = False
+        descriptor.depth_mask = gl.GL_FALSE
+        OpenGLRenderer().set_bind_groups(MaterialStub(MaterialInstanceStub('M_Stub3', 3, descriptor)))
+
+        assert gl_mock.glDisable.call_count == 1
+        assert gl_mock.glDepthMask.call_count == 2
+        assert gl_mock.glUseProgram.call_count == 1
+
+        # Once invalidated, the state is issued again
+        OpenGLRenderer().invalidate_state()
+        OpenGLRenderer().set_bind_groups(material1)
+
+        assert gl_mock.glUseProgram.call_count == 2
+        assert gl_mock.glDepthMask.call_count == 3
+
+def test_opengl_renderer_texture_bindings():
+    with mock.patch('pyGandalf.renderer.opengl_renderer.gl') as gl_mock, mock.patch('pyGandalf.utilities.opengl_texture_lib.gl') as texture_gl_mock:
+        texture_gl_mock.glGenTextures.return_value = 7
+        texture_gl_mock.GL_TEXTURE_2D = gl.GL_TEXTURE_2D
+
+        OpenGLRenderer().initialize(False)
+        OpenGLRenderer().bind_texture(0, gl.GL_TEXTURE_2D, 3)
+        OpenGLRenderer().bind_texture(0, gl.GL_TEXTURE_2D, 3)
+
+        assert gl_mock.glBindTexture.call_count == 1
+
+        # Building a texture binds it on the active unit, so the tracked binding of the unit is issued again
+        OpenGLTextureLib().build('T_TrackedBindings', TextureData(image_bytes=bytes(16), width=2, height=2))
+        OpenGLRenderer().bind_texture(0, gl.GL_TEXTURE_2D, 3)
+
+        assert texture_gl_mock.glBindTexture.call_count == 2
+        assert gl_mock.glBindTexture.call_count == 2
+
+        # Textures bound through the library are tracked by the renderer
+        slot = OpenGLTextureLib().instance.textures['T_TrackedBindings'].slot
+        OpenGLTextureLib().bind('T_TrackedBindings')
+        OpenGLTextureLib().bind('T_TrackedBindings')
+
+        assert gl_mock.glBindTexture.call_count == 3
+        assert OpenGLRenderer().instance.bound_textures[slot] == (gl.GL_TEXTURE_2D, 7)
+        assert texture_gl_mock.glBindTexture.call_count == 2
+
+def test_opengl_renderer_instancing():
+    with mock.patch('pyGandalf.renderer.opengl_renderer.gl') as gl_mock:
+        OpenGLRenderer().initialize(False)
+
+        material = MaterialStub(MaterialInstanceStub('M_Instanced', 3))
+        material.instance.instance_attributes = { 'a_Model': 8, 'a_NormalMatrix': 12 }
+        mesh = MeshStub(1)
+        mesh.indices = np.zeros((4, 3), dtype=np.uint32)
+
+        OpenGLRenderer().set_instance_data(np.zeros((10, 32), dtype=np.float32))
+
+        # The per-instance attributes of the vao are enabled once and only re-pointed for the following draws
+        OpenGLRenderer().set_pipeline(mesh)
+        OpenGLRenderer().set_instance_buffers(mesh, material, 0)
+        OpenGLRenderer().draw_indexed_instanced(mesh, material, 4)
+        OpenGLRenderer().set_instance_buffers(mesh, material, 4)
+        OpenGLRenderer().draw_indexed_instanced(mesh, material, 6)
+
+        assert gl_mock.glVertexAttribDivisor.call_count == 8
+        assert gl_mock.glEnableVertexAttribArray.call_count == 8
+        assert gl_mock.glVertexAttribPointer.call_count == 16
+        assert gl_mock.glDrawElementsInstanced.call_count == 2
+        assert gl_mock.glDrawElementsInstanced.call_args[0][-1] == 6
+
+def test_opengl_renderer_mesh_cache():
+    with mock.patch('pyGandalf.renderer.opengl_renderer.gl') as gl_mock:
+        gl_mock.glGenVertexArrays.side_effect = range(1, 100)
+        gl_mock.glGenBuffers.side_effect = range(1, 100)
+        gl_mock.GLfloat = gl.GLfloat
+        gl_mock.GLuint = gl.GLuint
+
+        OpenGLRenderer().initialize(False)
+
+        material = MaterialStub(MaterialInstanceStub('M_Stub', 3))
+
+        def create_mesh(offset = 0.0):
+            vertices = np.array([[-0.5, -0.5, 0.0], [0.5, -0.5, 0.0], [0.0, 0.5, offset]], dtype=np.float32)
+            normals = np.array([[0.0, 0.0, 1.0], [0.0, 0.0, 1.0], [0.0, 0.0, 1.0]], dtype=np.float32)
+            return StaticMeshComponent('mesh', [vertices, normals], np.array([[0, 1, 2]], dtype=np.uint32))
+
+        # Meshes with the same geometry share their buffers, even if they were built from different arrays
+        meshes = [create_mesh() for _ in range(3)]
+        for mesh in meshes:
+            OpenGLRenderer().add_batch(mesh, material)
+
+        other_mesh = create_mesh(1.0)
+        OpenGLRenderer().add_batch(other_mesh, material)
+
+        assert gl_mock.glGenVertexArrays.call_count == 2
+        assert gl_mock.glBufferData.call_count == 4
+        assert len(OpenGLRenderer().mesh_cache) == 2
+        assert meshes[0].render_pipeline == meshes[1].render_pipeline == meshes[2].render_pipeline
+        assert meshes[0].render_pipeline != other_mesh.render_pipeline
+        assert meshes[0].gpu_mesh.ref_count == 3
+
+        # The buffers are deleted along with the last mesh that uses them
+        OpenGLRenderer().remove_batch(meshes[0])
+        OpenGLRenderer().remove_batch(meshes[1])
+
+        assert gl_mock.glDeleteVertexArrays.call_count == 0
+        assert meshes[0].render_pipeline is None
+
+        OpenGLRenderer().remove_batch(meshes[2])
+        OpenGLRenderer().remove_batch(meshes[2])
+
+        assert gl_mock.glDeleteVertexArrays.call_count == 1
+        assert gl_mock.glDeleteBuffers.call_count == 1
+        assert gl_mock.glDeleteBuffers.call_args[0][0] == 2
+        assert len(OpenGLRenderer().mesh_cache) == 1
+
+def test_opengl_uniform_buffer_layout():
+    shader_code = '''
+    layout(std140) uniform Lights
+    {
+        int u_LightCount;
+        vec3 u_LightPositions[16];
+        float u_LightIntensities[16];
+        mat4 u_LightSpaceMatrix;
+        vec3 u_Color;
+        float u_Glossiness;
+    };
+    '''
+    members = OpenGLShaderLib().parse(shader_code)['Lights']
+    assert members['u_LightPositions'] == 'vec3[16]'
+
+    # The offsets follow the std140 rules, array elements and matrix columns are aligned to a vec4 and a float fits after a vec3
+    uniform_buffer = UniformBuffer('Lights', members, 1)
+    assert uniform_buffer.get_offset('u_LightCount') == 0
+    assert uniform_buffer.get_offset('u_LightPositions') == 16
+    assert uniform_buffer.get_offset('u_LightIntensities') == 16 + 16 * 16
+    assert uniform_buffer.get_offset('u_LightSpaceMatrix') == 16 + 2 * 16 * 16
+    assert uniform_buffer.get_offset('u_Color') == 16 + 2 * 16 * 16 + 64
+    assert uniform_buffer.get_offset('u_Glossiness') == 16 + 2 * 16 * 16 + 64 + 12
+    assert uniform_buffer.nbytes == 16 + 2 * 16 * 16 + 64 + 16
+
+    uniform_buffer.set('u_LightCount', 2)
+    uniform_buffer.set('u_LightPositions', np.array([[1.0, 2.0, 3.0, 1.0], [4.0, 5.0, 6.0, 1.0]], dtype=np.float32))
+    uniform_buffer.set('u_LightIntensities', np.array([0.5, 0.75], dtype=np.float32))
+    uniform_buffer.set('u_LightSpaceMatrix', glm.translate(glm.mat4(1.0), glm.vec3(1.0, 2.0, 3.0)))
+
+    data = np.frombuffer(uniform_buffer.data.tobytes(), dtype=np.float32)
+    assert np.array_equal(data[4:12], [1.0, 2.0, 3.0, 1.0, 4.0, 5.0, 6.0, 1.0])
+    assert np.array_equal(data[68:76], [0.5, 0.0, 0.0, 0.0, 0.75, 0.0, 0.0, 0.0])
+
+    # Matrices are stored column major, the translation is in the last column
+    assert np.array_equal(data[132 + 12:132 + 16], [1.0, 2.0, 3.0, 1.0])
+
+    # The buffer is only uploaded when its contents change
+    with mock.patch('pyGandalf.utilities.opengl_shader_lib.gl') as gl_mock:
+        assert uniform_buffer.upload()
+        assert not uniform_buffer.upload()
+        uniform_buffer.set('u_Glossiness', 2.0)
+        assert uniform_buffer.upload()
+        assert gl_mock.glBufferSubData.call_count == 2
+
+def test_opengl_material_uniform_buffer():
+    members = OpenGLShaderLib().parse('''
+    layout(std140) uniform Material
+    {
+        vec3 u_Color;
+        float u_Glossiness;
+    };
+    ''')
+
+    # The material block starts from the values of the material data instead of zeros
+    material = MaterialInstance('M_Block', MaterialData('lit_blinn_phong', [], glm.vec4(0.5, 0.25, 1.0, 1.0)), MaterialDescriptor(), 3, uniform_blocks=members)
+    data = np.frombuffer(material.uniform_buffer.data.tobytes(), dtype=np.float32)
+
+    assert np.array_equal(data[:4], [0.5, 0.25, 1.0, 3.0])
+
+def test_opengl_instance_data_layout():
+    from pyGandalf.systems.opengl_rendering_system import OpenGLStaticMeshRenderingSystem
+
+    model = glm.translate(glm.mat4(1.0), glm.vec3(1.0, 2.0, 3.0)) * glm.scale(glm.mat4(1.0), glm.vec3(2.0, 1.0, 1.0))
+    packet = mock.Mock(model=model)
+
+    instance_data = OpenGLStaticMeshRenderingSystem.get_instance_data(None, [packet, packet])
+
+    # Each row holds the columns of the model matrix followed by the columns of the normal matrix
+    assert instance_data.shape == (2, 32)
+    assert np.array_equal(instance_data[0, 12:16], [1.0, 2.0, 3.0, 1.0])
+    assert np.allclose(instance_data[1, 16:], np.frombuffer(glm.transpose(glm.inverse(model)).to_bytes(), dtype=np.float32))
+
+def test_vertex_layout():
+    vertices = np.array([[-0.5, -0.5, 0.0], [0.5, -0.5, 0.0], [0.0, 0.5, 0.0]], dtype=np.float32)
+    normals = np.array([[0.0, 0.0, 1.0], [0.0, 1.0, 0.0], [-1.0, 0.0, 0.0]], dtype=np.float32)
+    texture_coordinates = np.array([[0.0, 0.0], [1.0, 0.0], [0.5, 1.0]], dtype=np.float32)
+
+    # The attributes are stored as float32 by default
+    vertex_data, vertex_layout = build_vertex_buffer([vertices, normals, texture_coordinates])
+    assert vertex_layout.stride == 32
+    assert [attribute.offset for attribute in vertex_layout.attributes] == [0, 12, 24]
+    assert np.array_equal(vertex_data['a_0'], vertices)
+
+    # The quantized attributes are padded to an even number of components
+    vertex_data, vertex_layout = build_vertex_buffer([vertices, normals, texture_coordinates], QUANTIZED_VERTEX_LAYOUT)
+    assert vertex_layout.stride == 20
+    assert vertex_data.nbytes == 3 * 20
+    assert [(attribute.format, attribute.components, attribute.stored_components, attribute.offset) for attribute in vertex_layout.attributes] == [
+        (VertexFormat.FLOAT16, 3, 4, 0), (VertexFormat.SNORM16, 3, 4, 8), (VertexFormat.FLOAT16, 2, 2, 16)
+    ]
+    assert np.allclose(vertex_data['a_0'][:, :3], vertices, atol=1e-3)
+    assert np.array_equal(vertex_data['a_1'][:, :3], normals * 32767)
+    assert np.array_equal(vertex_data['a_2'], texture_coordinates)
+
+    # The tiling texture coordinates keep their range in the preset, and are clamped when stored as unorm16
+    tiling_coordinates = texture_coordinates * 4.0
+    vertex_data, _ = build_vertex_buffer([vertices, normals, tiling_coordinates], QUANTIZED_VERTEX_LAYOUT)
+    assert np.array_equal(vertex_data['a_2'], tiling_coordinates)
+    vertex_data, _ = build_vertex_buffer([tiling_coordinates], VertexLayoutDescriptor((VertexFormat.UNORM16,)))
+    assert np.array_equal(vertex_data['a_0'][2], [65535, 65535])
+
+    # 16-bit indices are used whenever every vertex can be addressed with them
+    indices = build_index_buffer(np.array([[0, 1, 2]], dtype=np.uint32), 3)
+    assert indices.dtype == np.uint16
+    assert indices.nbytes % 4 == 0
+    assert build_index_buffer(np.array([0, 1, 70000]), 70001).dtype == np.uint32
@@ -9,6 +9,9 @@ from pyGandalf.core.application import Application
 from pyGandalf.core.opengl_window import OpenGLWindow
 from pyGandalf.renderer.opengl_renderer import OpenGLRenderer
 
+import glm
+import OpenGL.GL as gl
+
 Application().create(OpenGLWindow(), OpenGLRenderer)
 
 def test_opengl_texture_lib():
@@ -70,3 +73,44 @@ def test_mesh_lib():
     assert mesh1 == mesh2
     assert mesh1 != mesh3 and mesh2 != mesh3
 
+
+def test_opengl_material_uniform_cache():
+    OpenGLShaderLib().build('default_mesh', SHADERS_PATH/'opengl'/'lit_blinn_phong.vs', SHADERS_PATH/'opengl'/'lit_blinn_phong.fs')
+    OpenGLShaderLib().build('shadow_mapping', SHADERS_PATH/'opengl'/'shadow_mapping.vs', SHADERS_PATH/'opengl'/'shadow_mapping.fs')
+
+    material1 = OpenGLMaterialLib().build('M_Uniforms1', MaterialData('shadow_mapping', [], glossiness=4.0))
+    material2 = OpenGLMaterialLib().build('M_Uniforms2', MaterialData('shadow_mapping', [], glossiness=6.0))
+
+    # Uniforms are reflected once, when the program is linked
+    assert material1.has_uniform('u_Model')
+    assert material1.has_uniform('u_LightPositions')
+    assert not material1.has_uniform('u_DoesNotExist')
+    assert material1.uniforms['u_LightPositions'][3] == 16
+
+    # The values last uploaded are shared by all the materials of the same program
+    assert material1.uniform_values is material2.uniform_values
+
+    gl.glUseProgram(material1.shader_program)
+    model = glm.mat4(1.0)
+    material1.set_uniform('u_Model', model)
+    location = material1.uniforms['u_Model'][0]
+    assert material2.uniform_values[location] == bytes(model)
+
+    model[3][0] = 1.0
+    material2.set_uniform('u_Model', model)
+    assert material1.uniform_values[location] == bytes(model)
+    gl.glUseProgram(0)
+
+    # The model matrix is a per-instance attribute, so the material is drawn instanced
+    material3 = OpenGLMaterialLib().build('M_Uniforms3', MaterialData('default_mesh', []))
+    assert material3.is_instanced()
+    assert material3.instance_attributes['a_Model'] == 8
+
+    # The camera and lights are read from shared uniform buffers and the material properties from the uniform buffer of the material
+    assert not 'u_View' in material3.uniforms
+    assert OpenGLShaderLib().get_uniform_buffer('Camera').has_member('u_View')
+    assert OpenGLShaderLib().get_uniform_buffer('Lights').has_member('u_LightPositions')
+    assert material3.has_uniform('u_Color')
+
+    material3.set_uniform('u_Glossiness', 2.0)
+    assert material3.uniform_buffer['u_Glossiness'][0] == 2.0
@@ -0,0 +1,79 @@
+from pyGandalf.renderer.render_queue import RenderQueue, RenderPassType
+
+class MaterialStub:
+    def __init__(self, name):
+        self.name = name
+
+class MeshStub:
+    def __init__(self, render_pipeline):
+        self.render_pipeline = render_pipeline
+
+def test_render_queue_order():
+    queue = RenderQueue()
+
+    opaque1 = MaterialStub('M_Opaque1')
+    opaque2 = MaterialStub('M_Opaque2')
+    transparent = MaterialStub('M_Transparent')
+    mesh1 = MeshStub(1)
+    mesh2 = MeshStub(2)
+
+    # Submitted in an order that interleaves shaders, materials and meshes
+    far_opaque = queue.submit(RenderPassType.COLOR, mesh1, opaque1, None, None, 10, depth=0.8)
+    near_transparent = queue.submit(RenderPassType.COLOR, mesh2, transparent, None, None, 10, depth=0.2, transparent=True)
+    other_shader = queue.submit(RenderPassType.COLOR, mesh1, opaque2, None, None, 20, depth=0.1)
+    near_opaque = queue.submit(RenderPassType.COLOR, mesh1, opaque1, None, None, 10, depth=0.3)
+    far_transparent = queue.submit(RenderPassType.COLOR, mesh1, transparent, None, None, 10, depth=0.9, transparent=True)
+    shadow = queue.submit(RenderPassType.SHADOW, mesh1, opaque1, None, None, 30, depth=0.5)
+
+    # Shadow pass first, then the opaque draws grouped by shader and front to back, then the transparent draws back to front
+    assert queue.sort() == [shadow, near_opaque, far_opaque, other_shader, far_transparent, near_transparent]
+    assert queue.get_packets(RenderPassType.SHADOW) == [shadow]
+    assert queue.get_draw_count(RenderPassType.COLOR) == 5
+    assert queue.get_draw_count() == 6
+
+    for packet in queue.sort():
+        assert 0 <= packet.key < 2 ** 64
+
+    queue.max_draws = 2
+    queue.clear()
+    for depth in [0.5, 0.4, 0.3]:
+        queue.submit(RenderPassType.COLOR, mesh1, opaque1, None, None, 10, depth=depth)
+
+    # The draws beyond the budget are kept and the budget grows to fit them
+    assert len(queue.sort()) == 3
+    assert queue.get_draw_count(RenderPassType.COLOR) == 3
+    assert queue.max_draws == 3
+
+def test_render_queue_ids():
+    queue = RenderQueue()
+
+    material = MaterialStub('M_Opaque')
+    meshes = [MeshStub(render_pipeline) for render_pipeline in range(4)]
+
+    for mesh in meshes:
+        queue.submit(RenderPassType.COLOR, mesh, material, None, None, 10)
+
+    assert [queue.mesh_ids.ids[mesh.render_pipeline] for mesh in meshes] == [0, 1, 2, 3]
+
+    # The ids of the meshes that are no longer submitted are released and reused, so the ids stay dense
+    queue.clear()
+    queue.submit(RenderPassType.COLOR, meshes[1], material, None, None, 10)
+    queue.submit(RenderPassType.COLOR, meshes[3], material, None, None, 10)
+    queue.clear()
+
+    assert len(queue.mesh_ids) == 2
+
+    queue.submit(RenderPassType.COLOR, meshes[1], material, None, None, 10)
+    queue.submit(RenderPassType.COLOR, MeshStub(4), material, None, None, 10)
+
+    assert queue.mesh_ids.ids == { 1: 1, 3: 3, 4: 0 }
+
+    # The shaders beyond the bits of the key share the last id, instead of wrapping around to the id of another shader
+    queue.clear()
+    shader_count = (1 << RenderQueue.SHADER_BITS) + 1
+    packets = [queue.submit(RenderPassType.COLOR, meshes[0], material, None, None, shader) for shader in range(shader_count)]
+    shader_ids = [(packet.key >> (RenderQueue.MATERIAL_BITS + RenderQueue.MESH_BITS + RenderQueue.DEPTH_BITS)) & ((1 << RenderQueue.SHADER_BITS) - 1) for packet in packets]
+
+    assert len(set(shader_ids[:-2])) == shader_count - 2
+    assert shader_ids[-2] == shader_ids[-1] == (1 << RenderQueue.SHADER_BITS) - 1
+    assert len(queue.sort()) == shader_count
@@ -0,0 +1,204 @@
+from pyGandalf.renderer.webgpu_renderer import WebGPURenderer, RenderPipelineDescription
+from pyGandalf.renderer.mesh_cache import MeshCache
+from pyGandalf.renderer.vertex_layout import QUANTIZED_VERTEX_LAYOUT
+from pyGandalf.scene.components import StaticMeshComponent
+from pyGandalf.utilities.webgpu_material_lib import MaterialDescriptor
+
+from unittest import mock
+
+import numpy as np
+
+class MaterialInstanceStub:
+    def __init__(self, descriptor = MaterialDescriptor()):
+        self.shader_module = mock.sentinel.shader_module
+        self.pipeline_layout = mock.sentinel.pipeline_layout
+        self.descriptor = descriptor
+
+def initialize_renderer():
+    WebGPURenderer().device = mock.Mock()
+    WebGPURenderer().device.create_render_pipeline.side_effect = lambda **kwargs: mock.Mock()
+    WebGPURenderer().render_texture_format = 'bgra8unorm-srgb'
+    WebGPURenderer().mesh_cache = MeshCache(WebGPURenderer().create_mesh, WebGPURenderer().release_mesh)
+    WebGPURenderer().render_pipelines = {}
+
+def create_mesh(offset = 0.0, layout_descriptor = None):
+    vertices = np.array([[-0.5, -0.5, 0.0], [0.5, -0.5, 0.0], [0.0, 0.5, offset]], dtype=np.float32)
+    normals = np.array([[0.0, 0.0, 1.0], [0.0, 0.0, 1.0], [0.0, 0.0, 1.0]], dtype=np.float32)
+    return StaticMeshComponent('mesh', [vertices, normals], np.array([[0, 1, 2]], dtype=np.uint32), layout_descriptor)
+
+def test_webgpu_renderer_pipeline_cache():
+    initialize_renderer()
+
+    def create_render_pipeline(mesh, material_instance):
+        WebGPURenderer().create_buffers(mesh)
+        render_pipeline_desc = RenderPipelineDescription()
+        render_pipeline_desc.render_data = mesh
+        render_pipeline_desc.material_instance = material_instance
+        WebGPURenderer().create_render_pipeline(render_pipeline_desc)
+
+    material_instance = MaterialInstanceStub()
+    meshes = [create_mesh(), create_mesh(1.0), create_mesh(layout_descriptor=QUANTIZED_VERTEX_LAYOUT)]
+    for mesh in meshes:
+        create_render_pipeline(mesh, material_instance)
+
+    # Meshes with the same vertex layout share their render pipeline, even if their geometry differs
+    assert WebGPURenderer().device.create_render_pipeline.call_count == 2
+    assert meshes[0].render_pipeline is meshes[1].render_pipeline
+    assert meshes[0].render_pipeline is not meshes[2].render_pipeline
+
+    vertex_buffers = WebGPURenderer().device.create_render_pipeline.call_args.kwargs['vertex']['buffers']
+    assert len(vertex_buffers) == 1
+    assert vertex_buffers[0]['array_stride'] == 16
+    assert [attribute['format'] for attribute in vertex_buffers[0]['attributes']] == ['float16x4', 'snorm16x4']
+
+    # A different material descriptor needs its own render pipeline
+    descriptor = MaterialDescriptor()
+    descriptor.depth_write_enabled = False
+    create_render_pipeline(create_mesh(), MaterialInstanceStub(descriptor))
+
+    assert WebGPURenderer().device.create_render_pipeline.call_count == 3
+
+def test_webgpu_shadow_caster_cache():
+    from pyGandalf.systems.webgpu_rendering_system import WebGPUStaticMeshRenderingSystem
+
+    initialize_renderer()
+
+    system = WebGPUStaticMeshRenderingSystem.__new__(WebGPUStaticMeshRenderingSystem)
+    system.shadow_casters = {}
+    system.pre_pass_material = mock.Mock(instance=MaterialInstanceStub())
+
+    meshes = [create_mesh(), create_mesh(), create_mesh(1.0)]
+    for mesh in meshes:
+        WebGPURenderer().create_buffers(mesh)
+
+    # The shadow casters are created once per unique mesh and reused across frames
+    for _ in range(3):
+        shadow_casters = [system.get_shadow_caster(mesh) for mesh in meshes]
+
+    assert len(system.shadow_casters) == 2
+    assert shadow_casters[0] is shadow_casters[1]
+    assert len(shadow_casters[0].attributes) == 1
+    assert WebGPURenderer().device.create_render_pipeline.call_count == 1
+
+    # The shadow caster is released along with the last mesh that uses its geometry
+    key = meshes[0].gpu_mesh.key
+    WebGPURenderer().release_buffers(meshes[0])
+    system.release_shadow_caster(key)
+    assert key in system.shadow_casters
+
+    WebGPURenderer().release_buffers(meshes[1])
+    system.release_shadow_caster(key)
+    assert key not in system.shadow_casters
+    assert shadow_casters[0].gpu_mesh is None
+
+def test_mesh_registry():
+    from pyGandalf.utilities.mesh_registry import MeshRegistry
+    from pyGandalf.utilities.mesh_lib import MeshLib
+
+    vertices = np.zeros((4096, 3), dtype=np.float32)
+    other_vertices = vertices.copy()
+    other_vertices[2048, 1] = 1.0
+
+    # Large arrays that only differ in the middle have different identities
+    assert MeshRegistry().get_mesh_id(StaticMeshComponent('mesh', [vertices])) != MeshRegistry().get_mesh_id(StaticMeshComponent('mesh', [other_vertices]))
+    assert MeshRegistry().get_mesh_id(StaticMeshComponent('mesh', [vertices])) == MeshRegistry().get_mesh_id(StaticMeshComponent('mesh', [vertices.copy()]))
+
+    # The digest of an array is computed once, for as long as the array lives
+    with mock.patch.object(MeshRegistry, 'calculate_digest', wraps=MeshRegistry().calculate_digest) as calculate_digest:
+        shared_vertices = np.ones((16, 3), dtype=np.float32)
+        for _ in range(10):
+            MeshRegistry().get_mesh_id(StaticMeshComponent('mesh', [shared_vertices, shared_vertices]))
+        assert calculate_digest.call_count == 1
+
+    indices = np.arange(12, dtype=np.uint32)
+    MeshRegistry().get_mesh_id(StaticMeshComponent('mesh', [vertices], indices))
+
+    key = id(indices)
+    assert key in MeshRegistry().array_digests
+    del indices
+    assert key not in MeshRegistry().array_digests
+
+    # Meshes loaded from a file are identified by the file
+    with mock.patch.dict(MeshLib().meshes_names, {'monkey': 'models/monkey.obj'}):
+        assert MeshRegistry().get_mesh_id(StaticMeshComponent('monkey')) == ('file', 'models/monkey.obj')
+
+def test_webgpu_instance_buffer():
+    from pyGandalf.utilities.webgpu_material_lib import InstanceBuffer, CPUBuffer
+
+    initialize_renderer()
+    WebGPURenderer().device.create_buffer.side_effect = lambda size, usage: mock.Mock(size=size)
+
+    instance_buffer = InstanceBuffer(CPUBuffer(('modelMatrix', np.float32, (4, 4))).dtype, 0, 1)
+    assert instance_buffer.capacity == InstanceBuffer.INITIAL_CAPACITY
+
+    # The buffer grows geometrically and keeps its contents
+    assert not instance_buffer.resize(10)
+    instance_buffer['modelMatrix'] = np.arange(10, dtype=np.float32)[:, np.newaxis, np.newaxis]
+    assert instance_buffer.upload() == [(0, 10)]
+
+    assert instance_buffer.resize(100)
+    assert instance_buffer.capacity == 128
+    assert instance_buffer.buffer.size == 128 * 64
+    assert np.array_equal(instance_buffer['modelMatrix'][:10, 0, 0], np.arange(10))
+
+    # Only the instances that changed are uploaded, the grown buffer is uploaded as a whole
+    instance_buffer['modelMatrix'] = np.arange(100, dtype=np.float32)[:, np.newaxis, np.newaxis]
+    assert instance_buffer.upload() == [(0, 100)]
+    assert instance_buffer.upload() == []
+
+    instance_buffer['modelMatrix'][3] = 0.5
+    instance_buffer['modelMatrix'][50:52] = 0.5
+    with mock.patch.object(WebGPURenderer, 'write_buffer') as write_buffer:
+        assert instance_buffer.upload() == [(3, 4), (50, 52)]
+        assert write_buffer.call_args.args[3] == 50 * 64
+
+    # Too many changed ranges are uploaded as one
+    instance_buffer['modelMatrix'][::2] = 2.0
+    assert instance_buffer.upload() == [(0, 99)]
+
+def test_webgpu_texture_residency():
+    from pyGandalf.utilities.webgpu_texture_lib import WebGPUTextureLib, TextureData
+
+    initialize_renderer()
+
+    with mock.patch.object(WebGPURenderer, 'write_texture') as write_texture:
+        # The texture is uploaded once when it is built
+        WebGPUTextureLib().build('streamed_texture', TextureData(image_bytes=bytes(16), width=2, height=2))
+        texture_instance = WebGPUTextureLib().get_instance('streamed_texture')
+        assert write_texture.call_count == 1
+
+        for _ in range(10):
+            WebGPUTextureLib().upload(texture_instance)
+        assert write_texture.call_count == 1
+
+        # It is uploaded again only once after its data is marked as dirty
+        texture_instance.data.image_bytes = bytes([255] * 16)
+        WebGPUTextureLib().mark_dirty('streamed_texture')
+        for _ in range(10):
+            WebGPUTextureLib().upload(texture_instance)
+        assert write_texture.call_count == 2
+
+        # Streamed updates are written right away
+        WebGPUTextureLib().update('streamed_texture', bytes(4), (1, 1, 0), [1, 1, 1])
+        assert write_texture.call_count == 3
+        assert texture_instance.data.image_bytes == bytes([255] * 16)
+
+        WebGPUTextureLib().update('streamed_texture', bytes(16))
+        assert texture_instance.data.image_bytes == bytes(16)
+        assert not texture_instance.dirty
+
+def test_webgpu_parse_struct():
+    from pyGandalf.utilities.webgpu_shader_lib import WebGPUShaderLib
+
+    # The last member may omit its trailing comma
+    shader_code = 'struct InstanceData { modelMatrix: mat4x4f, inverseModelMatrix: mat4x4f }'
+    assert WebGPUShaderLib().parse_struct(shader_code, 'InstanceData') == {'modelMatrix': 'mat4x4f', 'inverseModelMatrix': 'mat4x4f'}
+
+    shader_code = '''
+    struct UniformData {
+        lightPositions: array<vec4<f32>, 4>,
+        lightCount: f32,
+    };
+    '''
+    assert WebGPUShaderLib().parse_struct(shader_code, 'UniformData') == {'lightPositions': 'array<vec4<f32>, 4>', 'lightCount': 'f32'}
+    assert WebGPUShaderLib().parse_struct(shader_code, 'ModelData') == {}